@@ -0,0 +1,221 @@
+"""Generates reproducible synthetic GeoJSON features for the benchmarks.
+
+Run with `python benchmarks/generator.py [count] [seed] > features.json` to write
+a FeatureCollection. The same seed and settings always give the same features.
+"""
+import json
+import math
+import random
+import sys
+from dataclasses import dataclass
+from typing import Any, Literal
+
+GeometryType = Literal["Point", "LineString", "Polygon"]
+
+
+@dataclass
+class GeneratorSettings:
+    """Represents the shape of the generated data.
+
+    Attributes:
+        seed (int): The seed of the random generator.
+        min_vertices (int): The minimum number of vertices of lines and rings.
+        max_vertices (int): The maximum number of vertices of lines and rings.
+        geometry_types (tuple[GeometryType, ...]): The geometry types to pick
+            from, uniformly.
+        distribution (str): `uniform` spreads the features over the whole map,
+            `clustered` gathers them around a few random centers.
+        clusters (int): The number of clusters of the `clustered` distribution.
+        cluster_spread (float): The standard deviation, in degrees, of the
+            distance of the features to their cluster center.
+        feature_size (float): The radius, in degrees, of lines and polygons.
+        properties (int): The number of properties of each feature.
+        property_cardinality (int): The number of distinct values per property.
+    """
+
+    seed: int = 0
+    min_vertices: int = 8
+    max_vertices: int = 64
+    geometry_types: tuple[GeometryType, ...] = ("Point", "LineString", "Polygon")
+    distribution: Literal["uniform", "clustered"] = "uniform"
+    clusters: int = 8
+    cluster_spread: float = 2.0
+    feature_size: float = 0.05
+    properties: int = 3
+    property_cardinality: int = 100
+
+
+class FeatureGenerator:
+    """Generates features and query areas from a seeded random generator."""
+
+    def __init__(self, settings: GeneratorSettings) -> None:
+        """Initializes the generator.
+
+        Args:
+            settings (GeneratorSettings): The shape of the generated data.
+        """
+        self.settings = settings
+        self.random = random.Random(settings.seed)
+        self.centers = [self._uniform_point() for _ in range(settings.clusters)]
+
+    def _uniform_point(self) -> tuple[float, float]:
+        """Returns a random position away from the poles and the antimeridian."""
+        margin = 2 * self.settings.feature_size
+        return (
+            self.random.uniform(-180 + margin, 180 - margin),
+            self.random.uniform(-80, 80),
+        )
+
+    def point(self) -> tuple[float, float]:
+        """Returns a position following the configured distribution.
+
+        Returns:
+            tuple[float, float]: The lon/lat position.
+        """
+        if self.settings.distribution == "uniform":
+            return self._uniform_point()
+        x, y = self.random.choice(self.centers)
+        margin = 2 * self.settings.feature_size
+        return (
+            max(
+                -180 + margin,
+                min(180 - margin, self.random.gauss(x, self.settings.cluster_spread)),
+            ),
+            max(-80, min(80, self.random.gauss(y, self.settings.cluster_spread))),
+        )
+
+    def geometry(self) -> dict[str, Any]:
+        """Returns a random geometry of one of the configured types.
+
+        Polygons are star shaped around their center, so they are always simple.
+
+        Returns:
+            dict[str, Any]: The GeoJSON geometry.
+        """
+        geo_type = self.random.choice(self.settings.geometry_types)
+        x, y = self.point()
+        if geo_type == "Point":
+            return {"type": "Point", "coordinates": [x, y]}
+
+        size = self.settings.feature_size
+        vertices = self.random.randint(
+            self.settings.min_vertices,
+            self.settings.max_vertices,
+        )
+        if geo_type == "LineString":
+            step = 2 * size / max(1, vertices - 1)
+            line = [[x - size + index * step, y] for index in range(vertices)]
+            for position in line:
+                position[1] += self.random.uniform(-size, size)
+            return {"type": "LineString", "coordinates": line}
+
+        ring = []
+        for index in range(max(3, vertices)):
+            angle = 2 * math.pi * index / max(3, vertices)
+            radius = size * self.random.uniform(0.5, 1)
+            ring.append([x + radius * math.cos(angle), y + radius * math.sin(angle)])
+        return {"type": "Polygon", "coordinates": [[*ring, ring[0]]]}
+
+    def properties(self) -> dict[str, str]:
+        """Returns random properties drawn from the configured cardinality.
+
+        Returns:
+            dict[str, str]: The properties.
+        """
+        return {
+            f"p{index}": f"v{self.random.randrange(self.settings.property_cardinality)}"
+            for index in range(self.settings.properties)
+        }
+
+    def feature(self) -> dict[str, Any]:
+        """Returns a random GeoJSON feature.
+
+        Returns:
+            dict[str, Any]: The feature.
+        """
+        return {
+            "type": "Feature",
+            "geometry": self.geometry(),
+            "properties": self.properties(),
+        }
+
+    def features(self, count: int) -> list[dict[str, Any]]:
+        """Returns random GeoJSON features.
+
+        Args:
+            count (int): The number of features.
+
+        Returns:
+            list[dict[str, Any]]: The features.
+        """
+        return [self.feature() for _ in range(count)]
+
+    def collection(self, count: int) -> dict[str, Any]:
+        """Returns a GeoJSON FeatureCollection of random features.
+
+        Args:
+            count (int): The number of features.
+
+        Returns:
+            dict[str, Any]: The FeatureCollection.
+        """
+        return {"type": "FeatureCollection", "features": self.features(count)}
+
+    def viewport(self, size: float) -> tuple[float, float, float, float]:
+        """Returns a square query area centered on the data distribution.
+
+        Args:
+            size (float): The width and height of the area, in degrees.
+
+        Returns:
+            tuple[float, float, float, float]: The `minx, miny, maxx, maxy`
+                bounding box.
+        """
+        x, y = self.point()
+        half = size / 2
+        return (
+            max(-180, x - half),
+            max(-90, y - half),
+            min(180, x + half),
+            min(90, y + half),
+        )
+
+
+def bbox_polygon(bbox: tuple[float, float, float, float]) -> dict[str, Any]:
+    """Returns the GeoJSON polygon of a bounding box.
+
+    Args:
+        bbox (tuple[float, float, float, float]): The `minx, miny, maxx, maxy`
+            bounding box.
+
+    Returns:
+        dict[str, Any]: The polygon.
+    """
+    min_x, min_y, max_x, max_y = bbox
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [
+                [min_x, min_y],
+                [max_x, min_y],
+                [max_x, max_y],
+                [min_x, max_y],
+                [min_x, min_y],
+            ],
+        ],
+    }
+
+
+def main(count: int = 1_000, seed: int = 0) -> None:
+    """Writes a FeatureCollection of random features to the standard output.
+
+    Args:
+        count (int): The number of features.
+        seed (int): The seed of the random generator.
+    """
+    generator = FeatureGenerator(GeneratorSettings(seed=seed))
+    json.dump(generator.collection(count), sys.stdout)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,74 @@
+"""Compares the Pydantic GeoJSON models with `CompactGeometry` on large polygons.
+
+Run with `python benchmarks/geometry.py [vertices] [repeat]`.
+"""
+import json
+import math
+import sys
+import timeit
+from collections.abc import Callable
+
+from feature_store.server.models.compact import CompactGeometry
+from feature_store.server.models.geojson import GeoJsonPolygon
+
+
+def make_polygon(vertices: int) -> dict[str, object]:
+    """Returns a GeoJSON polygon approximating a circle.
+
+    Args:
+        vertices (int): The number of distinct vertices of the exterior ring.
+
+    Returns:
+        dict[str, object]: The GeoJSON polygon.
+    """
+    ring = [
+        [
+            10 * math.cos(2 * math.pi * index / vertices),
+            10 * math.sin(2 * math.pi * index / vertices),
+        ]
+        for index in range(vertices)
+    ]
+    return {"type": "Polygon", "coordinates": [[*ring, ring[0]]]}
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """Returns the best time of a function over `repeat` runs, in milliseconds."""
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def main(vertices: int = 100_000, repeat: int = 5) -> None:
+    """Prints the validation and serialization times of both representations.
+
+    Args:
+        vertices (int): The number of vertices of the polygon.
+        repeat (int): The number of runs to keep the best time of.
+    """
+    polygon = make_polygon(vertices)
+    model = GeoJsonPolygon.parse_obj(polygon)
+    compact = CompactGeometry.validate(polygon)
+
+    results = {
+        "validate": (
+            measure(lambda: GeoJsonPolygon.parse_obj(polygon), repeat),
+            measure(lambda: CompactGeometry.validate(polygon), repeat),
+        ),
+        "to JSON": (
+            measure(lambda: model.json(by_alias=True), repeat),
+            measure(compact.to_json, repeat),
+        ),
+    }
+    assert json.loads(model.json(by_alias=True)) == json.loads(  # noqa: S101
+        compact.to_json(),
+    )
+
+    print(f"Polygon with {vertices} vertices, best of {repeat} runs")
+    print(f"{'':10}{'pydantic':>12}{'compact':>12}{'speedup':>10}")
+    for name, (baseline, candidate) in results.items():
+        print(
+            f"{name:10}{baseline:>10.1f}ms{candidate:>10.1f}ms"
+            f"{baseline / candidate:>9.1f}x",
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
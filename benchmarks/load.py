@@ -0,0 +1,337 @@
+"""Measures the throughput and latency of the feature endpoints.
+
+Run with `python benchmarks/load.py [options]`, see `--help`. The app runs
+in-process behind an ASGI transport, with an in-memory mongomock database by
+default, or with `--mongo` against the MongoDB configured by the `MONGODB_*`
+environment variables. The benchmark database is emptied first, and its missing
+indexes are built as by the migration command.
+
+Features are ingested with bulk inserts, then fetched by id, listed by bounding
+box and searched by intersection, each by `--concurrency` concurrent clients.
+Mongomock cannot run `$geoIntersects`, so without `--mongo` the listing is not
+limited to a bounding box and intersects is not measured. The results are
+printed and can be saved with `--output` and compared with a previous run with
+`--baseline`, which exits with status 1 on regressions.
+
+The latency percentiles of a scenario with fewer than `MIN_SAMPLES` requests are
+mostly its slowest requests, so they are not checked, and its throughput only
+regresses past `--noise-tolerance`. Ingest sends `--features / --batch` requests,
+100 by default.
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import sys
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+import httpx
+from beanie import init_beanie
+from generator import FeatureGenerator, GeneratorSettings, bbox_polygon
+from mongomock_motor import AsyncMongoMockClient
+
+from feature_store.server import database
+from feature_store.server.app import app
+from feature_store.server.database import DBFeature, DBFeatureLOD
+
+Request = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+PERCENTILES = {"p50_ms": 0.5, "p95_ms": 0.95, "p99_ms": 0.99}
+MIN_SAMPLES = 100
+
+
+def percentile(latencies: list[float], fraction: float) -> float:
+    """Returns a percentile of sorted latencies, with the nearest rank method.
+
+    Args:
+        latencies (list[float]): The latencies, sorted.
+        fraction (float): The percentile, between 0 and 1.
+
+    Returns:
+        float: The latency below which `fraction` of the requests completed.
+    """
+    return latencies[max(0, math.ceil(fraction * len(latencies)) - 1)]
+
+
+async def run(
+    client: httpx.AsyncClient,
+    requests: Iterator[Request],
+    concurrency: int,
+) -> dict[str, float]:
+    """Sends requests from concurrent clients and summarizes their latency.
+
+    Args:
+        client (httpx.AsyncClient): The client of the app.
+        requests (Iterator[Request]): The requests to send, shared by the clients.
+        concurrency (int): The number of concurrent clients.
+
+    Returns:
+        dict[str, float]: The number of requests, the requests per second and
+            the latency percentiles in milliseconds.
+    """
+    latencies: list[float] = []
+
+    async def _worker() -> None:
+        for request in requests:
+            start = time.perf_counter()
+            response = await request(client)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    summary = {"requests": len(latencies), "throughput": len(latencies) / elapsed}
+    for name, fraction in PERCENTILES.items():
+        summary[name] = percentile(latencies, fraction) * 1000
+    return summary
+
+
+async def setup_database(mongo: bool, name: str) -> None:  # noqa: FBT001
+    """Initializes an empty benchmark database, with its indexes on MongoDB.
+
+    Args:
+        mongo (bool): Whether to use MongoDB instead of mongomock.
+        name (str): The name of the MongoDB database.
+    """
+    if mongo:
+        database.database_settings.database = name
+        await database.init_db()
+        await database.create_indexes()
+    else:
+        await init_beanie(
+            database=AsyncMongoMockClient().benchmark,
+            document_models=[DBFeature, DBFeatureLOD],  # type: ignore  # noqa: PGH003
+        )
+    await DBFeature.get_motor_collection().delete_many({})
+    await DBFeatureLOD.get_motor_collection().delete_many({})
+
+
+async def benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    """Runs every scenario of the benchmark.
+
+    Args:
+        args (argparse.Namespace): The command line options.
+
+    Returns:
+        dict[str, Any]: The settings and the results of each scenario.
+    """
+    settings = GeneratorSettings(
+        seed=args.seed,
+        min_vertices=args.min_vertices,
+        max_vertices=args.max_vertices,
+        distribution=args.distribution,
+        property_cardinality=args.property_cardinality,
+    )
+    generator = FeatureGenerator(settings)
+    await setup_database(args.mongo, args.database)
+
+    transport = httpx.ASGITransport(app=app)  # type: ignore  # noqa: PGH003
+    results: dict[str, dict[str, float]] = {}
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+    ) as client:
+        batches = [
+            generator.collection(min(args.batch, args.features - offset))
+            for offset in range(0, args.features, args.batch)
+        ]
+        feature_ids: list[str] = []
+
+        def _ingest(batch: dict[str, Any]) -> Request:
+            async def _request(client: httpx.AsyncClient) -> httpx.Response:
+                response = await client.post("/features/bulk", json=batch)
+                feature_ids.extend(response.json()["inserted_ids"])
+                return response
+
+            return _request
+
+        results["ingest"] = await run(
+            client,
+            iter([_ingest(batch) for batch in batches]),
+            args.concurrency,
+        )
+        results["ingest"]["features_per_second"] = (
+            results["ingest"]["throughput"] * args.features / len(batches)
+        )
+
+        def _get(feature_id: str) -> Request:
+            return lambda client: client.get(f"/features/{feature_id}")
+
+        results["get_by_id"] = await run(
+            client,
+            (_get(generator.random.choice(feature_ids)) for _ in range(args.requests)),
+            args.concurrency,
+        )
+
+        def _list(bbox: tuple[float, float, float, float]) -> Request:
+            params: dict[str, Any] = {"limit": args.limit}
+            if args.mongo:
+                params["bbox"] = ",".join(map(str, bbox))
+            return lambda client: client.get("/features/", params=params)
+
+        results["list"] = await run(
+            client,
+            (_list(generator.viewport(args.viewport)) for _ in range(args.requests)),
+            args.concurrency,
+        )
+
+        def _intersects(bbox: tuple[float, float, float, float]) -> Request:
+            return lambda client: client.post(
+                "/features/geospatial/intersects",
+                params={"limit": args.limit},
+                json=bbox_polygon(bbox),
+            )
+
+        if args.mongo:
+            results["intersects"] = await run(
+                client,
+                (
+                    _intersects(generator.viewport(args.viewport))
+                    for _ in range(args.requests)
+                ),
+                args.concurrency,
+            )
+
+    if args.mongo:
+        database.close_db()
+    return {
+        "settings": {
+            **asdict(settings),
+            **{
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "baseline")
+            },
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+    noise_tolerance: float,
+) -> list[str]:
+    """Prints the change of every metric since a baseline and finds regressions.
+
+    Args:
+        results (dict[str, dict[str, float]]): The results of this run.
+        baseline (dict[str, dict[str, float]]): The results of the baseline run.
+        tolerance (float): The relative change allowed before a regression.
+        noise_tolerance (float): The relative throughput change allowed before a
+            regression, for scenarios of fewer than `MIN_SAMPLES` requests.
+
+    Returns:
+        list[str]: The description of each regression.
+    """
+    regressions = []
+    print(f"\n{'vs baseline':12}{'req/s':>12}{'p50':>12}{'p95':>12}{'p99':>12}")
+    for scenario, metrics in results.items():
+        previous = baseline.get(scenario)
+        if previous is None:
+            continue
+        changes = {
+            name: metrics[name] / previous[name] - 1
+            for name in ("throughput", *PERCENTILES)
+            if previous.get(name)
+        }
+        sampled = min(metrics["requests"], previous["requests"]) >= MIN_SAMPLES
+        print(
+            f"{scenario:12}"
+            + "".join(
+                f"{changes.get(name, 0):>+12.0%}"
+                for name in ("throughput", *PERCENTILES)
+            )
+            + ("" if sampled else "  (few samples)"),
+        )
+        allowed = tolerance if sampled else max(tolerance, noise_tolerance)
+        if changes.get("throughput", 0) < -allowed:
+            regressions.append(f"{scenario} throughput {changes['throughput']:+.0%}")
+        if sampled and changes.get("p95_ms", 0) > tolerance:
+            regressions.append(f"{scenario} p95 {changes['p95_ms']:+.0%}")
+    return regressions
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    """Parses the command line options.
+
+    Args:
+        argv (list[str]): The command line arguments.
+
+    Returns:
+        argparse.Namespace: The options.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--features", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--viewport", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-vertices", type=int, default=8)
+    parser.add_argument("--max-vertices", type=int, default=64)
+    parser.add_argument(
+        "--distribution",
+        choices=["uniform", "clustered"],
+        default="uniform",
+    )
+    parser.add_argument("--property-cardinality", type=int, default=100)
+    parser.add_argument("--mongo", action="store_true")
+    parser.add_argument("--database", default="feature_store_benchmark")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--noise-tolerance", type=float, default=0.3)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> None:
+    """Runs the benchmark, saves and compares its results.
+
+    Args:
+        argv (list[str]): The command line arguments.
+
+    Raises:
+        SystemExit: With status 1, when a regression was found.
+    """
+    args = parse_args(argv)
+    report = asyncio.run(benchmark(args))
+
+    print(f"{args.features} features, {args.concurrency} concurrent clients")
+    print(f"{'':12}{'requests':>10}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for scenario, metrics in report["results"].items():
+        print(
+            f"{scenario:12}{metrics['requests']:>10.0f}{metrics['throughput']:>10.1f}"
+            + "".join(f"{metrics[name]:>7.1f}ms" for name in PERCENTILES),
+        )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2, default=str))
+    if args.baseline is None:
+        return
+    baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare(
+        report["results"],
+        baseline,
+        args.tolerance,
+        args.noise_tolerance,
+    )
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
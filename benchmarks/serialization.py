@@ -0,0 +1,129 @@
+"""Compares the validated response path of feature listings with raw documents.
+
+Run with `python benchmarks/serialization.py [features] [vertices] [repeat]`.
+The database is an in-memory mongomock one, so the end to end timings include its
+own overhead, identical for both paths.
+"""
+import asyncio
+import json
+import math
+import sys
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from beanie import init_beanie
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from pydantic import parse_obj_as
+
+from feature_store.server.app import app
+from feature_store.server.database import DBFeature, DBFeatureLOD
+from feature_store.server.serialization import dumps
+
+
+def make_feature(index: int, vertices: int) -> dict[str, Any]:
+    """Returns a GeoJSON polygon feature approximating a small circle.
+
+    Args:
+        index (int): The index of the feature, used to spread the features out.
+        vertices (int): The number of distinct vertices of the exterior ring.
+
+    Returns:
+        dict[str, Any]: The GeoJSON feature.
+    """
+    x, y = index % 360 - 180, index // 360 % 180 - 90
+    ring = [
+        [
+            x + 0.5 + 0.4 * math.cos(2 * math.pi * vertex / vertices),
+            y + 0.5 + 0.4 * math.sin(2 * math.pi * vertex / vertices),
+        ]
+        for vertex in range(vertices)
+    ]
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Polygon", "coordinates": [[*ring, ring[0]]]},
+        "properties": {"name": f"feature {index}"},
+    }
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """Returns the best time of a function over `repeat` runs, in milliseconds."""
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+async def setup(count: int, vertices: int) -> list[dict[str, Any]]:
+    """Fills an in-memory database and returns its raw documents.
+
+    Args:
+        count (int): The number of features to insert.
+        vertices (int): The number of vertices of each feature.
+
+    Returns:
+        list[dict[str, Any]]: The stored documents, as Motor returns them.
+    """
+    await init_beanie(
+        database=AsyncMongoMockClient().benchmark,
+        document_models=[DBFeature, DBFeatureLOD],  # type: ignore  # noqa: PGH003
+    )
+    await DBFeature.insert_many(
+        [DBFeature.parse_obj(make_feature(index, vertices)) for index in range(count)],
+    )
+    documents: list[dict[str, Any]] = (
+        await DBFeature.get_motor_collection()
+        .find(
+            {},
+        )
+        .to_list(None)
+    )
+    return documents
+
+
+def main(count: int = 1_000, vertices: int = 100, repeat: int = 3) -> None:
+    """Prints the encoding and end to end times of both paths.
+
+    Args:
+        count (int): The number of features listed.
+        vertices (int): The number of vertices of each feature.
+        repeat (int): The number of runs to keep the best time of.
+    """
+    documents = asyncio.run(setup(count, vertices))
+
+    def validated() -> bytes:
+        """Parses, validates and encodes the documents like the response model."""
+        features = [DBFeature.parse_obj(document) for document in documents]
+        content = jsonable_encoder(parse_obj_as(list[DBFeature], features))
+        return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def raw() -> bytes:
+        """Encodes the documents as they are stored."""
+        encoded: bytes = dumps(documents)
+        return encoded
+
+    assert json.loads(validated()) == json.loads(raw())  # noqa: S101
+
+    client = TestClient(app)
+    params = {"limit": count}
+    results = {
+        "encode": (measure(validated, repeat), measure(raw, repeat)),
+        "GET": (
+            measure(lambda: client.get("/features/", params=params), repeat),
+            measure(
+                lambda: client.get("/features/", params={**params, "raw": True}),
+                repeat,
+            ),
+        ),
+    }
+
+    print(f"{count} features of {vertices} vertices, best of {repeat} runs")
+    print(f"{'':8}{'validated':>12}{'raw':>12}{'speedup':>10}")
+    for name, (baseline, candidate) in results.items():
+        print(
+            f"{name:8}{baseline:>10.1f}ms{candidate:>10.1f}ms"
+            f"{baseline / candidate:>9.1f}x",
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -1,11 +1,19 @@
 """Implements entrypoint for the Feature Store server."""
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 
-from feature_store.server.database import init_db
+from feature_store.server.database import close_db, init_db, unready_reasons
+from feature_store.server.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from feature_store.server.routes.export import router as export_router
 from feature_store.server.routes.features import router as features_router
+from feature_store.server.routes.subscriptions import router as subscriptions_router
+from feature_store.server.routes.tiles import router as tiles_router
 
 app = FastAPI()
 app.include_router(features_router, prefix="/features")
+app.include_router(tiles_router, prefix="/features/tiles")
+app.include_router(subscriptions_router, prefix="/features")
+app.include_router(export_router, prefix="/features/export")
+app.add_middleware(MetricsMiddleware)
 
 
 @app.on_event("startup")
@@ -14,6 +22,12 @@ async def start_db() -> None:
     await init_db()
 
 
+@app.on_event("shutdown")
+async def stop_db() -> None:
+    """Closes the database connections."""
+    close_db()
+
+
 @app.get("/")
 async def read_root() -> dict[str, str]:
     """Returns a welcome message.
@@ -22,3 +36,29 @@ async def read_root() -> dict[str, str]:
         dict: A welcome message.
     """
     return {"message": "Welcome to Feature Store!"}
+
+
+@app.get("/metrics", response_class=Response, include_in_schema=False)
+async def get_metrics() -> Response:
+    """Returns the metrics of the worker process in the Prometheus text format.
+
+    Returns:
+        Response: The metrics.
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/ready", include_in_schema=False)
+async def get_ready() -> dict[str, str]:
+    """Reports whether the worker process can serve traffic.
+
+    Raises:
+        HTTPException: If the database is not initialized or indexes are missing.
+
+    Returns:
+        dict: The status of the worker.
+    """
+    reasons = await unready_reasons()
+    if reasons:
+        raise HTTPException(status_code=503, detail=reasons)
+    return {"status": "ready"}
@@ -0,0 +1,256 @@
+"""Implements an in-process cache of geospatial query results.
+
+Cached answers are indexed by the bounding box of their query geometry, and the
+features they reference are shared between answers and tracked by id and level
+of detail, so answers at different levels never see each other's geometries. A
+write only drops the answers that contained the written feature, or whose query
+region overlaps its new bounding box, so unrelated viewports stay cached.
+
+The cache lives in the worker process: writes made through other processes are
+only picked up once entries expire, see `FEATURE_STORE_QUERY_CACHE_TTL`.
+"""
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel
+
+from feature_store.server.database import DBFeature
+from feature_store.server.geometry import Bounds
+from feature_store.server.spatial_index import SpatialIndex
+
+query_cache_bytes = int(os.getenv("FEATURE_STORE_QUERY_CACHE_MB", "0")) * 1024 * 1024
+query_cache_ttl = float(os.getenv("FEATURE_STORE_QUERY_CACHE_TTL", "0")) or None
+
+ENTRY_OVERHEAD = 256
+FEATURE_OVERHEAD = 512
+NUMBER_SIZE = 32
+LIST_SIZE = 64
+
+
+def _estimate_size(value: object) -> int:
+    """Returns an approximation of the memory held by nested coordinate lists."""
+    if isinstance(value, list):
+        return LIST_SIZE + sum(_estimate_size(item) for item in value)
+    return NUMBER_SIZE
+
+
+def estimate_feature_size(feature: DBFeature) -> int:
+    """Returns an approximation of the memory held by a feature.
+
+    Args:
+        feature (DBFeature): The feature to measure.
+
+    Returns:
+        int: The approximate size of the feature in bytes.
+    """
+    properties = sum(len(key) + len(value) for key, value in feature.properties.items())
+    return FEATURE_OVERHEAD + properties + _estimate_size(feature.geometry.coordinates)
+
+
+class CacheStats(BaseModel):
+    """Represents the counters of the query cache."""
+
+    enabled: bool
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    entries: int
+    features: int
+    size_bytes: int
+    max_bytes: int
+
+
+@dataclass
+class _CachedFeature:
+    """Holds a feature shared by one or more cached answers."""
+
+    feature: DBFeature
+    size: int
+    keys: set[Hashable] = field(default_factory=set)
+
+
+@dataclass
+class _CacheEntry:
+    """Holds a cached query answer."""
+
+    feature_ids: list[PydanticObjectId]
+    lod: int
+    next_cursor: str | None
+    size: int
+    created: float
+
+
+class QueryCache:
+    """Caches geospatial query answers with LRU eviction under a memory budget."""
+
+    def __init__(self, max_bytes: int, ttl: float | None = None) -> None:
+        """Initializes the cache.
+
+        Args:
+            max_bytes (int): The memory budget of the cache, 0 disables it.
+            ttl (float | None): The number of seconds an answer stays valid.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._size = 0
+        self._entries: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+        self._features: dict[tuple[PydanticObjectId, int], _CachedFeature] = {}
+        self._lods: set[int] = set()
+        self._regions: SpatialIndex[Hashable] = SpatialIndex()
+
+    @property
+    def enabled(self) -> bool:
+        """Returns whether the cache stores anything."""
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable) -> tuple[list[DBFeature], str | None] | None:
+        """Returns a cached answer.
+
+        Args:
+            key (Hashable): The key of the query.
+
+        Returns:
+            tuple[list[DBFeature], str | None] | None: The features and next page
+                cursor of the answer, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and self.ttl
+            and time.monotonic() - entry.created > self.ttl
+        ):
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        features = [
+            self._features[feature_id, entry.lod].feature
+            for feature_id in entry.feature_ids
+        ]
+        return features, entry.next_cursor
+
+    def put(  # noqa: PLR0913
+        self,
+        key: Hashable,
+        region: Bounds,
+        features: list[DBFeature],
+        next_cursor: str | None,
+        *,
+        lod: int = 0,
+    ) -> None:
+        """Caches the answer of a query.
+
+        Args:
+            key (Hashable): The key of the query.
+            region (Bounds): The bounding box of the query geometry.
+            features (list[DBFeature]): The features of the answer.
+            next_cursor (str | None): The next page cursor of the answer.
+            lod (int): The level of detail of the geometries of the features.
+        """
+        if not self.enabled:
+            return
+        self._drop(key)
+        self._lods.add(lod)
+
+        feature_ids: list[PydanticObjectId] = []
+        for feature in features:
+            feature_id: PydanticObjectId = feature.id  # type: ignore  # noqa: PGH003
+            cached = self._features.get((feature_id, lod))
+            if cached is None:
+                cached = _CachedFeature(feature, estimate_feature_size(feature))
+                self._features[feature_id, lod] = cached
+                self._size += cached.size
+            else:
+                cached.feature = feature
+            cached.keys.add(key)
+            feature_ids.append(feature_id)
+
+        entry = _CacheEntry(
+            feature_ids=feature_ids,
+            lod=lod,
+            next_cursor=next_cursor,
+            size=ENTRY_OVERHEAD + 16 * len(feature_ids),
+            created=time.monotonic(),
+        )
+        self._entries[key] = entry
+        self._size += entry.size
+        self._regions.insert(key, region)
+
+        while self._size > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, feature_id: PydanticObjectId, bounds: Bounds | None) -> None:
+        """Drops the answers a write to a feature may have changed.
+
+        Args:
+            feature_id (PydanticObjectId): The id of the written feature.
+            bounds (Bounds | None): The bounding box of the feature after the write,
+                None if it was deleted.
+        """
+        if not self._entries:
+            return
+        stale: set[Hashable] = set()
+        for lod in self._lods:
+            cached = self._features.get((feature_id, lod))
+            if cached is not None:
+                stale |= cached.keys
+        if bounds is not None:
+            stale |= self._regions.search(bounds)
+        for key in stale:
+            self._drop(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drops every cached answer."""
+        for key in list(self._entries):
+            self._drop(key)
+
+    def stats(self) -> CacheStats:
+        """Returns the counters of the cache.
+
+        Returns:
+            CacheStats: The counters of the cache.
+        """
+        return CacheStats(
+            enabled=self.enabled,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            invalidations=self.invalidations,
+            entries=len(self._entries),
+            features=len(self._features),
+            size_bytes=self._size,
+            max_bytes=self.max_bytes,
+        )
+
+    def _drop(self, key: Hashable) -> None:
+        """Removes an answer and releases the features only it referenced."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry.size
+        self._regions.remove(key)
+        for feature_id in entry.feature_ids:
+            cached = self._features.get((feature_id, entry.lod))
+            if cached is None:
+                continue
+            cached.keys.discard(key)
+            if not cached.keys:
+                del self._features[feature_id, entry.lod]
+                self._size -= cached.size
+
+
+query_cache = QueryCache(query_cache_bytes, query_cache_ttl)
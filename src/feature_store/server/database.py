@@ -1,12 +1,21 @@
 """Implements the database logic for the Feature Store server."""
 
+import asyncio
+import logging
 import os
+from datetime import datetime
+from typing import Any, Literal
 
 import pymongo
 from beanie import Document, init_beanie
+from motor.core import AgnosticClient, AgnosticCollection
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel
+from pydantic import BaseModel, BaseSettings
+from pymongo import IndexModel
+from pymongo.read_preferences import ReadPreference, _ServerMode
 
+from feature_store.server.geometry import Bounds
+from feature_store.server.metrics import command_metrics
 from feature_store.server.models.geojson import (
     GeoJsonLineString,
     GeoJsonPoint,
@@ -14,18 +23,180 @@ from feature_store.server.models.geojson import (
     GeoJSONType,
 )
 
-mongo_username = os.getenv("MONGODB_USERNAME")
-mongo_password = os.getenv("MONGODB_PASSWORD")
-mongo_host = os.getenv("MONGODB_HOST")
-mongo_port = os.getenv("MONGODB_PORT")
+logger = logging.getLogger(__name__)
+
+READ_PREFERENCES: dict[str, _ServerMode] = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+class DatabaseSettings(BaseSettings):
+    """Configures the MongoDB connection from `MONGODB_*` environment variables.
+
+    Attributes:
+        username (str | None): The user to authenticate as, if any.
+        password (str | None): The password of the user.
+        host (str): The host of the server.
+        port (int): The port of the server.
+        database (str): The name of the database.
+        max_pool_size (int): The maximum number of connections per server.
+        min_pool_size (int): The number of connections kept open per server, and
+            opened when the server starts.
+        max_idle_time_ms (int | None): How long an idle connection stays open.
+        connect_timeout_ms (int): How long opening a connection may take.
+        socket_timeout_ms (int | None): How long a request may wait for a reply.
+        server_selection_timeout_ms (int): How long a request may wait for a
+            suitable server.
+        wait_queue_timeout_ms (int | None): How long a request may wait for a
+            connection once the pool is full.
+        compressors (str | None): The comma separated wire compressors to offer,
+            among `zstd`, `snappy` and `zlib`.
+        read_preference (str): Where the read-only endpoints send their queries.
+            Writes always go to the primary.
+    """
+
+    username: str | None = None
+    password: str | None = None
+    host: str = "localhost"
+    port: int = 27017
+    database: str = "feature_store"
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: int | None = None
+    connect_timeout_ms: int = 5_000
+    socket_timeout_ms: int | None = 30_000
+    server_selection_timeout_ms: int = 5_000
+    wait_queue_timeout_ms: int | None = None
+    compressors: str | None = None
+    read_preference: Literal[
+        "primary",
+        "primaryPreferred",
+        "secondary",
+        "secondaryPreferred",
+        "nearest",
+    ] = "primary"
+
+    class Config:
+        """Configures the database settings."""
+
+        env_prefix = "MONGODB_"
+
+    @property
+    def uri(self) -> str:
+        """Returns the connection string of the server."""
+        if self.username is None:
+            return f"mongodb://{self.host}:{self.port}"
+        return f"mongodb://{self.username}:{self.password}@{self.host}:{self.port}"
+
+    def client_options(self) -> dict[str, Any]:
+        """Returns the keyword arguments of the Motor client.
+
+        Returns:
+            dict[str, Any]: The pool, timeout and compression options.
+        """
+        options: dict[str, Any] = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+        }
+        if self.compressors:
+            options["compressors"] = self.compressors
+        return options
+
+
+def property_indexes(spec: str) -> list[list[tuple[str, Any]]]:
+    """Builds the indexes serving property filters.
+
+    Args:
+        spec (str): Comma separated entries: `*` for a wildcard index over every
+            property, or a property name for a compound index of the property
+            and the geometry, serving filters on it within a region.
+
+    Returns:
+        list[list[tuple[str, Any]]]: The index keys.
+    """
+    indexes: list[list[tuple[str, Any]]] = []
+    for entry in filter(None, (entry.strip() for entry in spec.split(","))):
+        if entry == "*":
+            indexes.append([("properties.$**", pymongo.ASCENDING)])
+        else:
+            indexes.append(
+                [
+                    (f"properties.{entry}", pymongo.ASCENDING),
+                    ("geometry", pymongo.GEOSPHERE),
+                ],
+            )
+    return indexes
+
+
+database_settings = DatabaseSettings()
+property_index_spec = os.getenv("FEATURE_STORE_PROPERTY_INDEXES", "")
+_client: AgnosticClient | None = None
+_indexes_ready = False
+
+# The indexes of the features collection. They are built by the migration
+# command rather than at startup, see `feature_store.server.migrate`.
+FEATURE_INDEXES: list[list[tuple[str, Any]]] = [
+    [("geometry", pymongo.GEOSPHERE)],
+    [
+        ("bounds.min_x", pymongo.ASCENDING),
+        ("bounds.max_x", pymongo.ASCENDING),
+        ("bounds.min_y", pymongo.ASCENDING),
+        ("bounds.max_y", pymongo.ASCENDING),
+    ],
+    [
+        ("bounds.min_y", pymongo.ASCENDING),
+        ("bounds.max_y", pymongo.ASCENDING),
+        ("bounds.min_x", pymongo.ASCENDING),
+        ("bounds.max_x", pymongo.ASCENDING),
+    ],
+    *property_indexes(property_index_spec),
+]
+
+
+class FeatureBounds(BaseModel):
+    """Stores the precomputed bounding box of a feature's geometry."""
+
+    min_x: float
+    min_y: float
+    max_x: float
+    max_y: float
+
+    @classmethod
+    def from_bounds(cls: type["FeatureBounds"], bounds: Bounds) -> "FeatureBounds":
+        """Builds the stored form of a bounding box.
+
+        Args:
+            bounds (Bounds): The bounding box.
+
+        Returns:
+            FeatureBounds: The stored bounding box.
+        """
+        return cls(**bounds._asdict())
 
 
 class DBFeature(Document):
-    """Implements a Feature model."""
+    """Implements a Feature model.
+
+    `revision` is incremented by every write to the feature, and `updated_at`
+    holds the time of the last one. Both are unset on features stored before
+    they were maintained.
+    """
 
     geojson_type: GeoJSONType
     geometry: GeoJsonPoint | GeoJsonPolygon | GeoJsonLineString
     properties: dict[str, str]
+    bounds: FeatureBounds | None = None
+    revision: int = 0
+    updated_at: datetime | None = None
 
     class Config:
         """Configures the Feature model."""
@@ -33,14 +204,27 @@ class DBFeature(Document):
         fields = {"geojson_type": "type"}
 
         allow_population_by_field_name = True
+        smart_union = True
 
     class Settings:
         """Configures the database settings."""
 
         name = "features"
-        indexes = [
-            [("geometry", pymongo.GEOSPHERE)],
-        ]
+
+
+class DBFeatureLOD(Document):
+    """Stores the simplified geometries of a feature, keyed by level of detail.
+
+    The document shares the id of its feature. Levels are only stored when they
+    simplify the geometry.
+    """
+
+    geometries: dict[str, GeoJsonPoint | GeoJsonPolygon | GeoJsonLineString]
+
+    class Settings:
+        """Configures the database settings."""
+
+        name = "feature_lods"
 
 
 class UpdateDBFeature(BaseModel):
@@ -57,13 +241,122 @@ class UpdateDBFeature(BaseModel):
         allow_population_by_field_name = True
 
 
+def read_collection(document: type[Document]) -> AgnosticCollection:
+    """Returns the collection of a document model for read-only queries.
+
+    Args:
+        document (type[Document]): The document model.
+
+    Returns:
+        AgnosticCollection: The collection, reading from the servers of the
+            configured read preference.
+    """
+    collection: AgnosticCollection = document.get_motor_collection()
+    if database_settings.read_preference == "primary":
+        return collection
+    read_preference = READ_PREFERENCES[database_settings.read_preference]
+    return collection.with_options(read_preference=read_preference)  # type: ignore  # noqa: PGH003, E501
+
+
+async def _warm_pool(client: AgnosticClient, connections: int) -> None:
+    """Opens connections ahead of the first requests with concurrent pings.
+
+    Args:
+        client (AgnosticClient): The client to warm.
+        connections (int): The number of connections to open.
+    """
+    read_preference = READ_PREFERENCES[database_settings.read_preference]
+    await asyncio.gather(
+        *(
+            client.admin.command("ping", read_preference=read_preference)
+            for _ in range(connections)
+        ),
+    )
+
+
+async def missing_indexes() -> list[IndexModel]:
+    """Lists the indexes of the features collection that do not exist yet.
+
+    Indexes are matched by their keys, whatever their names and options.
+
+    Returns:
+        list[IndexModel]: The missing indexes, built in the background.
+    """
+    collection: AgnosticCollection = DBFeature.get_motor_collection()
+    existing = [list(index["key"].items()) async for index in collection.list_indexes()]
+    return [
+        IndexModel(keys, background=True)
+        for keys in FEATURE_INDEXES
+        if keys not in existing
+    ]
+
+
+async def create_indexes() -> list[str]:
+    """Creates the missing indexes of the features collection.
+
+    Existing indexes are left alone, so the creation can be repeated.
+
+    Returns:
+        list[str]: The names of the created indexes.
+    """
+    indexes = await missing_indexes()
+    if indexes:
+        collection: AgnosticCollection = DBFeature.get_motor_collection()
+        await collection.create_indexes(indexes)
+    return [index.document["name"] for index in indexes]
+
+
+async def unready_reasons() -> list[str]:
+    """Lists what keeps the server from serving traffic.
+
+    The indexes are checked again until they all exist, so the server becomes
+    ready once the migration command has built them.
+
+    Returns:
+        list[str]: The reasons, empty when the server is ready.
+    """
+    global _indexes_ready  # noqa: PLW0603
+    if _client is None:
+        return ["Database not initialized"]
+    if _indexes_ready:
+        return []
+    indexes = await missing_indexes()
+    _indexes_ready = not indexes
+    return [f"Missing index {index.document['name']}" for index in indexes]
+
+
 async def init_db() -> None:
-    """Initializes the database."""
-    client = AsyncIOMotorClient(
-        f"mongodb://{mongo_username}:{mongo_password}@{mongo_host}:{mongo_port}",
+    """Initializes the database and warms the connection pool.
+
+    The commands of the client are timed by the metrics command listener.
+    Indexes are not created, only checked, as building them on a large
+    collection would delay the startup of every worker.
+    """
+    global _client  # noqa: PLW0603
+    client: AgnosticClient = AsyncIOMotorClient(
+        database_settings.uri,
+        event_listeners=[command_metrics],
+        **database_settings.client_options(),
     )
+    await _warm_pool(client, max(1, database_settings.min_pool_size))
 
     await init_beanie(
-        database=client.feature_store,
-        document_models=[DBFeature],  # type: ignore  # noqa: PGH003
+        database=client[database_settings.database],
+        document_models=[DBFeature, DBFeatureLOD],  # type: ignore  # noqa: PGH003
     )
+    _client = client
+    reasons = await unready_reasons()
+    if reasons:
+        logger.warning(
+            "%s, run python -m feature_store.server.migrate",
+            ", ".join(reasons),
+        )
+
+
+def close_db() -> None:
+    """Closes the connections of the database client."""
+    global _client, _indexes_ready  # noqa: PLW0603
+    if _client is not None:
+        _client.close()
+        _client = None
+    _indexes_ready = False
@@ -0,0 +1,113 @@
+"""Implements the validators of conditional GET requests.
+
+Every write to a feature increments its `revision`, so the id and revision of a
+feature identify its content. A single feature gets a strong ETag made of them,
+and a list of features a weak ETag hashed from the ids and revisions of its
+features, so clients and edge caches can revalidate without downloading the
+geometries again.
+"""
+import hashlib
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+
+def feature_etag(
+    feature_id: object,
+    revision: int,
+    lod: int | None,
+    fields: str = "",
+) -> str:
+    """Returns the ETag of a feature.
+
+    Args:
+        feature_id (object): The id of the feature.
+        revision (int): The revision of the feature.
+        lod (int | None): The level of detail of its geometry.
+        fields (str): The canonical field set returned, empty for all fields.
+
+    Returns:
+        str: The strong ETag of the feature.
+    """
+    suffix = f"-{fields}" if fields else ""
+    return f'"{feature_id}-{revision}-{lod or 0}{suffix}"'
+
+
+def collection_etag(
+    versions: Iterable[tuple[object, int]],
+    next_cursor: str | None,
+    lod: int | None,
+    fields: str = "",
+) -> str:
+    """Returns the ETag of a page of features.
+
+    Args:
+        versions (Iterable[tuple[object, int]]): The id and revision of each
+            feature of the page, in order.
+        next_cursor (str | None): The cursor of the next page, if any.
+        lod (int | None): The level of detail of the geometries.
+        fields (str): The canonical field set returned, empty for all fields.
+
+    Returns:
+        str: The weak ETag of the page.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for feature_id, revision in versions:
+        digest.update(f"{feature_id}-{revision},".encode())
+    digest.update(f"{next_cursor or ''}-{lod or 0}-{fields}".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def http_date(timestamp: datetime) -> str:
+    """Returns a timestamp in the format of the `Last-Modified` header.
+
+    Args:
+        timestamp (datetime): The timestamp, in UTC when naive as read from
+            MongoDB.
+
+    Returns:
+        str: The HTTP date.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return format_datetime(timestamp.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    """Returns the headers clients revalidate a response with.
+
+    Args:
+        etag (str): The ETag of the response.
+        last_modified (datetime | None): The last time its content was written,
+            None if unknown.
+
+    Returns:
+        dict[str, str]: The `ETag` and `Last-Modified` headers.
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Returns whether an `If-None-Match` header matches an ETag.
+
+    ETags are compared with the weak comparison, as required for `If-None-Match`.
+
+    Args:
+        if_none_match (str | None): The header of the request, if any.
+        etag (str): The current ETag of the response.
+
+    Returns:
+        bool: True if the client already has the current response.
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
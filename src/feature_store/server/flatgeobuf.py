@@ -0,0 +1,619 @@
+"""Implements the FlatGeobuf format, with its packed Hilbert R-tree index.
+
+A FlatGeobuf file is a magic number, a header flatbuffer, an optional packed
+R-tree of the feature bounding boxes and the feature flatbuffers, each prefixed
+by its size. The index comes before the features and orders them along a
+Hilbert curve, so the writer encodes features to a temporary file as they are
+added and copies them out in index order once they are all known. Only the two
+dimensional Point, LineString and Polygon geometries the store supports are
+written and read, and every property is written as a string column.
+"""
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
+from itertools import accumulate, chain, pairwise
+from typing import IO, Any
+
+spool_size = int(os.getenv("FEATURE_STORE_EXPORT_SPOOL_MB", "64")) * 1024 * 1024
+
+MAGIC = b"fgb\x03fgb\x00"
+MEDIA_TYPE = "application/flatgeobuf"
+INDEX_NODE_SIZE = 16
+HILBERT_ORDER = 16
+HILBERT_MAX = (1 << HILBERT_ORDER) - 1
+CHUNK_SIZE = 1024 * 1024
+EPSG_WGS84 = 4326
+ID_COLUMN = "_id"
+
+GEOMETRY_TYPES = {"Point": 1, "LineString": 2, "Polygon": 3}
+GEOJSON_TYPES = {code: name for name, code in GEOMETRY_TYPES.items()}
+UNKNOWN_TYPE = 0
+STRING_COLUMN = 11
+
+# The flatbuffer slots of the fields of each table of the FlatGeobuf schema.
+HEADER_NAME, HEADER_ENVELOPE, HEADER_GEOMETRY_TYPE = 0, 1, 2
+HEADER_COLUMNS, HEADER_FEATURES_COUNT, HEADER_INDEX_NODE_SIZE, HEADER_CRS = 7, 8, 9, 10
+CRS_CODE = 1
+COLUMN_NAME, COLUMN_TYPE = 0, 1
+FEATURE_GEOMETRY, FEATURE_PROPERTIES = 0, 1
+GEOMETRY_ENDS, GEOMETRY_XY, GEOMETRY_TYPE = 0, 1, 6
+
+# The struct format of the values of each column type, strings being sized.
+COLUMN_FORMATS = {
+    0: "<b",
+    1: "<B",
+    2: "<?",
+    3: "<h",
+    4: "<H",
+    5: "<i",
+    6: "<I",
+    7: "<q",
+    8: "<Q",
+    9: "<f",
+    10: "<d",
+}
+
+_UINT = struct.Struct("<I")
+_PROPERTY = struct.Struct("<HI")
+_NODE = struct.Struct("<ddddQ")
+_SCALARS = {"ubyte": "<B", "ushort": "<H", "int": "<i", "ulong": "<Q"}
+
+Field = tuple[int, str, Any]
+
+
+def _doubles(values: "array[float]") -> bytes:
+    """Returns the little-endian bytes of an array of doubles."""
+    if sys.byteorder == "big":  # pragma: no cover
+        values = array("d", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class _Builder:
+    """Builds a flatbuffer front to back, each table before its children.
+
+    Tables point to their vtable, written just before them, with a positive
+    offset, and to their children with forward offsets, which flatbuffer readers
+    accept as long as everything is aligned.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a buffer holding the offset of the root table."""
+        self.buffer = bytearray(4)
+
+    def _pad(self, alignment: int, extra: int = 0) -> None:
+        """Pads the buffer so that `extra` bytes further is aligned."""
+        self.buffer.extend(bytes(-(len(self.buffer) + extra) % alignment))
+
+    def finish(self, fields: Sequence[Field]) -> bytes:
+        """Writes the root table and returns the size prefixed buffer.
+
+        Args:
+            fields (Sequence[Field]): The slot, kind and value of each field of
+                the root table, None values being left out.
+
+        Returns:
+            bytes: The flatbuffer, prefixed by its size.
+        """
+        struct.pack_into("<I", self.buffer, 0, self._table(fields))
+        self._pad(8)
+        return _UINT.pack(len(self.buffer)) + self.buffer
+
+    def _table(self, fields: Sequence[Field]) -> int:
+        """Writes a table and its children and returns its position."""
+        fields = [field for field in fields if field[2] is not None]
+        layout = []
+        size = 4
+        for slot, kind, value in sorted(
+            fields,
+            key=lambda field: -struct.calcsize(_SCALARS.get(field[1], "<I")),
+        ):
+            field_size = struct.calcsize(_SCALARS.get(kind, "<I"))
+            size += -size % field_size
+            layout.append((slot, size, kind, value))
+            size += field_size
+
+        slots = [0] * (max((field[0] for field in fields), default=-1) + 1)
+        for slot, offset, _, _ in layout:
+            slots[slot] = offset
+        self._pad(2)
+        vtable = len(self.buffer)
+        self.buffer.extend(
+            struct.pack(f"<{len(slots) + 2}H", 4 + 2 * len(slots), size, *slots),
+        )
+        self._pad(8)
+        table = len(self.buffer)
+        self.buffer.extend(bytes(size))
+        struct.pack_into("<i", self.buffer, table, table - vtable)
+
+        for _, offset, kind, value in layout:
+            position = table + offset
+            if kind in _SCALARS:
+                struct.pack_into(_SCALARS[kind], self.buffer, position, value)
+            else:
+                child = self._child(kind, value)
+                struct.pack_into("<I", self.buffer, position, child - position)
+        return table
+
+    def _child(self, kind: str, value: Any) -> int:  # noqa: ANN401
+        """Writes a string, a vector or a table and returns its position."""
+        if kind == "table":
+            return self._table(value)
+        if kind == "doubles":
+            self._pad(8, 4)
+        else:
+            self._pad(4)
+        position = len(self.buffer)
+        if kind == "string":
+            data = value.encode()
+            self.buffer.extend(_UINT.pack(len(data)) + data + b"\x00")
+        elif kind == "doubles":
+            self.buffer.extend(_UINT.pack(len(value)) + _doubles(value))
+        elif kind == "uints":
+            self.buffer.extend(struct.pack(f"<I{len(value)}I", len(value), *value))
+        elif kind == "bytes":
+            self.buffer.extend(_UINT.pack(len(value)) + value)
+        else:
+            self.buffer.extend(_UINT.pack(len(value)) + bytes(4 * len(value)))
+            for index, table_fields in enumerate(value):
+                offset = position + 4 + 4 * index
+                child = self._table(table_fields)
+                struct.pack_into("<I", self.buffer, offset, child - offset)
+        return position
+
+
+class _Table:
+    """Reads the fields of a flatbuffer table."""
+
+    def __init__(self, buffer: bytes, position: int) -> None:
+        """Initializes the table.
+
+        Args:
+            buffer (bytes): The flatbuffer, without its size prefix.
+            position (int): The position of the table in the buffer.
+        """
+        self.buffer = buffer
+        self.position = position
+        (soffset,) = struct.unpack_from("<i", buffer, position)
+        self.vtable = position - soffset
+        (self.vtable_size,) = struct.unpack_from("<H", buffer, self.vtable)
+
+    def _field(self, slot: int) -> int | None:
+        """Returns the position of a field, None if it is not set."""
+        entry = 4 + 2 * slot
+        if entry >= self.vtable_size:
+            return None
+        (offset,) = struct.unpack_from("<H", self.buffer, self.vtable + entry)
+        return self.position + offset if offset else None
+
+    def scalar(self, slot: int, kind: str, default: int = 0) -> int:
+        """Returns a scalar field, or its default when not set."""
+        position = self._field(slot)
+        if position is None:
+            return default
+        (value,) = struct.unpack_from(_SCALARS[kind], self.buffer, position)
+        return int(value)
+
+    def _target(self, slot: int) -> int | None:
+        """Returns the position a field points to, None if it is not set."""
+        position = self._field(slot)
+        if position is None:
+            return None
+        target: int = position + _UINT.unpack_from(self.buffer, position)[0]
+        return target
+
+    def table(self, slot: int) -> "_Table | None":
+        """Returns a table field, None if it is not set."""
+        position = self._target(slot)
+        return None if position is None else _Table(self.buffer, position)
+
+    def vector(self, slot: int) -> tuple[int, int]:
+        """Returns the position of the items and the length of a vector field."""
+        position = self._target(slot)
+        if position is None:
+            return 0, 0
+        return position + 4, _UINT.unpack_from(self.buffer, position)[0]
+
+    def string(self, slot: int) -> str | None:
+        """Returns a string field, None if it is not set."""
+        start, length = self.vector(slot)
+        if not start:
+            return None
+        return self.buffer[start : start + length].decode()
+
+    def tables(self, slot: int) -> list["_Table"]:
+        """Returns the tables of a vector of tables field."""
+        start, length = self.vector(slot)
+        return [
+            _Table(self.buffer, offset + _UINT.unpack_from(self.buffer, offset)[0])
+            for offset in range(start, start + 4 * length, 4)
+        ]
+
+
+def hilbert(x: int, y: int) -> int:
+    """Returns the distance of a cell along the Hilbert curve.
+
+    Args:
+        x (int): The column of the cell, between 0 and `HILBERT_MAX`.
+        y (int): The row of the cell, between 0 and `HILBERT_MAX`.
+
+    Returns:
+        int: The distance along the curve.
+    """
+    distance = 0
+    side = 1 << (HILBERT_ORDER - 1)
+    while side:
+        rx = 1 if x & side else 0
+        ry = 1 if y & side else 0
+        distance += side * side * ((3 * rx) ^ ry)
+        if not ry:
+            if rx:
+                x, y = HILBERT_MAX - x, HILBERT_MAX - y
+            x, y = y, x
+        side >>= 1
+    return distance
+
+
+def level_bounds(count: int, node_size: int) -> list[tuple[int, int]]:
+    """Returns where each level of a packed R-tree starts and ends.
+
+    Levels are listed from the leaves to the root, which is stored first, and
+    there is always at least one level above the leaves.
+
+    Args:
+        count (int): The number of indexed features.
+        node_size (int): The number of children of each node.
+
+    Returns:
+        list[tuple[int, int]]: The node range of each level.
+    """
+    sizes = [count]
+    while True:
+        sizes.append(-(-sizes[-1] // node_size))
+        if sizes[-1] == 1:
+            break
+    end = sum(sizes)
+    bounds = []
+    for size in sizes:
+        bounds.append((end - size, end))
+        end -= size
+    return bounds
+
+
+def packed_rtree(
+    boxes: Sequence[tuple[float, float, float, float]],
+    offsets: Sequence[int],
+    node_size: int = INDEX_NODE_SIZE,
+) -> bytearray:
+    """Builds the packed R-tree of features sorted along the Hilbert curve.
+
+    Args:
+        boxes (Sequence[tuple[float, float, float, float]]): The bounding box of
+            each feature, in file order.
+        offsets (Sequence[int]): The position of each feature in the data section.
+        node_size (int): The number of children of each node.
+
+    Returns:
+        bytearray: The nodes of the tree, root first.
+    """
+    levels = level_bounds(len(boxes), node_size)
+    nodes: list[tuple[float, float, float, float, int]] = [
+        (0.0, 0.0, 0.0, 0.0, 0),
+    ] * levels[0][1]
+    leaves = levels[0][0]
+    for index, (box, offset) in enumerate(zip(boxes, offsets, strict=True)):
+        nodes[leaves + index] = (*box, offset)
+    for (start, end), (parents, _) in pairwise(levels):
+        for parent, first in enumerate(range(start, end, node_size), start=parents):
+            children = nodes[first : min(end, first + node_size)]
+            nodes[parent] = (
+                min(child[0] for child in children),
+                min(child[1] for child in children),
+                max(child[2] for child in children),
+                max(child[3] for child in children),
+                first,
+            )
+
+    data = bytearray(_NODE.size * len(nodes))
+    for index, node in enumerate(nodes):
+        _NODE.pack_into(data, index * _NODE.size, *node)
+    return data
+
+
+def _geometry_fields(geometry: Mapping[str, Any]) -> tuple[list[Field], "array[float]"]:
+    """Returns the fields of the flatbuffer of a geometry and its coordinates."""
+    geo_type = geometry["type"]
+    if geo_type not in GEOMETRY_TYPES:
+        msg = f"Unsupported geometry type: {geo_type}"
+        raise ValueError(msg)
+    coordinates = geometry["coordinates"]
+    if geo_type == "Point":
+        paths = [[coordinates]]
+    elif geo_type == "LineString":
+        paths = [coordinates]
+    else:
+        paths = coordinates
+    xy = array(
+        "d",
+        chain.from_iterable(position[:2] for path in paths for position in path),
+    )
+    if not xy:
+        msg = "Geometry has no coordinates"
+        raise ValueError(msg)
+    ends = list(accumulate(map(len, paths))) if len(paths) > 1 else None
+    fields: list[Field] = [
+        (GEOMETRY_ENDS, "uints", ends),
+        (GEOMETRY_XY, "doubles", xy),
+        (GEOMETRY_TYPE, "ubyte", GEOMETRY_TYPES[geo_type]),
+    ]
+    return fields, xy
+
+
+class FlatGeobufWriter:
+    """Writes features to a FlatGeobuf file with a packed Hilbert R-tree index.
+
+    Columns are added as new property keys appear, so every feature keeps the
+    column indexes it was encoded with. The id of the features is written as the
+    `_id` column, which replaces any property of the same name.
+    """
+
+    def __init__(self, name: str = "features") -> None:
+        """Initializes a writer without features.
+
+        Args:
+            name (str): The name of the dataset in the header.
+        """
+        self.name = name
+        self.columns: dict[str, int] = {}
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        self._boxes: list[tuple[float, float, float, float]] = []
+        self._sizes: list[int] = []
+        self._types: set[int] = set()
+
+    def __len__(self) -> int:
+        """Returns the number of features added."""
+        return len(self._sizes)
+
+    def add(self, document: Mapping[str, Any]) -> None:
+        """Encodes a feature, with its id as the `_id` column.
+
+        Args:
+            document (Mapping[str, Any]): The raw feature document, whose
+                properties are written as strings.
+        """
+        geometry_fields, xy = _geometry_fields(document["geometry"])
+        values = []
+        properties = {**(document.get("properties") or {}), ID_COLUMN: document["_id"]}
+        for key, value in properties.items():
+            data = str(value).encode()
+            column = self.columns.setdefault(key, len(self.columns))
+            values.append(_PROPERTY.pack(column, len(data)) + data)
+        feature = _Builder().finish(
+            [
+                (FEATURE_GEOMETRY, "table", geometry_fields),
+                (FEATURE_PROPERTIES, "bytes", b"".join(values) or None),
+            ],
+        )
+        xs, ys = xy[0::2], xy[1::2]
+        self._boxes.append((min(xs), min(ys), max(xs), max(ys)))
+        self._sizes.append(len(feature))
+        self._types.add(geometry_fields[-1][2])
+        self._spool.write(feature)
+
+    def header(self) -> bytes:
+        """Returns the size prefixed header flatbuffer of the added features.
+
+        Returns:
+            bytes: The header.
+        """
+        count = len(self)
+        envelope = None
+        if count:
+            envelope = array(
+                "d",
+                [
+                    min(box[0] for box in self._boxes),
+                    min(box[1] for box in self._boxes),
+                    max(box[2] for box in self._boxes),
+                    max(box[3] for box in self._boxes),
+                ],
+            )
+        geometry_type = (
+            next(iter(self._types)) if len(self._types) == 1 else UNKNOWN_TYPE
+        )
+        return _Builder().finish(
+            [
+                (HEADER_NAME, "string", self.name),
+                (HEADER_ENVELOPE, "doubles", envelope),
+                (HEADER_GEOMETRY_TYPE, "ubyte", geometry_type),
+                (
+                    HEADER_COLUMNS,
+                    "tables",
+                    [
+                        [
+                            (COLUMN_NAME, "string", name),
+                            (COLUMN_TYPE, "ubyte", STRING_COLUMN),
+                        ]
+                        for name in self.columns
+                    ],
+                ),
+                (HEADER_FEATURES_COUNT, "ulong", count),
+                (HEADER_INDEX_NODE_SIZE, "ushort", INDEX_NODE_SIZE if count else 0),
+                (HEADER_CRS, "table", [(CRS_CODE, "int", EPSG_WGS84)]),
+            ],
+        )
+
+    def _hilbert_order(self) -> list[int]:
+        """Returns the indexes of the features sorted along the Hilbert curve."""
+        min_x = min(box[0] for box in self._boxes)
+        min_y = min(box[1] for box in self._boxes)
+        width = max(box[2] for box in self._boxes) - min_x or 1.0
+        height = max(box[3] for box in self._boxes) - min_y or 1.0
+        distances = [
+            hilbert(
+                int(HILBERT_MAX * ((box[0] + box[2]) / 2 - min_x) / width),
+                int(HILBERT_MAX * ((box[1] + box[3]) / 2 - min_y) / height),
+            )
+            for box in self._boxes
+        ]
+        return sorted(range(len(distances)), key=distances.__getitem__)
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yields the file, features sorted along the Hilbert curve.
+
+        The temporary file of the encoded features is closed once they are all
+        yielded.
+
+        Args:
+            chunk_size (int): The approximate size of the chunks.
+
+        Yields:
+            bytes: The next chunk of the file.
+        """
+        try:
+            yield MAGIC + self.header()
+            if not self._sizes:
+                return
+            starts = [0, *accumulate(self._sizes)]
+            order = self._hilbert_order()
+            offsets = accumulate((self._sizes[index] for index in order), initial=0)
+            index = memoryview(
+                packed_rtree(
+                    [self._boxes[index] for index in order],
+                    list(offsets)[:-1],
+                ),
+            )
+            for start in range(0, len(index), chunk_size):
+                yield bytes(index[start : start + chunk_size])
+
+            chunk = bytearray()
+            for feature in order:
+                self._spool.seek(starts[feature])
+                chunk.extend(self._spool.read(self._sizes[feature]))
+                if len(chunk) >= chunk_size:
+                    yield bytes(chunk)
+                    chunk.clear()
+            if chunk:
+                yield bytes(chunk)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Deletes the temporary file of the encoded features."""
+        self._spool.close()
+
+
+def _read_exactly(stream: IO[bytes], size: int) -> bytes:
+    """Reads `size` bytes from a stream, raising ValueError at its end."""
+    data = stream.read(size)
+    if len(data) != size:
+        msg = "FlatGeobuf file is cut short"
+        raise ValueError(msg)
+    return data
+
+
+def _read_property(
+    buffer: bytes,
+    position: int,
+    column_type: int,
+) -> tuple[str, int]:
+    """Reads a property value as a string and returns it with the next position."""
+    if column_type in COLUMN_FORMATS:
+        value_format = COLUMN_FORMATS[column_type]
+        (value,) = struct.unpack_from(value_format, buffer, position)
+        text = str(value).lower() if column_type == 2 else str(value)  # noqa: PLR2004
+        return text, position + struct.calcsize(value_format)
+    (length,) = _UINT.unpack_from(buffer, position)
+    data = buffer[position + 4 : position + 4 + length]
+    text = data.hex() if column_type == 14 else data.decode()  # noqa: PLR2004
+    return text, position + 4 + length
+
+
+def _read_geometry(table: _Table, header_type: int) -> dict[str, Any]:
+    """Reads a geometry flatbuffer as a GeoJSON geometry."""
+    geo_type = GEOJSON_TYPES.get(
+        table.scalar(GEOMETRY_TYPE, "ubyte", header_type) or header_type,
+    )
+    if geo_type is None:
+        msg = "Unsupported FlatGeobuf geometry type"
+        raise ValueError(msg)
+    start, length = table.vector(GEOMETRY_XY)
+    xy = array("d", table.buffer[start : start + 8 * length])
+    if sys.byteorder == "big":  # pragma: no cover
+        xy.byteswap()
+    values = iter(xy.tolist())
+    positions = [[x, y] for x, y in zip(values, values, strict=True)]
+    if geo_type == "Point":
+        return {"type": geo_type, "coordinates": positions[0]}
+    if geo_type == "LineString":
+        return {"type": geo_type, "coordinates": positions}
+    start, length = table.vector(GEOMETRY_ENDS)
+    ends = (
+        struct.unpack_from(f"<{length}I", table.buffer, start)
+        if length
+        else (len(positions),)
+    )
+    rings = [positions[begin:end] for begin, end in pairwise((0, *ends))]
+    return {"type": geo_type, "coordinates": rings}
+
+
+def read_flatgeobuf(stream: IO[bytes]) -> Iterator[dict[str, Any]]:
+    """Reads the features of a FlatGeobuf file, skipping its index.
+
+    Args:
+        stream (IO[bytes]): The file.
+
+    Raises:
+        ValueError: If the file is not a supported FlatGeobuf file.
+
+    Yields:
+        dict[str, Any]: The next GeoJSON feature, with string properties and
+            its `_id` when the file has one.
+    """
+    magic = _read_exactly(stream, len(MAGIC))
+    if magic[:3] != MAGIC[:3] or magic[3] != MAGIC[3]:
+        msg = "Not a FlatGeobuf version 3 file"
+        raise ValueError(msg)
+    (size,) = _UINT.unpack(_read_exactly(stream, 4))
+    buffer = _read_exactly(stream, size)
+    header = _Table(buffer, _UINT.unpack_from(buffer)[0])
+    header_type = header.scalar(HEADER_GEOMETRY_TYPE, "ubyte")
+    columns = [
+        (column.string(COLUMN_NAME) or "", column.scalar(COLUMN_TYPE, "ubyte"))
+        for column in header.tables(HEADER_COLUMNS)
+    ]
+    count = header.scalar(HEADER_FEATURES_COUNT, "ulong")
+    node_size = header.scalar(HEADER_INDEX_NODE_SIZE, "ushort", INDEX_NODE_SIZE)
+    if count and node_size:
+        nodes = level_bounds(count, node_size)[0][1]
+        stream.seek(nodes * _NODE.size, os.SEEK_CUR)
+
+    while prefix := stream.read(4):
+        (size,) = _UINT.unpack(prefix)
+        buffer = _read_exactly(stream, size)
+        feature = _Table(buffer, _UINT.unpack_from(buffer)[0])
+        geometry = feature.table(FEATURE_GEOMETRY)
+        if geometry is None:
+            msg = "FlatGeobuf feature has no geometry"
+            raise ValueError(msg)
+        properties = {}
+        position, length = feature.vector(FEATURE_PROPERTIES)
+        end = position + length
+        while position < end:
+            (column,) = struct.unpack_from("<H", buffer, position)
+            name, column_type = columns[column]
+            properties[name], position = _read_property(
+                buffer,
+                position + 2,
+                column_type,
+            )
+        feature_id = properties.pop(ID_COLUMN, None)
+        yield {
+            "type": "Feature",
+            "geometry": _read_geometry(geometry, header_type),
+            "properties": properties,
+            **({} if feature_id is None else {ID_COLUMN: feature_id}),
+        }
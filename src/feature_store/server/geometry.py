@@ -0,0 +1,150 @@
+"""Implements helpers to reason about the extent of GeoJSON geometries."""
+import math
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple, TypeAlias
+
+from feature_store.server.models.geojson import (
+    GeoJsonLineString,
+    GeoJsonPoint,
+    GeoJsonPolygon,
+)
+
+Geometry: TypeAlias = GeoJsonPoint | GeoJsonLineString | GeoJsonPolygon
+Position = Sequence[float]
+
+
+class Bounds(NamedTuple):
+    """Represents a lon/lat bounding box."""
+
+    min_x: float
+    min_y: float
+    max_x: float
+    max_y: float
+
+    def intersects(self, other: "Bounds") -> bool:
+        """Returns whether the bounding box overlaps another one.
+
+        Args:
+            other (Bounds): The other bounding box.
+
+        Returns:
+            bool: True if the bounding boxes share at least one point.
+        """
+        return (
+            self.min_x <= other.max_x
+            and other.min_x <= self.max_x
+            and self.min_y <= other.max_y
+            and other.min_y <= self.max_y
+        )
+
+    def contains(self, other: "Bounds") -> bool:
+        """Returns whether the bounding box fully contains another one.
+
+        Args:
+            other (Bounds): The other bounding box.
+
+        Returns:
+            bool: True if every point of `other` is inside the bounding box.
+        """
+        return (
+            self.min_x <= other.min_x
+            and other.max_x <= self.max_x
+            and self.min_y <= other.min_y
+            and other.max_y <= self.max_y
+        )
+
+
+def _to_vector(position: Position) -> tuple[float, float, float]:
+    """Converts a lon/lat position to a unit vector."""
+    lon, lat = math.radians(position[0]), math.radians(position[1])
+    return (
+        math.cos(lat) * math.cos(lon),
+        math.cos(lat) * math.sin(lon),
+        math.sin(lat),
+    )
+
+
+def _cross(
+    a: tuple[float, float, float],
+    b: tuple[float, float, float],
+) -> tuple[float, float, float]:
+    """Returns the cross product of two vectors."""
+    return (
+        a[1] * b[2] - a[2] * b[1],
+        a[2] * b[0] - a[0] * b[2],
+        a[0] * b[1] - a[1] * b[0],
+    )
+
+
+def _dot(a: tuple[float, float, float], b: tuple[float, float, float]) -> float:
+    """Returns the dot product of two vectors."""
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _arc_latitude_range(start: Position, end: Position) -> tuple[float, float]:
+    """Returns the latitude range covered by the great-circle arc between positions.
+
+    MongoDB evaluates edges as great-circle arcs, which bow towards the pole and can
+    reach past the latitude of both of their end points.
+
+    Args:
+        start (Position): The first end point of the arc.
+        end (Position): The second end point of the arc.
+
+    Returns:
+        tuple[float, float]: The minimum and maximum latitude along the arc.
+    """
+    low, high = sorted((start[1], end[1]))
+    p, q = _to_vector(start), _to_vector(end)
+    normal = _cross(p, q)
+    norm = math.sqrt(_dot(normal, normal))
+    if norm < 1e-12:  # noqa: PLR2004
+        return low, high
+
+    nz = normal[2] / norm
+    extreme_lat = math.degrees(math.acos(min(1.0, abs(nz))))
+    top = (-nz * normal[0] / norm, -nz * normal[1] / norm, 1 - nz * nz)
+    bottom = (-top[0], -top[1], -top[2])
+    for vertex, lat in ((top, extreme_lat), (bottom, -extreme_lat)):
+        on_arc = (
+            _dot(_cross(p, vertex), normal) >= 0
+            and _dot(_cross(vertex, q), normal) >= 0
+        )
+        if on_arc:
+            low, high = min(low, lat), max(high, lat)
+    return low, high
+
+
+def _paths(geometry: Geometry) -> Iterable[Sequence[Position]]:
+    """Yields the vertex paths of a geometry, a single position for points."""
+    if isinstance(geometry, GeoJsonPoint):
+        yield [geometry.coordinates]
+    elif isinstance(geometry, GeoJsonLineString):
+        yield geometry.coordinates
+    else:
+        yield from geometry.coordinates
+
+
+def geometry_bounds(geometry: Geometry) -> Bounds:
+    """Returns the bounding box of a geometry.
+
+    Latitudes account for the great-circle edges MongoDB uses, so the box contains
+    everything the geometry can match in a `$geoIntersects` query. Geometries that
+    cross the antimeridian are not special cased.
+
+    Args:
+        geometry (Geometry): The geometry to bound.
+
+    Returns:
+        Bounds: The bounding box of the geometry.
+    """
+    min_x = min_y = math.inf
+    max_x = max_y = -math.inf
+    for path in _paths(geometry):
+        for index, position in enumerate(path):
+            min_x, max_x = min(min_x, position[0]), max(max_x, position[0])
+            min_y, max_y = min(min_y, position[1]), max(max_y, position[1])
+            if index > 0:
+                low, high = _arc_latitude_range(path[index - 1], position)
+                min_y, max_y = min(min_y, low), max(max_y, high)
+    return Bounds(min_x, min_y, max_x, max_y)
@@ -0,0 +1,218 @@
+"""Implements the GeoParquet format, written and read with pyarrow.
+
+Features are written as rows holding the feature id, the WKB geometry, the
+precomputed bounding box as a GeoParquet 1.1 covering and one string column per
+property key. The keys must be known before the first row group is written, so
+the export lists them with an aggregation first. Row groups are encoded as soon
+as they are full, so a file can be streamed while the features are read.
+GeoParquet support requires pyarrow, which is optional.
+"""
+import json
+import os
+from collections.abc import Iterator, Mapping, Sequence
+from typing import IO, Any
+
+from feature_store.server.wkb import decode_wkb, encode_wkb
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None  # type: ignore  # noqa: PGH003
+
+row_group_size = int(os.getenv("FEATURE_STORE_EXPORT_ROW_GROUP_SIZE", "10000"))
+
+MEDIA_TYPE = "application/vnd.apache.parquet"
+ID_COLUMN = "_id"
+GEOMETRY_COLUMN = "geometry"
+BBOX_COLUMN = "bbox"
+BBOX_FIELDS = {"xmin": "min_x", "ymin": "min_y", "xmax": "max_x", "ymax": "max_y"}
+RESERVED_COLUMNS = (ID_COLUMN, GEOMETRY_COLUMN, BBOX_COLUMN)
+
+
+def geoparquet_available() -> bool:
+    """Returns whether pyarrow is installed.
+
+    Returns:
+        bool: True if GeoParquet files can be written and read.
+    """
+    return pq is not None
+
+
+def geo_metadata() -> dict[str, Any]:
+    """Returns the GeoParquet metadata of the exported files.
+
+    The geometry column has no `crs` key, which readers take as OGC:CRS84, the
+    WGS84 longitudes and latitudes the features are stored in. A null `crs`
+    would declare it unknown instead.
+
+    Returns:
+        dict[str, Any]: The value of the `geo` key of the Parquet metadata.
+    """
+    return {
+        "version": "1.1.0",
+        "primary_column": GEOMETRY_COLUMN,
+        "columns": {
+            GEOMETRY_COLUMN: {
+                "encoding": "WKB",
+                "geometry_types": [],
+                "covering": {
+                    "bbox": {name: [BBOX_COLUMN, name] for name in BBOX_FIELDS},
+                },
+            },
+        },
+    }
+
+
+class _Sink:
+    """Collects what the Parquet writer writes until it is taken."""
+
+    def __init__(self) -> None:
+        """Initializes an empty sink."""
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        """Appends data written by the Parquet writer."""
+        self.buffer.extend(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        """Returns the number of bytes written so far."""
+        return self.position
+
+    def flush(self) -> None:
+        """Does nothing, the data is kept until it is taken."""
+
+    def close(self) -> None:
+        """Marks the sink as closed."""
+        self.closed = True
+
+    def take(self) -> bytes:
+        """Returns and forgets the data written since the last call."""
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+class GeoParquetWriter:
+    """Writes raw feature documents to a GeoParquet file, one row group at a time.
+
+    Properties that are not among the keys given up front, or that are named
+    like a reserved column, are not written.
+    """
+
+    def __init__(self, keys: Sequence[str], group_size: int = row_group_size) -> None:
+        """Initializes a writer without rows.
+
+        Args:
+            keys (Sequence[str]): The property keys to write a column for.
+            group_size (int): The number of rows of each row group.
+        """
+        self.keys = [key for key in keys if key not in RESERVED_COLUMNS]
+        self.group_size = group_size
+        self.schema = pa.schema(
+            [
+                (ID_COLUMN, pa.string()),
+                (GEOMETRY_COLUMN, pa.binary()),
+                (
+                    BBOX_COLUMN,
+                    pa.struct([(name, pa.float64()) for name in BBOX_FIELDS]),
+                ),
+                *((key, pa.string()) for key in self.keys),
+            ],
+            metadata={"geo": json.dumps(geo_metadata())},
+        )
+        self._sink = _Sink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema)
+        self._rows: dict[str, list[Any]] = {name: [] for name in self.schema.names}
+
+    def add(self, document: Mapping[str, Any]) -> bytes:
+        """Adds a feature, and encodes a row group once there are enough rows.
+
+        Args:
+            document (Mapping[str, Any]): The raw feature document.
+
+        Returns:
+            bytes: The encoded row group, if one was completed.
+        """
+        self._rows[ID_COLUMN].append(str(document["_id"]))
+        self._rows[GEOMETRY_COLUMN].append(encode_wkb(document["geometry"]))
+        bounds = document.get("bounds")
+        self._rows[BBOX_COLUMN].append(
+            None
+            if bounds is None
+            else {name: bounds[field] for name, field in BBOX_FIELDS.items()},
+        )
+        properties = document.get("properties") or {}
+        for key in self.keys:
+            value = properties.get(key)
+            self._rows[key].append(None if value is None else str(value))
+        if len(self._rows[ID_COLUMN]) < self.group_size:
+            return b""
+        return self._write_group()
+
+    def _write_group(self) -> bytes:
+        """Encodes the pending rows as a row group and returns the new bytes."""
+        if self._rows[ID_COLUMN]:
+            self._writer.write_table(
+                pa.Table.from_pydict(self._rows, schema=self.schema),
+            )
+            for rows in self._rows.values():
+                rows.clear()
+        return self._sink.take()
+
+    def finish(self) -> bytes:
+        """Encodes the last row group and the footer of the file.
+
+        Returns:
+            bytes: The rest of the file.
+        """
+        data = self._write_group()
+        self._writer.close()
+        return data + self._sink.take()
+
+
+def read_geoparquet(stream: IO[bytes] | str) -> Iterator[dict[str, Any]]:
+    """Reads the features of a GeoParquet file with WKB geometries.
+
+    Columns other than the id, the geometry and the bounding box are read as
+    string properties, and null values are left out.
+
+    Args:
+        stream (IO[bytes] | str): The file, or its path.
+
+    Raises:
+        ValueError: If the file has no WKB primary geometry column.
+
+    Yields:
+        dict[str, Any]: The next GeoJSON feature, with its `_id` when the file
+            has one.
+    """
+    parquet = pq.ParquetFile(stream)
+    metadata = json.loads((parquet.schema_arrow.metadata or {}).get(b"geo", b"{}"))
+    geometry_column = metadata.get("primary_column", GEOMETRY_COLUMN)
+    encoding = metadata.get("columns", {}).get(geometry_column, {}).get("encoding")
+    if encoding is not None and encoding.upper() != "WKB":
+        msg = f"Unsupported GeoParquet geometry encoding: {encoding}"
+        raise ValueError(msg)
+    if geometry_column not in parquet.schema_arrow.names:
+        msg = f"GeoParquet file has no {geometry_column} column"
+        raise ValueError(msg)
+
+    for batch in parquet.iter_batches(batch_size=row_group_size):
+        for row in batch.to_pylist():
+            feature: dict[str, Any] = {
+                "type": "Feature",
+                "geometry": decode_wkb(row.pop(geometry_column)),
+                "properties": {
+                    key: str(value)
+                    for key, value in row.items()
+                    if key not in RESERVED_COLUMNS and value is not None
+                },
+            }
+            if row.get(ID_COLUMN) is not None:
+                feature[ID_COLUMN] = str(row[ID_COLUMN])
+            yield feature
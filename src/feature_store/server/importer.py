@@ -0,0 +1,171 @@
+"""Imports GeoParquet and FlatGeobuf files outside of any request.
+
+Run with `python -m feature_store.server.importer FILE [FILE ...]`, against the
+MongoDB configured by the `MONGODB_*` environment variables. Features are read
+from the files and inserted in chunks with their bounding boxes and levels of
+detail, as by the bulk endpoint. Features keep the id of the `_id` column when
+the file has one, so an export can be reloaded as it was. The caches of running
+servers are not invalidated, as they only track writes made through them.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from beanie import PydanticObjectId
+from bson import ObjectId
+from pydantic import ValidationError
+
+from feature_store.server.database import DBFeature, close_db, init_db
+from feature_store.server.flatgeobuf import read_flatgeobuf
+from feature_store.server.geoparquet import geoparquet_available, read_geoparquet
+from feature_store.server.ingest import (
+    bulk_chunk_size,
+    insert_documents,
+    new_document,
+    parse_feature,
+)
+
+FLATGEOBUF_SUFFIXES = (".fgb",)
+GEOPARQUET_SUFFIXES = (".parquet", ".geoparquet")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ImportResult:
+    """Represents the outcome of an import.
+
+    Attributes:
+        inserted (int): The number of features inserted.
+        failed (int): The number of features that were invalid or rejected by
+            the database.
+    """
+
+    inserted: int = 0
+    failed: int = 0
+
+
+def read_features(path: Path) -> Iterator[dict[str, Any]]:
+    """Reads the features of a file, in the format given by its suffix.
+
+    Args:
+        path (Path): The GeoParquet or FlatGeobuf file.
+
+    Raises:
+        ValueError: If the format is not supported.
+
+    Yields:
+        dict[str, Any]: The next GeoJSON feature, with its `_id` if any.
+    """
+    suffix = path.suffix.lower()
+    if suffix in FLATGEOBUF_SUFFIXES:
+        with path.open("rb") as stream:
+            yield from read_flatgeobuf(stream)
+    elif suffix in GEOPARQUET_SUFFIXES:
+        if not geoparquet_available():
+            msg = "GeoParquet import requires pyarrow"
+            raise ValueError(msg)
+        yield from read_geoparquet(str(path))
+    else:
+        msg = f"Unsupported file format: {path.suffix}"
+        raise ValueError(msg)
+
+
+def _document(feature: Mapping[str, Any], updated_at: datetime) -> DBFeature:
+    """Returns the document of an imported feature, keeping its id if valid."""
+    feature_id = feature.get("_id")
+    return new_document(
+        parse_feature(feature),
+        updated_at,
+        PydanticObjectId(feature_id) if ObjectId.is_valid(feature_id) else None,
+    )
+
+
+async def import_features(
+    features: Iterable[Mapping[str, Any]],
+    chunk_size: int = bulk_chunk_size,
+) -> ImportResult:
+    """Inserts features in chunks, skipping the invalid ones.
+
+    Args:
+        features (Iterable[Mapping[str, Any]]): The GeoJSON features, with their
+            `_id` if any.
+        chunk_size (int): The number of features sent to the database at once.
+
+    Returns:
+        ImportResult: The number of inserted and failed features.
+    """
+    result = ImportResult()
+    iterator = iter(features)
+    updated_at = datetime.now(timezone.utc)
+    while chunk := list(islice(iterator, chunk_size)):
+        documents = []
+        for feature in chunk:
+            try:
+                documents.append(_document(feature, updated_at))
+            except ValidationError as error:
+                logger.warning("Skipping invalid feature: %s", error)
+                result.failed += 1
+        failed = await insert_documents(documents)
+        for message in failed.values():
+            logger.warning("Feature rejected by the database: %s", message)
+        result.inserted += len(documents) - len(failed)
+        result.failed += len(failed)
+    return result
+
+
+async def import_files(paths: Iterable[Path], chunk_size: int) -> ImportResult:
+    """Imports files into the database configured by the environment.
+
+    Args:
+        paths (Iterable[Path]): The GeoParquet and FlatGeobuf files.
+        chunk_size (int): The number of features sent to the database at once.
+
+    Returns:
+        ImportResult: The number of inserted and failed features of all files.
+    """
+    total = ImportResult()
+    await init_db()
+    try:
+        for path in paths:
+            result = await import_features(read_features(path), chunk_size)
+            logger.info(
+                "%s: %d inserted, %d failed",
+                path,
+                result.inserted,
+                result.failed,
+            )
+            total.inserted += result.inserted
+            total.failed += result.failed
+    finally:
+        close_db()
+    return total
+
+
+def main(argv: list[str]) -> int:
+    """Imports the files given on the command line.
+
+    Args:
+        argv (list[str]): The command line arguments.
+
+    Returns:
+        int: The exit status, 1 when a feature failed to import.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=bulk_chunk_size)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(import_files(args.paths, args.chunk_size))
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
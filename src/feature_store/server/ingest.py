@@ -0,0 +1,123 @@
+"""Implements the bulk insertion shared by the bulk endpoint and the importer."""
+import os
+from collections.abc import Sequence
+from datetime import datetime
+
+from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
+
+from feature_store.server.database import DBFeature, DBFeatureLOD, FeatureBounds
+from feature_store.server.geometry import geometry_bounds
+from feature_store.server.lod import build_lods
+from feature_store.server.models.compact import CompactGeometry
+from feature_store.server.models.geojson import Feature
+from feature_store.server.validation import normalize_geometries
+
+bulk_chunk_size = int(os.getenv("FEATURE_STORE_BULK_CHUNK_SIZE", "1000"))
+
+
+def parse_feature(value: object) -> Feature:
+    """Validates a GeoJSON feature, checking its geometry in bulk.
+
+    The geometry is validated as a `CompactGeometry`, whose model is built
+    without checking its coordinates one at a time again. Geometries it rejects
+    are validated by the GeoJSON models, which report the error.
+
+    Args:
+        value (object): The decoded GeoJSON feature.
+
+    Raises:
+        ValidationError: If the feature is invalid.
+
+    Returns:
+        Feature: The feature.
+    """
+    if isinstance(value, dict):
+        try:
+            geometry = CompactGeometry.validate(value.get("geometry"))
+        except (TypeError, ValueError):
+            pass
+        else:
+            return Feature.parse_obj({**value, "geometry": geometry.to_model()})
+    return Feature.parse_obj(value)
+
+
+def new_document(
+    feature: Feature,
+    updated_at: datetime,
+    feature_id: PydanticObjectId | None = None,
+) -> DBFeature:
+    """Returns the document of a new feature, with its bounding box.
+
+    Args:
+        feature (Feature): The feature to insert.
+        updated_at (datetime): The time of the insertion.
+        feature_id (PydanticObjectId | None): The id of the feature, a new one
+            if None.
+
+    Returns:
+        DBFeature: The document, at its first revision.
+    """
+    return DBFeature(
+        id=feature_id or PydanticObjectId(),
+        geojson_type=feature.geojson_type,
+        geometry=feature.geometry,
+        properties=feature.properties,
+        bounds=FeatureBounds.from_bounds(geometry_bounds(feature.geometry)),
+        revision=1,
+        updated_at=updated_at,
+    )
+
+
+async def insert_documents(documents: Sequence[DBFeature]) -> dict[int, str]:
+    """Inserts features and their levels of detail with unordered bulk inserts.
+
+    The geometries of the whole batch are validated and normalized first, and
+    invalid ones are not sent to the database. The bounding boxes of normalized
+    geometries are computed again. A feature rejected by the database
+    does not abort the rest of the documents.
+
+    Args:
+        documents (Sequence[DBFeature]): The documents to insert, with their ids.
+
+    Returns:
+        dict[int, str]: The error message of each rejected document, by index.
+    """
+    failed: dict[int, str]
+    normalized, failed = normalize_geometries(
+        [document.geometry for document in documents],
+    )
+    valid = sorted(normalized)
+    for index in valid:
+        document = documents[index]
+        if normalized[index] is not document.geometry:
+            # Closing or rewinding rings may move the arcs the bounds follow.
+            document.geometry = normalized[index]
+            document.bounds = FeatureBounds.from_bounds(
+                geometry_bounds(document.geometry),
+            )
+    if not valid:
+        return failed
+    try:
+        await DBFeature.insert_many(
+            [documents[index] for index in valid],
+            ordered=False,
+        )
+    except BulkWriteError as error:
+        for write_error in error.details.get("writeErrors", []):
+            failed[valid[write_error["index"]]] = write_error.get(
+                "errmsg",
+                "Insert failed",
+            )
+
+    lods = []
+    for index in valid:
+        if index in failed:
+            continue
+        document = documents[index]
+        geometries = build_lods(document.geometry)
+        if geometries:
+            lods.append(DBFeatureLOD(id=document.id, geometries=geometries))
+    if lods:
+        await DBFeatureLOD.insert_many(lods, ordered=False)
+    return failed
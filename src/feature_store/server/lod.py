@@ -0,0 +1,342 @@
+"""Implements levels of detail: geometries simplified once, when they are written.
+
+Each level simplifies the previous one with the Douglas-Peucker algorithm at a
+larger tolerance, in degrees. Level 0 is the full geometry.
+"""
+import os
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from beanie import PydanticObjectId
+from pymongo import ReplaceOne
+
+from feature_store.server.database import DBFeature, DBFeatureLOD, read_collection
+from feature_store.server.geometry import Geometry, Position
+from feature_store.server.models.geojson import GeoJsonLineString, GeoJsonPolygon
+
+lod_tolerances = [
+    float(tolerance)
+    for tolerance in os.getenv(
+        "FEATURE_STORE_LOD_TOLERANCES",
+        "0.00001,0.0001,0.001,0.01",
+    ).split(",")
+]
+lod_min_vertices = int(os.getenv("FEATURE_STORE_LOD_MIN_VERTICES", "32"))
+
+MIN_RING_LENGTH = 4
+
+
+def simplify_path(points: Sequence[Position], tolerance: float) -> list[Position]:
+    """Simplifies a path with the Douglas-Peucker algorithm.
+
+    Args:
+        points (Sequence[Position]): The vertices of the path.
+        tolerance (float): The largest distance, in degrees, a removed vertex may
+            lie from the simplified path.
+
+    Returns:
+        list[Position]: The vertices kept, always including both end points.
+    """
+    if len(points) < 3:  # noqa: PLR2004
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    squared_tolerance = tolerance * tolerance
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        start_x, start_y = points[first][0], points[first][1]
+        dx, dy = points[last][0] - start_x, points[last][1] - start_y
+        squared_length = dx * dx + dy * dy
+
+        farthest, farthest_distance = -1, squared_tolerance
+        for index in range(first + 1, last):
+            px, py = points[index][0] - start_x, points[index][1] - start_y
+            if squared_length > 0:
+                t = max(0.0, min(1.0, (px * dx + py * dy) / squared_length))
+                px, py = px - t * dx, py - t * dy
+            distance = px * px + py * py
+            if distance > farthest_distance:
+                farthest, farthest_distance = index, distance
+
+        if farthest != -1:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    return [point for point, kept in zip(points, keep, strict=True) if kept]
+
+
+def simplify_geometry(geometry: Geometry, tolerance: float) -> Geometry | None:
+    """Simplifies the paths of a geometry.
+
+    Args:
+        geometry (Geometry): The geometry to simplify.
+        tolerance (float): The simplification tolerance, in degrees.
+
+    Returns:
+        Geometry | None: The simplified geometry, or None if no vertex could be
+            removed or the exterior ring of a polygon would collapse.
+    """
+    if isinstance(geometry, GeoJsonLineString):
+        line = simplify_path(geometry.coordinates, tolerance)
+        if len(line) == len(geometry.coordinates):
+            return None
+        return GeoJsonLineString(coordinates=line)
+
+    if isinstance(geometry, GeoJsonPolygon):
+        rings = []
+        for index, ring in enumerate(geometry.coordinates):
+            simplified = simplify_path(ring, tolerance)
+            if len(simplified) < MIN_RING_LENGTH:
+                if index == 0:
+                    return None
+                continue
+            rings.append(simplified)
+        if sum(map(len, rings)) == sum(map(len, geometry.coordinates)):
+            return None
+        return GeoJsonPolygon(coordinates=rings)
+
+    return None
+
+
+def build_lods(geometry: Geometry) -> dict[str, Geometry]:
+    """Simplifies a geometry at every level of detail.
+
+    Args:
+        geometry (Geometry): The full geometry.
+
+    Returns:
+        dict[str, Geometry]: The simplified geometries by level, only for the
+            levels that remove vertices. Empty for small geometries.
+    """
+    if vertex_count(geometry) < lod_min_vertices:
+        return {}
+
+    lods: dict[str, Geometry] = {}
+    current = geometry
+    for level, tolerance in enumerate(lod_tolerances, start=1):
+        simplified = simplify_geometry(current, tolerance)
+        if simplified is not None:
+            current = simplified
+        if current is not geometry:
+            lods[str(level)] = current
+    return lods
+
+
+def vertex_count(geometry: Geometry) -> int:
+    """Returns the number of vertices of a geometry.
+
+    Args:
+        geometry (Geometry): The geometry.
+
+    Returns:
+        int: The number of vertices.
+    """
+    if isinstance(geometry, GeoJsonPolygon):
+        return sum(map(len, geometry.coordinates))
+    if isinstance(geometry, GeoJsonLineString):
+        return len(geometry.coordinates)
+    return 1
+
+
+def lod_for_resolution(resolution: float) -> int:
+    """Returns the coarsest level of detail whose error is below a resolution.
+
+    Args:
+        resolution (float): The size, in degrees, of the smallest visible detail.
+
+    Returns:
+        int: The level of detail, 0 if none is coarse enough.
+    """
+    level = 0
+    for index, tolerance in enumerate(lod_tolerances, start=1):
+        if tolerance <= resolution:
+            level = index
+    return level
+
+
+async def save_lods(
+    feature_id: PydanticObjectId,
+    geometry: Geometry,
+    *,
+    replace: bool = True,
+) -> None:
+    """Stores the levels of detail of a feature.
+
+    Args:
+        feature_id (PydanticObjectId): The id of the feature.
+        geometry (Geometry): The full geometry of the feature.
+        replace (bool): Whether the feature may already have levels of detail.
+    """
+    lods = build_lods(geometry)
+    if lods:
+        await DBFeatureLOD(id=feature_id, geometries=lods).save()
+    elif replace:
+        await delete_lods(feature_id)
+
+
+async def delete_lods(feature_id: PydanticObjectId) -> None:
+    """Deletes the levels of detail of a feature.
+
+    Args:
+        feature_id (PydanticObjectId): The id of the feature.
+    """
+    await DBFeatureLOD.get_motor_collection().delete_one({"_id": feature_id})
+
+
+async def save_many_lods(
+    feature_ids: Sequence[PydanticObjectId],
+    geometry: Geometry,
+) -> None:
+    """Stores the same levels of detail for many features in one bulk write.
+
+    Args:
+        feature_ids (Sequence[PydanticObjectId]): The ids of the features.
+        geometry (Geometry): The full geometry shared by the features.
+    """
+    lods = build_lods(geometry)
+    if not lods:
+        await delete_many_lods(feature_ids)
+        return
+    if not feature_ids:
+        return
+    document = {
+        "geometries": {level: lod.dict(by_alias=True) for level, lod in lods.items()},
+    }
+    await DBFeatureLOD.get_motor_collection().bulk_write(
+        [
+            ReplaceOne({"_id": feature_id}, document, upsert=True)
+            for feature_id in feature_ids
+        ],
+        ordered=False,
+    )
+
+
+async def delete_many_lods(feature_ids: Sequence[PydanticObjectId]) -> None:
+    """Deletes the levels of detail of many features.
+
+    Args:
+        feature_ids (Sequence[PydanticObjectId]): The ids of the features.
+    """
+    if feature_ids:
+        await DBFeatureLOD.get_motor_collection().delete_many(
+            {"_id": {"$in": list(feature_ids)}},
+        )
+
+
+async def load_lod_geometries(
+    feature_ids: Sequence[Any],
+    level: int,
+) -> dict[Any, dict[str, Any]]:
+    """Returns the raw simplified geometries of features at a level of detail.
+
+    Args:
+        feature_ids (Sequence[Any]): The ids of the features.
+        level (int): The level of detail.
+
+    Returns:
+        dict[Any, dict[str, Any]]: The geometries by feature id, for the features
+            that have one at this level.
+    """
+    if level == 0 or not feature_ids:
+        return {}
+    field = f"geometries.{level}"
+    cursor = read_collection(DBFeatureLOD).find(
+        {"_id": {"$in": list(feature_ids)}, field: {"$exists": True}},
+        {field: 1},
+    )
+    return {
+        document["_id"]: document["geometries"][str(level)] async for document in cursor
+    }
+
+
+def lod_projection(
+    projection: Mapping[str, Any] | None,
+    level: int | None,
+) -> Mapping[str, Any] | None:
+    """Returns a projection that leaves the geometry out of reads at a level of detail.
+
+    The geometries of the documents read with it are then set by
+    `fill_lod_geometries`.
+
+    Args:
+        projection (Mapping[str, Any] | None): The fields to read, all if None.
+        level (int | None): The level of detail, None or 0 for full geometries.
+
+    Returns:
+        Mapping[str, Any] | None: The projection, unchanged for full geometries.
+    """
+    if not level:
+        return projection
+    if projection is None or 0 in projection.values():
+        return {**(projection or {}), "geometry": 0}
+    kept = {path: value for path, value in projection.items() if path != "geometry"}
+    return kept or {"_id": 1}
+
+
+async def fill_lod_geometries(
+    documents: Sequence[dict[str, Any]],
+    level: int | None,
+) -> list[dict[str, Any]]:
+    """Sets the geometries of raw feature documents at a level of detail.
+
+    The documents are read with `lod_projection`, and the full geometries are
+    only read for the features without a simplified one at this level, so coarse
+    reads do not load every vertex of large features.
+
+    Args:
+        documents (Sequence[dict[str, Any]]): The raw documents.
+        level (int | None): The level of detail, None or 0 for full geometries.
+
+    Returns:
+        list[dict[str, Any]]: The documents with their geometry, in order.
+    """
+    if not level:
+        return list(documents)
+    geometries = await load_lod_geometries(
+        [document["_id"] for document in documents],
+        level,
+    )
+    missing = [
+        document["_id"] for document in documents if document["_id"] not in geometries
+    ]
+    if missing:
+        cursor = read_collection(DBFeature).find(
+            {"_id": {"$in": missing}},
+            {"geometry": 1},
+        )
+        geometries.update(
+            {document["_id"]: document["geometry"] async for document in cursor},
+        )
+    # Features deleted since the first read have no geometry left to show.
+    return [
+        {**document, "geometry": geometries[document["_id"]]}
+        for document in documents
+        if document["_id"] in geometries
+    ]
+
+
+async def find_documents_at_lod(
+    query: Mapping[str, Any],
+    level: int,
+    limit: int = 0,
+) -> list[dict[str, Any]]:
+    """Returns the raw geometries and properties of features at a level of detail.
+
+    Args:
+        query (Mapping[str, Any]): The MongoDB filter of the features.
+        level (int): The level of detail, 0 for full geometries.
+        limit (int): The maximum number of features to return, 0 for all.
+
+    Returns:
+        list[dict[str, Any]]: The raw documents, with their `_id`, `geometry` and
+            `properties`.
+    """
+    cursor = read_collection(DBFeature).find(
+        query,
+        lod_projection({"geometry": 1, "properties": 1}, level),
+        limit=limit,
+    )
+    return await fill_lod_geometries(await cursor.to_list(None), level)
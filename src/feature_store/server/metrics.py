@@ -0,0 +1,395 @@
+"""Implements Prometheus metrics of the HTTP requests and the MongoDB commands.
+
+Metrics are plain histograms kept in the worker process and rendered in the
+Prometheus text format by the `/metrics` endpoint. Recording a value is a bucket
+lookup and two additions under a lock, so they stay on under production load.
+MongoDB commands are timed by a pymongo command listener registered in
+`init_db`, which also logs the filter of commands slower than
+`FEATURE_STORE_SLOW_QUERY_MS` when it is set.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator, Mapping, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+slow_query_ms = float(os.getenv("FEATURE_STORE_SLOW_QUERY_MS", "0")) or None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DURATION_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS = tuple(float(4**exponent) for exponent in range(3, 14))
+COUNT_BUCKETS = (0, 1, 10, 50, 100, 500, 1_000, 5_000, 10_000, 50_000, 100_000)
+QUERY_KEYS = ("filter", "query", "pipeline", "updates", "deletes")
+MAX_LOGGED_QUERY = 2_000
+MAX_LOGGED_ITEMS = 5
+MAX_LOGGED_DEPTH = 8
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value: str) -> str:
+    """Escapes a label value of the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Returns the labels of a sample in the Prometheus text format."""
+    labels = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return f"{{{labels}}}" if labels else ""
+
+
+@dataclass
+class _Series:
+    """Holds the observations of a histogram for one set of label values."""
+
+    counts: list[int]
+    total: float = 0.0
+
+
+class Histogram:
+    """Counts observations in buckets, per set of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float],
+    ) -> None:
+        """Initializes the histogram.
+
+        Args:
+            name (str): The name of the metric.
+            documentation (str): The help text of the metric.
+            labelnames (Sequence[str]): The names of the labels.
+            buckets (Sequence[float]): The upper bounds of the buckets, sorted.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple[str, ...], _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Records an observation.
+
+        Args:
+            value (float): The observed value.
+            *labels (str): The values of the labels, in order.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = _Series([0] * (len(self.buckets) + 1))
+                self._series[labels] = series
+            series.counts[index] += 1
+            series.total += value
+
+    def render(self) -> Iterator[str]:
+        """Yields the lines of the histogram in the Prometheus text format.
+
+        Yields:
+            str: A line, without its line break.
+        """
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = {
+                labels: _Series(list(values.counts), values.total)
+                for labels, values in self._series.items()
+            }
+        for labels, values in sorted(series.items()):
+            names = (*self.labelnames, "le")
+            cumulative = 0
+            for bound, count in zip(
+                (*map(repr, self.buckets), "+Inf"),
+                values.counts,
+                strict=True,
+            ):
+                cumulative += count
+                sample_labels = _format_labels(names, (*labels, bound))
+                yield f"{self.name}_bucket{sample_labels} {cumulative}"
+            sample_labels = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{sample_labels} {values.total!r}"
+            yield f"{self.name}_count{sample_labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Holds the metrics rendered by the `/metrics` endpoint."""
+
+    def __init__(self) -> None:
+        """Initializes an empty registry."""
+        self.metrics: list[Histogram] = []
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float],
+    ) -> Histogram:
+        """Creates and registers a histogram.
+
+        Args:
+            name (str): The name of the metric.
+            documentation (str): The help text of the metric.
+            labelnames (Sequence[str]): The names of the labels.
+            buckets (Sequence[float]): The upper bounds of the buckets, sorted.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(histogram)
+        return histogram
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text format.
+
+        Returns:
+            str: The metrics.
+        """
+        return "".join(
+            f"{line}\n" for metric in self.metrics for line in metric.render()
+        )
+
+
+registry = MetricsRegistry()
+request_duration = registry.histogram(
+    "feature_store_http_request_duration_seconds",
+    "Time spent handling HTTP requests, including streaming the response.",
+    ("method", "route", "status"),
+    DURATION_BUCKETS,
+)
+request_size = registry.histogram(
+    "feature_store_http_request_size_bytes",
+    "Size of the HTTP request bodies.",
+    ("method", "route"),
+    SIZE_BUCKETS,
+)
+response_size = registry.histogram(
+    "feature_store_http_response_size_bytes",
+    "Size of the HTTP response bodies.",
+    ("method", "route"),
+    SIZE_BUCKETS,
+)
+result_size = registry.histogram(
+    "feature_store_query_result_features",
+    "Number of features returned by a page of a feature query.",
+    ("method", "route"),
+    COUNT_BUCKETS,
+)
+mongo_command_duration = registry.histogram(
+    "feature_store_mongo_command_duration_seconds",
+    "Time spent by MongoDB commands, as measured by the driver.",
+    ("command", "outcome"),
+    DURATION_BUCKETS,
+)
+
+
+@dataclass
+class _RequestStats:
+    """Holds what is measured of a request while it is handled."""
+
+    request_bytes: int = 0
+    response_bytes: int = 0
+    status: int = 500
+    result_size: int | None = None
+
+
+_request_stats: ContextVar[_RequestStats | None] = ContextVar(
+    "request_stats",
+    default=None,
+)
+
+
+def record_result_size(count: int) -> None:
+    """Records the number of features a query returns for the current request.
+
+    Args:
+        count (int): The number of features.
+    """
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.result_size = count
+
+
+def _route(scope: Scope) -> str:
+    """Returns the path template of the route that handled a request."""
+    route = scope.get("route")
+    path: str = getattr(route, "path_format", "unmatched")
+    return path
+
+
+class MetricsMiddleware:
+    """Measures the duration and the body sizes of the HTTP requests."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initializes the middleware.
+
+        Args:
+            app (ASGIApp): The application to measure.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handles a request and records its metrics.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+
+        async def _receive() -> Message:
+            message = await receive()
+            stats.request_bytes += len(message.get("body", b""))
+            return message
+
+        async def _send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                stats.status = message["status"]
+            else:
+                stats.response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, _receive, _send)
+        finally:
+            duration = time.perf_counter() - start
+            _request_stats.reset(token)
+            method, route = scope["method"], _route(scope)
+            request_duration.observe(duration, method, route, str(stats.status))
+            request_size.observe(stats.request_bytes, method, route)
+            response_size.observe(stats.response_bytes, method, route)
+            if stats.result_size is not None:
+                result_size.observe(stats.result_size, method, route)
+
+
+def _short_repr(value: object, depth: int = 0) -> str:
+    """Returns the repr of a command value, with the first items of containers only."""
+    if isinstance(value, Mapping | list | tuple) and depth >= MAX_LOGGED_DEPTH:
+        return "..."
+    if isinstance(value, Mapping):
+        items = [
+            f"{key!r}: {_short_repr(item, depth + 1)}"
+            for key, item in islice(value.items(), MAX_LOGGED_ITEMS)
+        ]
+        if len(value) > MAX_LOGGED_ITEMS:
+            items.append("...")
+        return f"{{{', '.join(items)}}}"
+    if isinstance(value, list | tuple):
+        items = [_short_repr(item, depth + 1) for item in value[:MAX_LOGGED_ITEMS]]
+        if len(value) > MAX_LOGGED_ITEMS:
+            items.append("...")
+        return f"[{', '.join(items)}]"
+    return repr(value)[:MAX_LOGGED_QUERY]
+
+
+def _query_of(command: Mapping[str, Any]) -> str:
+    """Returns the filter of a MongoDB command, shortened for logging."""
+    query = _short_repr({key: command[key] for key in QUERY_KEYS if key in command})
+    if len(query) > MAX_LOGGED_QUERY:
+        return query[:MAX_LOGGED_QUERY] + "..."
+    return query
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times the MongoDB commands and logs the slow ones with their filter."""
+
+    def __init__(self, slow_ms: float | None = None) -> None:
+        """Initializes the listener.
+
+        Args:
+            slow_ms (float | None): The duration from which commands are logged,
+                None to log none.
+        """
+        self.slow_ms = slow_ms
+        self._pending: dict[tuple[Any, int], Mapping[str, Any]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        """Keeps the command while slow commands are logged.
+
+        The command is only formatted once it turns out to be slow.
+
+        Args:
+            event (monitoring.CommandStartedEvent): The started command.
+        """
+        if self.slow_ms is not None:
+            self._pending[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        """Records the duration of a command.
+
+        Args:
+            event (monitoring.CommandSucceededEvent): The completed command.
+        """
+        self._finish(event, "succeeded")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        """Records the duration of a failed command.
+
+        Args:
+            event (monitoring.CommandFailedEvent): The failed command.
+        """
+        self._finish(event, "failed")
+
+    def _finish(
+        self,
+        event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent,
+        outcome: str,
+    ) -> None:
+        """Records the duration of a command and logs it when it is slow."""
+        mongo_command_duration.observe(
+            event.duration_micros / 1_000_000,
+            event.command_name,
+            outcome,
+        )
+        if self.slow_ms is None:
+            return
+        command = self._pending.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1_000
+        if duration_ms >= self.slow_ms:
+            logger.warning(
+                "Slow MongoDB %s (%s) took %.1fms: %s",
+                event.command_name,
+                outcome,
+                duration_ms,
+                None if command is None else _query_of(command),
+            )
+
+
+command_metrics = CommandMetrics(slow_query_ms)
@@ -0,0 +1,103 @@
+"""Prepares the database for the server, ahead of its deployment.
+
+Run with `python -m feature_store.server.migrate`, against the MongoDB
+configured by the `MONGODB_*` environment variables, and with the
+`FEATURE_STORE_PROPERTY_INDEXES` of the servers. The missing indexes of the
+features collection are built in the background, then the bounding boxes of
+features stored before they were maintained are computed, so spatial queries
+can use the bounds indexes for every feature. Both steps skip what is already
+done, so the command can be run on every deployment. Servers do not build
+indexes at startup and report themselves ready once the indexes exist.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from pymongo import UpdateOne
+
+from feature_store.server.database import (
+    DBFeature,
+    FeatureBounds,
+    close_db,
+    create_indexes,
+    init_db,
+)
+from feature_store.server.geometry import geometry_bounds
+from feature_store.server.ingest import bulk_chunk_size
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_bounds(chunk_size: int = bulk_chunk_size) -> int:
+    """Stores the bounding box of the features stored without one.
+
+    The revisions of the features are not changed, as their content is not.
+
+    Args:
+        chunk_size (int): The number of features updated at once.
+
+    Returns:
+        int: The number of updated features.
+    """
+    collection = DBFeature.get_motor_collection()
+    updated = 0
+    updates: list[UpdateOne] = []
+    async for feature in DBFeature.find({"bounds": None}):
+        bounds = FeatureBounds.from_bounds(geometry_bounds(feature.geometry))
+        updates.append(
+            UpdateOne(
+                {"_id": feature.id, "bounds": None},
+                {"$set": {"bounds": bounds.dict()}},
+            ),
+        )
+        if len(updates) == chunk_size:
+            updated += (await collection.bulk_write(updates)).modified_count
+            updates.clear()
+    if updates:
+        updated += (await collection.bulk_write(updates)).modified_count
+    return updated
+
+
+async def migrate(*, backfill: bool, chunk_size: int) -> None:
+    """Builds the missing indexes and backfills the bounding boxes.
+
+    Args:
+        backfill (bool): Whether to backfill the bounding boxes.
+        chunk_size (int): The number of features updated at once.
+    """
+    await init_db()
+    try:
+        created = await create_indexes()
+        logger.info("Created indexes: %s", ", ".join(created) or "none")
+        if backfill:
+            updated = await backfill_bounds(chunk_size)
+            logger.info("Backfilled the bounds of %d features", updated)
+    finally:
+        close_db()
+
+
+def main(argv: list[str]) -> int:
+    """Migrates the database configured by the environment.
+
+    Args:
+        argv (list[str]): The command line arguments.
+
+    Returns:
+        int: The exit status.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--skip-backfill",
+        action="store_true",
+        help="only build the indexes",
+    )
+    parser.add_argument("--chunk-size", type=int, default=bulk_chunk_size)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate(backfill=not args.skip_backfill, chunk_size=args.chunk_size))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
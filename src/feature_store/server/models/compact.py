@@ -0,0 +1,260 @@
+"""Implements a compact GeoJSON geometry backed by a flat `array('d')` buffer.
+
+The Pydantic GeoJSON models validate and copy every coordinate one at a time,
+which dominates the cost of large geometries. `CompactGeometry` checks the shape
+of each path at once and copies its coordinates into the buffer in C, and writes
+GeoJSON text straight from the buffer. Uploads and imports validate geometries
+with it before building the models, see `ingest.parse_feature`.
+"""
+import math
+from array import array
+from collections.abc import Callable, Iterator
+from itertools import chain, pairwise
+from typing import Any, TypeAlias
+
+from feature_store.server.models.geojson import (
+    GeoJsonLineString,
+    GeoJsonPoint,
+    GeoJsonPolygon,
+    GeometryType,
+)
+
+Coordinates: TypeAlias = "array[float]"
+
+MIN_DIMENSIONS = 2
+MIN_LINE_LENGTH = 2
+MIN_RING_LENGTH = 4
+
+
+def _parse_path(positions: object, min_length: int) -> tuple[Coordinates, int]:
+    """Validates a list of positions and returns them as a flat buffer.
+
+    Args:
+        positions (object): The positions to validate.
+        min_length (int): The minimum number of positions of the path.
+
+    Raises:
+        TypeError: If a position is not an array of numbers.
+        ValueError: If the positions have fewer than two coordinates, or not
+            all the same number, if a coordinate is not finite, or if the path
+            is too short.
+
+    Returns:
+        tuple[array[float], int]: The coordinates of the positions, one after
+            the other, and the number of coordinates of each position.
+    """
+    if not isinstance(positions, list | tuple):
+        msg = "positions must be an array"
+        raise TypeError(msg)
+    if len(positions) < min_length:
+        msg = f"a path needs at least {min_length} positions"
+        raise ValueError(msg)
+    try:
+        lengths = set(map(len, positions))
+    except TypeError:
+        msg = "positions must be arrays of numbers"
+        raise TypeError(msg) from None
+    if len(lengths) != 1 or min(lengths) < MIN_DIMENSIONS:
+        msg = "positions must all have the same number of coordinates, at least two"
+        raise ValueError(msg)
+    values = array("d", chain.from_iterable(positions))
+    if not all(map(math.isfinite, values)):
+        msg = "coordinates must be finite"
+        raise ValueError(msg)
+    return values, lengths.pop()
+
+
+def _format_path(values: Coordinates, dimensions: int) -> str:
+    """Returns the GeoJSON text of a flat buffer of coordinates."""
+    numbers = map(float.__repr__, values)
+    positions = zip(*[numbers] * dimensions, strict=False)
+    return "[[" + "],[".join(map(",".join, positions)) + "]]"
+
+
+class CompactGeometry:
+    """Represents a GeoJSON geometry with its coordinates in a flat buffer.
+
+    The coordinates of every path are stored one after the other, `dimensions`
+    per position, and `offsets` holds the index of the first position of each
+    path followed by the total number of positions. Points and LineStrings have
+    a single path, Polygons one per ring. All the positions of a geometry have
+    the same number of coordinates, two or more, and every coordinate is finite.
+    """
+
+    __slots__ = ("geo_type", "coordinates", "offsets", "dimensions")
+
+    def __init__(
+        self,
+        geo_type: GeometryType,
+        coordinates: Coordinates,
+        offsets: list[int],
+        dimensions: int = MIN_DIMENSIONS,
+    ) -> None:
+        """Initializes the geometry.
+
+        Args:
+            geo_type (GeometryType): The type of the geometry.
+            coordinates (array[float]): The coordinates of every position.
+            offsets (list[int]): The index of the first position of each path,
+                followed by the number of positions.
+            dimensions (int): The number of coordinates of each position.
+        """
+        self.geo_type = geo_type
+        self.coordinates = coordinates
+        self.offsets = offsets
+        self.dimensions = dimensions
+
+    @classmethod
+    def __get_validators__(
+        cls: type["CompactGeometry"],
+    ) -> Iterator[Callable[[object], "CompactGeometry"]]:
+        """Yields the validators Pydantic runs on fields of this type."""
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls: type["CompactGeometry"], schema: dict[str, Any]) -> None:
+        """Describes fields of this type as GeoJSON geometries in the schema."""
+        schema.update(
+            type="object",
+            properties={
+                "type": {"enum": [geo_type.value for geo_type in GeometryType]},
+                "coordinates": {"type": "array"},
+            },
+            required=["type", "coordinates"],
+        )
+
+    @classmethod
+    def validate(cls: type["CompactGeometry"], value: object) -> "CompactGeometry":
+        """Validates a GeoJSON geometry.
+
+        Args:
+            value (object): A GeoJSON geometry mapping, or a compact geometry.
+
+        Raises:
+            TypeError: If the value is not a GeoJSON geometry.
+            ValueError: If the type or the coordinates of the geometry are invalid.
+
+        Returns:
+            CompactGeometry: The geometry.
+        """
+        if isinstance(value, cls):
+            return value
+        if not isinstance(value, dict) or "coordinates" not in value:
+            msg = "a geometry must be an object with coordinates"
+            raise TypeError(msg)
+
+        geo_type = GeometryType(value.get("type"))
+        coordinates = value["coordinates"]
+        if geo_type == GeometryType.POINT:
+            point, dimensions = _parse_path([coordinates], 1)
+            return cls(geo_type, point, [0, 1], dimensions)
+        if geo_type == GeometryType.LINE_STRING:
+            path, dimensions = _parse_path(coordinates, MIN_LINE_LENGTH)
+            return cls(geo_type, path, [0, len(path) // dimensions], dimensions)
+
+        if not isinstance(coordinates, list | tuple) or not coordinates:
+            msg = "a polygon needs at least one ring"
+            raise ValueError(msg)
+        buffer: Coordinates = array("d")
+        offsets = [0]
+        ring_dimensions: set[int] = set()
+        for ring in coordinates:
+            path, dimensions = _parse_path(ring, MIN_RING_LENGTH)
+            buffer.extend(path)
+            ring_dimensions.add(dimensions)
+            offsets.append(len(buffer) // dimensions)
+        if len(ring_dimensions) != 1:
+            msg = "positions must all have the same number of coordinates"
+            raise ValueError(msg)
+        return cls(geo_type, buffer, offsets, ring_dimensions.pop())
+
+    @classmethod
+    def from_model(
+        cls: type["CompactGeometry"],
+        geometry: GeoJsonPoint | GeoJsonLineString | GeoJsonPolygon,
+    ) -> "CompactGeometry":
+        """Returns the compact form of a GeoJSON geometry model.
+
+        Args:
+            geometry (GeoJsonPoint | GeoJsonLineString | GeoJsonPolygon): The model.
+
+        Returns:
+            CompactGeometry: The geometry.
+        """
+        return cls.validate(geometry.dict(by_alias=True))
+
+    def __len__(self) -> int:
+        """Returns the number of positions of the geometry."""
+        return self.offsets[-1]
+
+    def __eq__(self, other: object) -> bool:
+        """Returns whether two geometries have the same type and positions."""
+        if not isinstance(other, CompactGeometry):
+            return NotImplemented
+        return (
+            self.geo_type == other.geo_type
+            and self.dimensions == other.dimensions
+            and self.offsets == other.offsets
+            and self.coordinates == other.coordinates
+        )
+
+    __hash__ = None  # type: ignore  # noqa: PGH003
+
+    def paths(self) -> Iterator[Coordinates]:
+        """Yields the flat coordinates of each path of the geometry.
+
+        Yields:
+            array[float]: The coordinates of the positions of a path.
+        """
+        for start, end in pairwise(self.offsets):
+            yield self.coordinates[start * self.dimensions : end * self.dimensions]
+
+    def to_list(self) -> list[Any]:
+        """Returns the coordinates as nested GeoJSON lists, for BSON encoding.
+
+        Returns:
+            list[Any]: The GeoJSON coordinates.
+        """
+        paths = [
+            [
+                list(position)
+                for position in zip(
+                    *(path[axis :: self.dimensions] for axis in range(self.dimensions)),
+                    strict=True,
+                )
+            ]
+            for path in self.paths()
+        ]
+        if self.geo_type == GeometryType.POINT:
+            return paths[0][0]
+        if self.geo_type == GeometryType.LINE_STRING:
+            return paths[0]
+        return paths
+
+    def to_json(self) -> str:
+        """Returns the GeoJSON text of the geometry, formatted from the buffer.
+
+        Returns:
+            str: The GeoJSON geometry.
+        """
+        paths = [_format_path(path, self.dimensions) for path in self.paths()]
+        if self.geo_type == GeometryType.POINT:
+            coordinates = paths[0][1:-1]
+        elif self.geo_type == GeometryType.LINE_STRING:
+            coordinates = paths[0]
+        else:
+            coordinates = "[" + ",".join(paths) + "]"
+        return f'{{"type":"{self.geo_type.value}","coordinates":{coordinates}}}'
+
+    def to_model(self) -> GeoJsonPoint | GeoJsonLineString | GeoJsonPolygon:
+        """Returns the geometry as a GeoJSON model, without validating it again.
+
+        Returns:
+            GeoJsonPoint | GeoJsonLineString | GeoJsonPolygon: The model.
+        """
+        coordinates = self.to_list()
+        if self.geo_type == GeometryType.POINT:
+            return GeoJsonPoint.construct(coordinates=coordinates)
+        if self.geo_type == GeometryType.LINE_STRING:
+            return GeoJsonLineString.construct(coordinates=coordinates)
+        return GeoJsonPolygon.construct(coordinates=coordinates)
@@ -71,6 +71,7 @@ class Feature(BaseModel):
         fields = {"geojson_type": "type"}
 
         allow_population_by_field_name = True
+        smart_union = True
 
 
 class FeatureCollection(BaseModel):
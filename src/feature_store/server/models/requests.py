@@ -0,0 +1,151 @@
+"""Implements Pydantic models for Feature Store API requests."""
+import os
+from typing import Any
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field, root_validator, validator
+
+from feature_store.server.database import UpdateDBFeature
+from feature_store.server.models.geojson import GeoJsonPolygon
+from feature_store.server.queries import is_property_key
+
+max_join_regions = int(os.getenv("FEATURE_STORE_JOIN_MAX_REGIONS", "10000"))
+
+
+def _check_property_keys(properties: dict[str, str] | None) -> None:
+    """Raises a ValueError for property names unsafe in MongoDB field paths."""
+    for key in properties or {}:
+        if not is_property_key(key):
+            msg = f"invalid property name: {key!r}"
+            raise ValueError(msg)
+
+
+class BulkSelection(BaseModel):
+    """Represents the features a bulk write applies to.
+
+    Either `ids` lists the features, or `properties` selects every feature whose
+    properties have the given values.
+    """
+
+    ids: list[PydanticObjectId] | None = None
+    properties: dict[str, str] | None = None
+
+    @root_validator(skip_on_failure=True)
+    @classmethod
+    def check_selection(
+        cls: type["BulkSelection"],
+        values: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Checks exactly one way of selecting features is given.
+
+        Args:
+            values (dict[str, Any]): The fields of the selection.
+
+        Raises:
+            ValueError: If both or neither of `ids` and `properties` are given.
+
+        Returns:
+            dict[str, Any]: The fields of the selection.
+        """
+        if (values.get("ids") is None) == (not values.get("properties")):
+            msg = "exactly one of ids or non-empty properties must be given"
+            raise ValueError(msg)
+        return values
+
+    @validator("properties")
+    @classmethod
+    def check_property_keys(
+        cls: type["BulkSelection"],
+        properties: dict[str, str] | None,
+    ) -> dict[str, str] | None:
+        """Checks the selected property names can be used in field paths.
+
+        Args:
+            properties (dict[str, str] | None): The selected property values.
+
+        Raises:
+            ValueError: If a name is empty, an operator or a nested path.
+
+        Returns:
+            dict[str, str] | None: The selected property values.
+        """
+        _check_property_keys(properties)
+        return properties
+
+    def query(self) -> dict[str, Any]:
+        """Returns the MongoDB filter of the selected features.
+
+        Returns:
+            dict[str, Any]: The filter.
+        """
+        if self.ids is not None:
+            return {"_id": {"$in": self.ids}}
+        return {
+            f"properties.{key}": value for key, value in (self.properties or {}).items()
+        }
+
+
+class BulkUpdate(BulkSelection):
+    """Represents an update applied to many features at once."""
+
+    update: UpdateDBFeature
+
+    @validator("update")
+    @classmethod
+    def check_update_keys(
+        cls: type["BulkUpdate"],
+        update: UpdateDBFeature,
+    ) -> UpdateDBFeature:
+        """Checks the updated property names can be stored as field names.
+
+        Args:
+            update (UpdateDBFeature): The update to apply.
+
+        Raises:
+            ValueError: If a name is empty, an operator or a nested path.
+
+        Returns:
+            UpdateDBFeature: The update to apply.
+        """
+        _check_property_keys(update.properties)
+        return update
+
+
+class JoinRegion(BaseModel):
+    """Represents a named region of a spatial join."""
+
+    name: str
+    geometry: GeoJsonPolygon
+
+
+class SpatialJoin(BaseModel):
+    """Represents the regions to find the intersecting features of.
+
+    Region names must be unique. The matching features themselves are only
+    returned when `include_features` is set.
+    """
+
+    regions: list[JoinRegion] = Field(min_items=1, max_items=max_join_regions)
+    include_features: bool = False
+
+    @validator("regions")
+    @classmethod
+    def check_names(
+        cls: type["SpatialJoin"],
+        regions: list[JoinRegion],
+    ) -> list[JoinRegion]:
+        """Checks the region names are unique.
+
+        Args:
+            regions (list[JoinRegion]): The regions of the join.
+
+        Raises:
+            ValueError: If two regions have the same name.
+
+        Returns:
+            list[JoinRegion]: The regions of the join.
+        """
+        if len({region.name for region in regions}) != len(regions):
+            msg = "region names must be unique"
+            raise ValueError(msg)
+        return regions
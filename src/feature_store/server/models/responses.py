@@ -0,0 +1,79 @@
+"""Implements Pydantic models for Feature Store API responses."""
+from beanie import PydanticObjectId
+from pydantic import BaseModel
+
+from feature_store.server.database import DBFeature, FeatureBounds
+
+
+class BulkInsertError(BaseModel):
+    """Represents a feature that could not be inserted during a bulk insert.
+
+    `offset` is the byte offset of the feature in the body of an upload.
+    """
+
+    index: int
+    message: str
+    offset: int | None = None
+
+
+class BulkInsertResult(BaseModel):
+    """Represents the outcome of a bulk insert."""
+
+    inserted_count: int
+    inserted_ids: list[PydanticObjectId]
+    errors: list[BulkInsertError]
+
+
+class UploadResult(BaseModel):
+    """Represents the outcome of an upload.
+
+    Only the first errors are listed, `failed_count` counts all of them.
+    """
+
+    inserted_count: int = 0
+    failed_count: int = 0
+    errors: list[BulkInsertError] = []
+
+
+class BulkUpdateResult(BaseModel):
+    """Represents the outcome of a bulk update."""
+
+    matched_count: int
+    modified_count: int
+
+
+class BulkDeleteResult(BaseModel):
+    """Represents the outcome of a bulk delete."""
+
+    deleted_count: int
+
+
+class NearestFeature(BaseModel):
+    """Represents a feature found by a nearest neighbour search."""
+
+    distance: float
+    feature: DBFeature
+
+
+class GridCell(BaseModel):
+    """Represents the number of features in a grid cell."""
+
+    column: int
+    row: int
+    bounds: FeatureBounds
+    count: int
+    groups: dict[str, int] | None = None
+
+
+class SpatialJoinResult(BaseModel):
+    """Represents the features intersecting each region of a spatial join.
+
+    `matches` lists the ids of the features intersecting each region, by region
+    name, in no particular order. The regions in `truncated` intersect more
+    features than the largest page, only that many are listed. Each matching
+    feature is listed once in `features`, when they were requested.
+    """
+
+    matches: dict[str, list[PydanticObjectId]]
+    truncated: list[str] = []
+    features: list[DBFeature] | None = None
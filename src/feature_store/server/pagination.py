@@ -0,0 +1,174 @@
+"""Implements keyset pagination over feature queries.
+
+Pages are ordered by `_id` and a page starts right after the `_id` encoded in an
+opaque cursor, so every page is served by an index seek no matter how deep it is.
+"""
+import base64
+import binascii
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Annotated, Any
+
+import pymongo
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Query
+
+from feature_store.server.database import DBFeature, read_collection
+from feature_store.server.lod import fill_lod_geometries, lod_projection
+
+max_page_size = int(os.getenv("FEATURE_STORE_MAX_PAGE_SIZE", "10000"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+ID_ORDER = [("_id", pymongo.ASCENDING)]
+
+
+@dataclass
+class PageParams:
+    """Represents the pagination query parameters of a listing endpoint.
+
+    Attributes:
+        limit (int | None): The maximum number of features to return.
+        after (str | None): The cursor of the page to return.
+    """
+
+    limit: Annotated[int | None, Query(gt=0, le=max_page_size)] = None
+    after: str | None = None
+
+    @property
+    def paged(self) -> bool:
+        """Returns whether the results are split in pages."""
+        return self.limit is not None or self.after is not None
+
+
+def encode_cursor(last_id: ObjectId) -> str:
+    """Encodes the id of the last feature of a page as an opaque cursor.
+
+    Args:
+        last_id (ObjectId): The id of the last feature of the page.
+
+    Returns:
+        str: The cursor to resume after the page.
+    """
+    return base64.urlsafe_b64encode(last_id.binary).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    """Decodes a cursor returned by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor to decode.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+
+    Returns:
+        ObjectId: The id of the last feature of the previous page.
+    """
+    try:
+        return ObjectId(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, InvalidId, TypeError, ValueError) as error:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid cursor: {cursor}",
+        ) from error
+
+
+def apply_cursor(query: Mapping[str, Any], after: str | None) -> dict[str, Any]:
+    """Restricts a query to the features following a cursor.
+
+    Args:
+        query (Mapping[str, Any]): The MongoDB filter to restrict.
+        after (str | None): The cursor to resume after, if any.
+
+    Returns:
+        dict[str, Any]: The restricted filter.
+    """
+    if after is None:
+        return dict(query)
+    return {"$and": [query, {"_id": {"$gt": decode_cursor(after)}}]}
+
+
+async def find_page_end(query: Mapping[str, Any], limit: int) -> ObjectId | None:
+    """Returns the id of the last feature of a page, if more features follow it.
+
+    Only the ids of the page are read, so the cursor of the next page is known
+    before a streamed page is sent.
+
+    Args:
+        query (Mapping[str, Any]): The MongoDB filter of the page, with its cursor
+            applied.
+        limit (int): The number of features of the page.
+
+    Returns:
+        ObjectId | None: The id of the last feature of the page, None if it is
+            the last page.
+    """
+    cursor = read_collection(DBFeature).find(
+        query,
+        {"_id": 1},
+        sort=ID_ORDER,
+        skip=limit - 1,
+        limit=2,
+    )
+    documents = await cursor.to_list(None)
+    if len(documents) < 2:  # noqa: PLR2004
+        return None
+    last_id: ObjectId = documents[0]["_id"]
+    return last_id
+
+
+async def find_raw_page(
+    query: Mapping[str, Any],
+    page: PageParams,
+    projection: Mapping[str, Any] | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Returns a page of the raw documents matching a query, as stored.
+
+    Args:
+        query (Mapping[str, Any]): The MongoDB filter to apply.
+        page (PageParams): The page to return.
+        projection (Mapping[str, Any] | None): The fields to read, all if None.
+
+    Returns:
+        tuple[list[dict[str, Any]], str | None]: The documents and the cursor of
+            the next page, which is None once the last page is reached.
+    """
+    cursor = read_collection(DBFeature).find(
+        apply_cursor(query, page.after),
+        projection,
+        sort=ID_ORDER if page.paged else None,
+        limit=0 if page.limit is None else page.limit + 1,
+    )
+    documents: list[dict[str, Any]] = await cursor.to_list(None)
+    if page.limit is None or len(documents) <= page.limit:
+        return documents, None
+    documents = documents[: page.limit]
+    return documents, encode_cursor(documents[-1]["_id"])
+
+
+async def find_page(
+    query: Mapping[str, Any],
+    page: PageParams,
+    lod: int | None = None,
+) -> tuple[list[DBFeature], str | None]:
+    """Returns a page of the features matching a query.
+
+    Args:
+        query (Mapping[str, Any]): The MongoDB filter to apply.
+        page (PageParams): The page to return.
+        lod (int | None): The level of detail of the geometries, None or 0 for
+            the full geometries.
+
+    Returns:
+        tuple[list[DBFeature], str | None]: The features and the cursor of the
+            next page, which is None once the last page is reached.
+    """
+    documents, next_cursor = await find_raw_page(
+        query,
+        page,
+        lod_projection(None, lod),
+    )
+    documents = await fill_lod_geometries(documents, lod)
+    return [DBFeature.parse_obj(document) for document in documents], next_cursor
@@ -0,0 +1,90 @@
+"""Implements the query parameters shared by the feature read endpoints."""
+from dataclasses import dataclass
+from typing import Annotated, Any
+
+from fastapi import Header, HTTPException, Query
+
+from feature_store.server.lod import lod_tolerances
+from feature_store.server.queries import FieldSet, PropertyFilter, property_query
+from feature_store.server.streaming import StreamFormat
+
+
+@dataclass
+class FieldParams:
+    """Represents the fields of the features the read endpoints return.
+
+    Only the requested fields are read from the database, and the documents are
+    returned as they are read, without validation.
+
+    Attributes:
+        fields (str | None): The comma separated fields to return, among `id`,
+            `type`, `geometry`, `properties`, `properties.<key>`, `bounds`,
+            `revision` and `updated_at`. The id is always returned.
+        exclude (str | None): The comma separated fields to leave out instead.
+    """
+
+    fields: str | None = None
+    exclude: str | None = None
+
+    def field_set(self) -> FieldSet | None:
+        """Returns the requested field set.
+
+        Raises:
+            HTTPException: If the fields are malformed.
+
+        Returns:
+            FieldSet | None: The field set, None to return whole features.
+        """
+        try:
+            return FieldSet.parse(self.fields, self.exclude)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error)) from error
+
+
+@dataclass
+class OutputParams(FieldParams):
+    """Represents how the read endpoints return features, and their fields.
+
+    Attributes:
+        stream (StreamFormat | None): Streams the features straight from the
+            database cursor in the given format instead of returning a list.
+        lod (int | None): The level of detail of the geometries, 0 for the full
+            geometries.
+        raw (bool): Returns the stored documents as they are, skipping the
+            validation and serialization of the response model.
+        if_none_match (str | None): The ETags of the responses the client
+            already has, answered with `304 Not Modified` when still current.
+    """
+
+    stream: StreamFormat | None = None
+    lod: Annotated[int | None, Query(ge=0, le=len(lod_tolerances))] = None
+    raw: bool = False
+    if_none_match: Annotated[str | None, Header()] = None
+
+
+@dataclass
+class FilterParams:
+    """Represents the property filters of the read endpoints.
+
+    Attributes:
+        filter (list[str] | None): The `key:operator:value` conditions every
+            feature must match, where the operator is `eq`, `in` or `prefix`.
+    """
+
+    filter: Annotated[list[str] | None, Query()] = None  # noqa: A003
+
+    def query(self) -> dict[str, Any]:
+        """Returns the MongoDB filter of the conditions.
+
+        Raises:
+            HTTPException: If a condition is malformed.
+
+        Returns:
+            dict[str, Any]: The MongoDB filter, empty without conditions.
+        """
+        try:
+            filters = [PropertyFilter.parse(text) for text in self.filter or []]
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error)) from error
+        query: dict[str, Any] = property_query(filters)
+        return query
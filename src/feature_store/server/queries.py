@@ -0,0 +1,468 @@
+"""Implements the MongoDB filters shared by the feature endpoints."""
+import math
+import re
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from enum import Enum
+from typing import Annotated, Any
+
+from fastapi import Query
+
+from feature_store.server.geometry import Bounds, Geometry
+from feature_store.server.pagination import max_page_size
+
+MAX_RECTANGLE_WIDTH = 90
+RECTANGLE_EDGE_STEP = 1.0
+
+
+def _parallel(min_x: float, max_x: float, y: float) -> list[list[float]]:
+    """Returns the positions of a constant latitude edge, from west to east.
+
+    Args:
+        min_x (float): The longitude the edge starts at.
+        max_x (float): The longitude the edge ends at.
+        y (float): The latitude of the edge.
+
+    Returns:
+        list[list[float]]: A position every `RECTANGLE_EDGE_STEP` degrees, and
+            at both ends. Only the ends at a pole, where the edge is a point.
+    """
+    if abs(y) == 90:  # noqa: PLR2004
+        return [[min_x, y], [max_x, y]]
+    steps = max(1, math.ceil((max_x - min_x) / RECTANGLE_EDGE_STEP))
+    width = (max_x - min_x) / steps
+    return [[min_x + index * width, y] for index in range(steps)] + [[max_x, y]]
+
+
+def rectangle_geometry(bounds: Bounds) -> dict[str, Any]:
+    """Builds the GeoJSON geometry of a lon/lat rectangle.
+
+    The edges of a polygon are great-circle arcs, which bow toward the pole when
+    they join two points at the same latitude. The south and north edges are
+    thus densified with a position every `RECTANGLE_EDGE_STEP` degrees, so they
+    stay within a few thousandths of a degree of their latitude. Rectangles wider
+    than `MAX_RECTANGLE_WIDTH` degrees are also split in slices, since an arc
+    between points 180 degrees apart is ambiguous.
+
+    Args:
+        bounds (Bounds): The rectangle.
+
+    Returns:
+        dict[str, Any]: A GeoJSON Polygon, or MultiPolygon for wide rectangles.
+    """
+    slices = math.ceil((bounds.max_x - bounds.min_x) / MAX_RECTANGLE_WIDTH)
+    width = (bounds.max_x - bounds.min_x) / slices
+    polygons = []
+    for index in range(slices):
+        min_x = bounds.min_x + index * width
+        max_x = bounds.max_x if index == slices - 1 else min_x + width
+        south = _parallel(min_x, max_x, bounds.min_y)
+        north = _parallel(min_x, max_x, bounds.max_y)
+        polygons.append([[*south, *reversed(north), south[0]]])
+    if len(polygons) == 1:
+        return {"type": "Polygon", "coordinates": polygons[0]}
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def bbox_query(bounds: Bounds) -> dict[str, Any]:
+    """Builds the filter of features intersecting a lon/lat rectangle.
+
+    Features whose precomputed bounding box lies inside the rectangle match on
+    index range scans alone. Only features straddling its edges, or stored without
+    a bounding box, are checked against the exact geometry.
+
+    Args:
+        bounds (Bounds): The rectangle.
+
+    Returns:
+        dict[str, Any]: The MongoDB filter.
+    """
+    intersects = {"$geoIntersects": {"$geometry": rectangle_geometry(bounds)}}
+    contained = {
+        "bounds.min_x": {"$gte": bounds.min_x},
+        "bounds.max_x": {"$lte": bounds.max_x},
+        "bounds.min_y": {"$gte": bounds.min_y},
+        "bounds.max_y": {"$lte": bounds.max_y},
+    }
+    overlapping = {
+        "bounds.min_x": {"$lte": bounds.max_x},
+        "bounds.max_x": {"$gte": bounds.min_x},
+        "bounds.min_y": {"$lte": bounds.max_y},
+        "bounds.max_y": {"$gte": bounds.min_y},
+    }
+    return {
+        "$or": [
+            contained,
+            {**overlapping, "geometry": intersects},
+            {"bounds": None, "geometry": intersects},
+        ],
+    }
+
+
+def intersects_query(geometry: Geometry) -> dict[str, Any]:
+    """Builds the filter of features intersecting a geometry.
+
+    Args:
+        geometry (Geometry): The geometry to intersect.
+
+    Returns:
+        dict[str, Any]: The MongoDB filter.
+    """
+    return {"geometry": {"$geoIntersects": {"$geometry": geometry.dict(by_alias=True)}}}
+
+
+def is_property_key(key: str) -> bool:
+    """Returns whether a property name can safely be used in a field path.
+
+    Args:
+        key (str): The property name.
+
+    Returns:
+        bool: False for empty names, operators and nested paths.
+    """
+    return bool(key) and not key.startswith("$") and "." not in key
+
+
+class FilterOperator(str, Enum):
+    """Represents the comparisons property filters support."""
+
+    EQ = "eq"
+    IN = "in"
+    PREFIX = "prefix"
+
+
+@dataclass(frozen=True)
+class PropertyFilter:
+    """Represents a condition on a feature property.
+
+    Attributes:
+        key (str): The name of the property.
+        operator (FilterOperator): The comparison to apply.
+        operands (tuple[str, ...]): The values to compare with, a single one except
+            for `in`.
+    """
+
+    key: str
+    operator: FilterOperator
+    operands: tuple[str, ...]
+
+    @classmethod
+    def parse(cls: type["PropertyFilter"], text: str) -> "PropertyFilter":
+        """Parses a `key:operator:value` filter, `in` values comma separated.
+
+        Args:
+            text (str): The filter.
+
+        Raises:
+            ValueError: If the filter is malformed.
+
+        Returns:
+            PropertyFilter: The filter.
+        """
+        key, _, rest = text.partition(":")
+        operator, separator, value = rest.partition(":")
+        if not is_property_key(key) or not separator:
+            msg = f"Invalid filter: {text}"
+            raise ValueError(msg)
+        try:
+            parsed = FilterOperator(operator)
+        except ValueError:
+            msg = f"Invalid filter operator: {operator}"
+            raise ValueError(msg) from None
+        operands = tuple(value.split(",")) if parsed == FilterOperator.IN else (value,)
+        return cls(key, parsed, operands)
+
+    def query(self) -> dict[str, Any]:
+        """Returns the MongoDB filter of the condition.
+
+        Prefixes are matched with an anchored, escaped regular expression, which
+        MongoDB answers with an index range scan.
+
+        Returns:
+            dict[str, Any]: The MongoDB filter.
+        """
+        field = f"properties.{self.key}"
+        if self.operator == FilterOperator.IN:
+            return {field: {"$in": list(self.operands)}}
+        if self.operator == FilterOperator.PREFIX:
+            return {field: {"$regex": f"^{re.escape(self.operands[0])}"}}
+        return {field: self.operands[0]}
+
+
+def combine_queries(*queries: Mapping[str, Any]) -> dict[str, Any]:
+    """Combines MongoDB filters that must all match.
+
+    Args:
+        *queries (Mapping[str, Any]): The filters, empty ones are ignored.
+
+    Returns:
+        dict[str, Any]: The combined filter.
+    """
+    conditions = [dict(query) for query in queries if query]
+    if not conditions:
+        return {}
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def property_query(filters: Iterable[PropertyFilter]) -> dict[str, Any]:
+    """Builds the filter of features matching every property condition.
+
+    Args:
+        filters (Iterable[PropertyFilter]): The conditions.
+
+    Returns:
+        dict[str, Any]: The MongoDB filter, empty without conditions.
+    """
+    return combine_queries(*(condition.query() for condition in filters))
+
+
+FEATURE_FIELDS = {
+    "id": "_id",
+    "_id": "_id",
+    "type": "type",
+    "geometry": "geometry",
+    "properties": "properties",
+    "bounds": "bounds",
+    "revision": "revision",
+    "updated_at": "updated_at",
+}
+VALIDATOR_FIELDS = ("revision", "updated_at")
+
+
+def _field_path(name: str) -> str:
+    """Returns the stored path of a field name, `properties.<key>` included."""
+    prefix, separator, key = name.partition(".")
+    if separator and prefix == "properties" and is_property_key(key):
+        return name
+    if not separator and name in FEATURE_FIELDS:
+        return FEATURE_FIELDS[name]
+    msg = f"Invalid field: {name}"
+    raise ValueError(msg)
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    """Represents the fields of the features a read endpoint returns.
+
+    The id is always returned. The revision and update time are always read, as
+    the validators of the response are built from them, and are removed from the
+    documents when they were not requested.
+
+    Attributes:
+        paths (tuple[str, ...]): The requested or excluded field paths, sorted.
+        exclude (bool): Whether the paths are excluded rather than requested.
+    """
+
+    paths: tuple[str, ...]
+    exclude: bool = False
+
+    @classmethod
+    def parse(
+        cls: type["FieldSet"],
+        fields: str | None,
+        exclude: str | None,
+    ) -> "FieldSet | None":
+        """Parses comma separated field names to return, or to leave out.
+
+        Args:
+            fields (str | None): The fields to return, if any.
+            exclude (str | None): The fields to leave out, if any.
+
+        Raises:
+            ValueError: If a field is unknown, the id is excluded, fields overlap,
+                or both lists are given.
+
+        Returns:
+            FieldSet | None: The field set, None to return whole features.
+        """
+        if fields is not None and exclude is not None:
+            msg = "fields and exclude can not be combined"
+            raise ValueError(msg)
+        text = exclude if fields is None else fields
+        if text is None:
+            return None
+        paths = sorted({_field_path(name.strip()) for name in text.split(",")})
+        for path in paths:
+            if any(other.startswith(f"{path}.") for other in paths):
+                msg = f"Overlapping fields: {path}"
+                raise ValueError(msg)
+        if exclude is not None and "_id" in paths:
+            msg = "The id can not be excluded"
+            raise ValueError(msg)
+        return cls(tuple(paths), exclude=exclude is not None)
+
+    @property
+    def key(self) -> str:
+        """Returns a canonical form of the field set, for cache validators."""
+        return ("-" if self.exclude else "+") + ",".join(self.paths)
+
+    @property
+    def includes_geometry(self) -> bool:
+        """Returns whether the geometry is returned."""
+        return ("geometry" in self.paths) != self.exclude
+
+    def projection(self, *, validators: bool = True) -> dict[str, int] | None:
+        """Returns the MongoDB projection of the field set.
+
+        Args:
+            validators (bool): Whether to read the revision and update time too.
+
+        Returns:
+            dict[str, int] | None: The projection, None to read whole documents.
+        """
+        if self.exclude:
+            projection = {
+                path: 0
+                for path in self.paths
+                if not validators or path not in VALIDATOR_FIELDS
+            }
+            return projection or None
+        kept = [*self.paths, *(VALIDATOR_FIELDS if validators else ())]
+        return dict.fromkeys(kept, 1)
+
+    def strip(self, document: dict[str, Any]) -> dict[str, Any]:
+        """Removes the validator fields read but not requested from a document.
+
+        Args:
+            document (dict[str, Any]): The document read with the projection.
+
+        Returns:
+            dict[str, Any]: The document, changed in place.
+        """
+        for field in VALIDATOR_FIELDS:
+            if (field in self.paths) == self.exclude:
+                document.pop(field, None)
+        return document
+
+
+@dataclass
+class NearestParams:
+    """Represents a nearest neighbour search around a point.
+
+    Attributes:
+        lon (float): The longitude of the point.
+        lat (float): The latitude of the point.
+        k (int): The maximum number of features to return.
+        max_distance (float | None): Only returns features at most this many
+            meters away.
+        min_distance (float | None): Only returns features at least this many
+            meters away.
+    """
+
+    lon: Annotated[float, Query(ge=-180, le=180)]
+    lat: Annotated[float, Query(ge=-90, le=90)]
+    k: Annotated[int, Query(gt=0, le=max_page_size)] = 10
+    max_distance: Annotated[float | None, Query(ge=0)] = None
+    min_distance: Annotated[float | None, Query(ge=0)] = None
+
+
+def nearest_pipeline(
+    near: NearestParams,
+    query: Mapping[str, Any] | None = None,
+    projection: Mapping[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """Builds the aggregation of the features closest to a point.
+
+    The `$geoNear` stage walks the 2dsphere index of the geometry outwards from
+    the point, so the `k` nearest features are found in a single query.
+
+    Args:
+        near (NearestParams): The point, the number of features and the distance
+            range to search.
+        query (Mapping[str, Any] | None): A filter the features must match.
+        projection (Mapping[str, Any] | None): The fields of the features to
+            return, all if None. The distance is always returned.
+
+    Returns:
+        list[dict[str, Any]]: The pipeline, returning the features ordered by their
+            `distance` in meters.
+    """
+    stage: dict[str, Any] = {
+        "near": {"type": "Point", "coordinates": [near.lon, near.lat]},
+        "key": "geometry",
+        "distanceField": "distance",
+        "spherical": True,
+    }
+    if near.max_distance is not None:
+        stage["maxDistance"] = near.max_distance
+    if near.min_distance is not None:
+        stage["minDistance"] = near.min_distance
+    if query:
+        stage["query"] = dict(query)
+    pipeline: list[dict[str, Any]] = [{"$geoNear": stage}, {"$limit": near.k}]
+    if projection:
+        kept = dict(projection)
+        if any(kept.values()):
+            kept["distance"] = 1
+        pipeline.append({"$project": kept})
+    return pipeline
+
+
+@dataclass
+class GridParams:
+    """Represents a regular lon/lat grid to count features in.
+
+    Attributes:
+        resolution (float): The size of the cells, in degrees. Cells are aligned on
+            -180/-90, so the same cell has the same column and row in every query.
+        group_by (str | None): A property to count the features of each cell by.
+    """
+
+    resolution: Annotated[float, Query(gt=0, le=180)]
+    group_by: str | None = None
+
+
+def grid_pipeline(grid: GridParams, query: Mapping[str, Any]) -> list[dict[str, Any]]:
+    """Builds the aggregation counting features per grid cell.
+
+    Features are binned by the center of their precomputed bounding box, so
+    features stored before bounding boxes were precomputed are not counted.
+
+    Args:
+        grid (GridParams): The grid, and the property to group counts by.
+        query (Mapping[str, Any]): A filter the features must match.
+
+    Returns:
+        list[dict[str, Any]]: The pipeline, returning one `count` per `column`,
+            `row` and `group` value.
+    """
+
+    def _cell(low: str, high: str, origin: int) -> dict[str, Any]:
+        center = {"$divide": [{"$add": [low, high]}, 2]}
+        cells = math.ceil(2 * -origin / grid.resolution)
+        index = {
+            "$floor": {"$divide": [{"$subtract": [center, origin]}, grid.resolution]},
+        }
+        return {"$min": [index, cells - 1]}
+
+    cell: dict[str, Any] = {
+        "column": _cell("$bounds.min_x", "$bounds.max_x", -180),
+        "row": _cell("$bounds.min_y", "$bounds.max_y", -90),
+    }
+    if grid.group_by is not None:
+        cell["group"] = f"$properties.{grid.group_by}"
+    return [
+        {"$match": combine_queries(query, {"bounds": {"$ne": None}})},
+        {"$group": {"_id": cell, "count": {"$sum": 1}}},
+    ]
+
+
+def property_keys_pipeline(query: Mapping[str, Any]) -> list[dict[str, Any]]:
+    """Builds the aggregation listing the property keys of the matching features.
+
+    Args:
+        query (Mapping[str, Any]): A filter the features must match.
+
+    Returns:
+        list[dict[str, Any]]: The pipeline, returning each key as an `_id`,
+            sorted.
+    """
+    return [
+        {"$match": query},
+        {"$project": {"keys": {"$objectToArray": "$properties"}}},
+        {"$unwind": "$keys"},
+        {"$group": {"_id": "$keys.k"}},
+        {"$sort": {"_id": 1}},
+    ]
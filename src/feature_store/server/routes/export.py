@@ -0,0 +1,107 @@
+"""Implementation of the binary export endpoints."""
+from collections.abc import AsyncIterator, Mapping
+from typing import Annotated, Any
+
+from fastapi import Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRouter
+
+from feature_store.server import flatgeobuf, geoparquet
+from feature_store.server.database import DBFeature, read_collection
+from feature_store.server.flatgeobuf import FlatGeobufWriter
+from feature_store.server.geoparquet import GeoParquetWriter, geoparquet_available
+from feature_store.server.params import FilterParams
+from feature_store.server.queries import property_keys_pipeline
+
+router = APIRouter()
+
+
+def _attachment(filename: str) -> dict[str, str]:
+    """Returns the headers of a response downloaded as a file."""
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+@router.get(
+    "/flatgeobuf",
+    response_class=StreamingResponse,
+    responses={200: {"content": {flatgeobuf.MEDIA_TYPE: {}}}},
+    response_description="FlatGeobuf file of the features",
+)
+async def export_flatgeobuf(
+    filters: Annotated[FilterParams, Depends()],
+) -> StreamingResponse:
+    """Exports the features as a FlatGeobuf file with a packed R-tree index.
+
+    The index comes first in the file, so every feature is read and encoded
+    before the file is streamed.
+
+    Args:
+        filters (FilterParams): The property filters the features must match.
+
+    Returns:
+        StreamingResponse: The file.
+    """
+    writer = FlatGeobufWriter()
+    try:
+        async for document in read_collection(DBFeature).find(
+            filters.query(),
+            {"geometry": 1, "properties": 1},
+        ):
+            writer.add(document)
+    except BaseException:
+        writer.close()
+        raise
+    return StreamingResponse(
+        writer.chunks(),
+        media_type=flatgeobuf.MEDIA_TYPE,
+        headers=_attachment("features.fgb"),
+    )
+
+
+@router.get(
+    "/geoparquet",
+    response_class=StreamingResponse,
+    responses={200: {"content": {geoparquet.MEDIA_TYPE: {}}}},
+    response_description="GeoParquet file of the features",
+)
+async def export_geoparquet(
+    filters: Annotated[FilterParams, Depends()],
+) -> StreamingResponse:
+    """Exports the features as a GeoParquet file, streamed one row group at a time.
+
+    Args:
+        filters (FilterParams): The property filters the features must match.
+
+    Raises:
+        HTTPException: If pyarrow is not installed.
+
+    Returns:
+        StreamingResponse: The file.
+    """
+    if not geoparquet_available():
+        raise HTTPException(
+            status_code=501,
+            detail="GeoParquet export requires pyarrow",
+        )
+    query = filters.query()
+    collection = read_collection(DBFeature)
+    keys = [
+        document["_id"]
+        async for document in collection.aggregate(property_keys_pipeline(query))
+    ]
+    writer = GeoParquetWriter(keys)
+    cursor = collection.find(query, {"geometry": 1, "properties": 1, "bounds": 1})
+
+    async def _row_groups() -> AsyncIterator[bytes]:
+        document: Mapping[str, Any]
+        async for document in cursor:
+            data = writer.add(document)
+            if data:
+                yield data
+        yield writer.finish()
+
+    return StreamingResponse(
+        _row_groups(),
+        media_type=geoparquet.MEDIA_TYPE,
+        headers=_attachment("features.parquet"),
+    )
@@ -1,16 +1,169 @@
 """Implementation of the features endpoint."""
-
+import asyncio
+import json
+import math
+import os
+from collections.abc import AsyncIterator, Container, Iterable, Mapping, Sequence
+from datetime import datetime, timezone
+from typing import Annotated, Any
 
 from beanie import PydanticObjectId
-from fastapi import HTTPException
+from fastapi import Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRouter
+from pydantic import ValidationError, parse_obj_as
+from pymongo import ReturnDocument
+
+from feature_store.server.cache import CacheStats, query_cache
+from feature_store.server.database import (
+    DBFeature,
+    FeatureBounds,
+    UpdateDBFeature,
+    read_collection,
+)
+from feature_store.server.etags import (
+    collection_etag,
+    etag_matches,
+    feature_etag,
+    validator_headers,
+)
+from feature_store.server.geometry import Bounds, Geometry, geometry_bounds
+from feature_store.server.ingest import (
+    bulk_chunk_size,
+    insert_documents,
+    new_document,
+    parse_feature,
+)
+from feature_store.server.lod import (
+    delete_lods,
+    delete_many_lods,
+    fill_lod_geometries,
+    lod_projection,
+    lod_tolerances,
+    save_lods,
+    save_many_lods,
+)
+from feature_store.server.metrics import record_result_size
+from feature_store.server.models.geojson import FeatureCollection, GeoJsonPolygon
+from feature_store.server.models.requests import (
+    BulkSelection,
+    BulkUpdate,
+    SpatialJoin,
+)
+from feature_store.server.models.responses import (
+    BulkDeleteResult,
+    BulkInsertError,
+    BulkInsertResult,
+    BulkUpdateResult,
+    GridCell,
+    NearestFeature,
+    SpatialJoinResult,
+    UploadResult,
+)
+from feature_store.server.pagination import (
+    ID_ORDER,
+    NEXT_CURSOR_HEADER,
+    PageParams,
+    apply_cursor,
+    encode_cursor,
+    find_page,
+    find_page_end,
+    find_raw_page,
+    max_page_size,
+)
+from feature_store.server.params import FieldParams, FilterParams, OutputParams
+from feature_store.server.queries import (
+    FieldSet,
+    GridParams,
+    NearestParams,
+    bbox_query,
+    combine_queries,
+    grid_pipeline,
+    intersects_query,
+    is_property_key,
+    nearest_pipeline,
+)
+from feature_store.server.serialization import RawJSONResponse
+from feature_store.server.streaming import MEDIA_TYPES, iter_features
+from feature_store.server.subscriptions import EventType, FeatureEvent, feature_events
+from feature_store.server.tiles import tile_cache
+from feature_store.server.upload import FeatureStreamParser, ParsedFeature, UploadError
+from feature_store.server.validation import normalize_geometries, normalize_geometry
 
-from feature_store.server.database import DBFeature, UpdateDBFeature
-from feature_store.server.models.geojson import GeoJsonPolygon
+max_grid_cells = int(os.getenv("FEATURE_STORE_MAX_GRID_CELLS", "100000"))
+max_upload_errors = int(os.getenv("FEATURE_STORE_UPLOAD_MAX_ERRORS", "1000"))
+join_concurrency = int(os.getenv("FEATURE_STORE_JOIN_CONCURRENCY", "8"))
 
 router = APIRouter()
 
 
+def _feature_bounds(feature: DBFeature) -> Bounds:
+    """Returns the bounding box of a stored feature.
+
+    Args:
+        feature (DBFeature): The stored feature.
+
+    Returns:
+        Bounds: The precomputed bounding box, or the one of its geometry for
+            features stored before bounding boxes were precomputed.
+    """
+    if feature.bounds is None:
+        return geometry_bounds(feature.geometry)
+    return Bounds(**feature.bounds.dict())
+
+
+def _document_bounds(document: Mapping[str, Any]) -> Bounds:
+    """Returns the bounding box of a raw feature document.
+
+    Args:
+        document (Mapping[str, Any]): The raw document, with at least its
+            bounding box or its geometry.
+
+    Returns:
+        Bounds: The precomputed bounding box, or the one of its geometry for
+            features stored before bounding boxes were precomputed.
+    """
+    if document.get("bounds") is not None:
+        return Bounds(**document["bounds"])
+    return geometry_bounds(parse_obj_as(Geometry, document["geometry"]))
+
+
+def _invalidate_caches(feature_id: PydanticObjectId, bounds: Bounds | None) -> None:
+    """Drops the cached query answers and tiles a write to a feature may change.
+
+    Both caches track the features they hold by id, so the bounding box before
+    the write is not needed.
+
+    Args:
+        feature_id (PydanticObjectId): The id of the written feature.
+        bounds (Bounds | None): The bounding box after the write, None if the
+            feature was deleted.
+    """
+    query_cache.invalidate(feature_id, bounds)
+    tile_cache.invalidate(feature_id, bounds)
+
+
+def _normalized(geometry: Geometry) -> Geometry:
+    """Returns the normalized geometry of a single feature write.
+
+    Args:
+        geometry (Geometry): The geometry to write.
+
+    Raises:
+        HTTPException: If the geometry is invalid.
+
+    Returns:
+        Geometry: The normalized geometry.
+    """
+    try:
+        return normalize_geometry(geometry)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid geometry: {error}",
+        ) from error
+
+
 @router.post("/")
 async def post_features(feature: DBFeature) -> DBFeature:
     """Returns a welcome message.
@@ -18,50 +171,681 @@ async def post_features(feature: DBFeature) -> DBFeature:
     Returns:
         dict: A welcome message.
     """
-    return await feature.create()
+    feature.geometry = _normalized(feature.geometry)
+    bounds = geometry_bounds(feature.geometry)
+    feature.bounds = FeatureBounds.from_bounds(bounds)
+    feature.revision = 1
+    feature.updated_at = datetime.now(timezone.utc)
+    created: DBFeature = await feature.create()
+    feature_id: PydanticObjectId = created.id  # type: ignore  # noqa: PGH003
+    await save_lods(feature_id, created.geometry, replace=False)
+    _invalidate_caches(feature_id, bounds)
+    if feature_events:
+        feature_events.publish(
+            FeatureEvent(
+                event=EventType.CREATED,
+                feature_id=feature_id,
+                feature=created,
+            ),
+            bounds,
+        )
+    return created
+
+
+def _publish_inserted(
+    documents: Sequence[DBFeature],
+    failed: Container[int],
+) -> list[PydanticObjectId]:
+    """Invalidates the caches and notifies the subscribers of inserted features.
+
+    Args:
+        documents (Sequence[DBFeature]): The documents sent to the database.
+        failed (Container[int]): The indexes of the rejected documents.
+
+    Returns:
+        list[PydanticObjectId]: The ids of the inserted features.
+    """
+    inserted_ids = []
+    for index, document in enumerate(documents):
+        if index in failed:
+            continue
+        feature_id: PydanticObjectId = document.id  # type: ignore  # noqa: PGH003
+        bounds = _feature_bounds(document)
+        inserted_ids.append(feature_id)
+        _invalidate_caches(feature_id, bounds)
+        if feature_events:
+            feature_events.publish(
+                FeatureEvent(
+                    event=EventType.CREATED,
+                    feature_id=feature_id,
+                    feature=document,
+                ),
+                bounds,
+            )
+    return inserted_ids
+
+
+@router.post("/bulk", response_description="Features inserted")
+async def post_feature_collection(
+    collection: FeatureCollection,
+    chunk_size: Annotated[int, Query(gt=0, le=100_000)] = bulk_chunk_size,
+) -> BulkInsertResult:
+    """Inserts every feature of a FeatureCollection using unordered bulk inserts.
+
+    Features are inserted in chunks of `chunk_size`. A feature rejected by the
+    database does not abort the rest of the batch, it is reported by its index in
+    the collection instead.
+
+    Args:
+        collection (FeatureCollection): The features to insert.
+        chunk_size (int): The number of features sent to the database at once.
+
+    Returns:
+        BulkInsertResult: The ids of the inserted features and any failures.
+    """
+    updated_at = datetime.now(timezone.utc)
+    documents = [new_document(feature, updated_at) for feature in collection.features]
+
+    inserted_ids: list[PydanticObjectId] = []
+    errors: list[BulkInsertError] = []
+    for offset in range(0, len(documents), chunk_size):
+        chunk = documents[offset : offset + chunk_size]
+        failed = await insert_documents(chunk)
+        errors.extend(
+            BulkInsertError(index=offset + index, message=message)
+            for index, message in sorted(failed.items())
+        )
+        inserted_ids.extend(_publish_inserted(chunk, failed))
+
+    return BulkInsertResult(
+        inserted_count=len(inserted_ids),
+        inserted_ids=inserted_ids,
+        errors=errors,
+    )
+
+
+def _record_upload_error(
+    result: UploadResult,
+    parsed: ParsedFeature,
+    message: str,
+) -> None:
+    """Counts a feature that failed to upload, listing the first ones."""
+    result.failed_count += 1
+    if len(result.errors) < max_upload_errors:
+        result.errors.append(
+            BulkInsertError(index=parsed.index, message=message, offset=parsed.offset),
+        )
+
 
+async def _insert_uploaded(
+    chunk: list[tuple[ParsedFeature, DBFeature]],
+    result: UploadResult,
+) -> None:
+    """Inserts a chunk of uploaded features and records the outcome."""
+    documents = [document for _, document in chunk]
+    failed = await insert_documents(documents)
+    for index, message in sorted(failed.items()):
+        _record_upload_error(result, chunk[index][0], message)
+    result.inserted_count += len(_publish_inserted(documents, failed))
+    chunk.clear()
 
-@router.get("/")
-async def get_features() -> list[DBFeature]:
-    """Returns all features in the database.
+
+@router.post("/upload", response_description="Features uploaded")
+async def upload_feature_collection(
+    request: Request,
+    chunk_size: Annotated[int, Query(gt=0, le=100_000)] = bulk_chunk_size,
+) -> UploadResult:
+    """Inserts the features of a FeatureCollection while its body is received.
+
+    The body is parsed incrementally, and each feature is validated on its own
+    and inserted in chunks of `chunk_size`, so memory use does not grow with the
+    size of the upload. Invalid and rejected features are reported with their
+    index and byte offset, and do not abort the upload.
+
+    Args:
+        request (Request): The request, whose body is a GeoJSON
+            FeatureCollection.
+        chunk_size (int): The number of features sent to the database at once.
 
     Raises:
-        HTTPException: If no features are found.
+        HTTPException: If the body is not a valid FeatureCollection. The features
+            before the error are kept, and counted in the detail.
 
     Returns:
-        list[DBFeature]: A list of features.
+        UploadResult: The number of inserted and failed features, and the first
+            errors.
     """
-    result = await DBFeature.find_all().to_list()
-    if not isinstance(result, list) or len(result) == 0:
+    result = UploadResult()
+    parser = FeatureStreamParser()
+    updated_at = datetime.now(timezone.utc)
+    chunk: list[tuple[ParsedFeature, DBFeature]] = []
+
+    async def _insert(features: Iterable[ParsedFeature]) -> None:
+        for parsed in features:
+            try:
+                feature = parse_feature(parsed.value)
+            except ValidationError as error:
+                _record_upload_error(result, parsed, str(error))
+                continue
+            chunk.append((parsed, new_document(feature, updated_at)))
+            if len(chunk) >= chunk_size:
+                await _insert_uploaded(chunk, result)
+
+    try:
+        async for data in request.stream():
+            await _insert(parser.feed(data))
+        await _insert(parser.close())
+    except UploadError as error:
+        await _insert_uploaded(chunk, result)
         raise HTTPException(
-            status_code=404,
-            detail="No features found!",
+            status_code=400,
+            detail={
+                "message": error.message,
+                "offset": error.offset,
+                "inserted_count": result.inserted_count,
+            },
+        ) from error
+    await _insert_uploaded(chunk, result)
+    return result
+
+
+def _update_fields(update: UpdateDBFeature) -> dict[str, Any]:
+    """Returns the fields to `$set` for an update, with the new bounding box.
+
+    The update time is set too, the caller increments the revision. The
+    geometry of the update is replaced by its normalized form.
+
+    Args:
+        update (UpdateDBFeature): The update to apply.
+
+    Returns:
+        dict[str, Any]: The stored fields and their new values.
+    """
+    if update.geometry is not None:
+        update.geometry = _normalized(update.geometry)
+    updates: dict[str, Any] = update.dict(exclude_unset=True, by_alias=True)
+    updates["updated_at"] = datetime.now(timezone.utc)
+    if update.geometry is not None:
+        updates["bounds"] = FeatureBounds.from_bounds(
+            geometry_bounds(update.geometry),
+        ).dict()
+    return updates
+
+
+async def _selected_id_chunks(
+    selection: BulkSelection,
+) -> AsyncIterator[list[PydanticObjectId]]:
+    """Yields the ids of the features a bulk write applies to, in bounded chunks.
+
+    Selections by properties are read in `_id` order from after the last chunk,
+    so features changed by the write are not selected twice and only one chunk
+    of ids is held in memory at a time.
+
+    Args:
+        selection (BulkSelection): The selected features.
+
+    Yields:
+        list[PydanticObjectId]: The ids of up to `bulk_chunk_size` features.
+    """
+    if selection.ids is not None:
+        for start in range(0, len(selection.ids), bulk_chunk_size):
+            yield selection.ids[start : start + bulk_chunk_size]
+        return
+
+    query = selection.query()
+    chunk_query = query
+    collection = DBFeature.get_motor_collection()
+    while True:
+        cursor = collection.find(
+            chunk_query,
+            {"_id": 1},
+            sort=ID_ORDER,
+            limit=bulk_chunk_size,
         )
+        feature_ids = [document["_id"] async for document in cursor]
+        if not feature_ids:
+            return
+        yield feature_ids
+        chunk_query = {"$and": [query, {"_id": {"$gt": feature_ids[-1]}}]}
 
-    return result
 
+async def _stored_bounds(
+    feature_ids: list[PydanticObjectId],
+) -> dict[PydanticObjectId, Bounds]:
+    """Returns the bounding boxes of stored features, to notify their subscribers.
+
+    Args:
+        feature_ids (list[PydanticObjectId]): The ids of the features.
+
+    Returns:
+        dict[PydanticObjectId, Bounds]: The bounding boxes of the features found.
+    """
+    cursor = DBFeature.get_motor_collection().find(
+        {"_id": {"$in": feature_ids}},
+        {"bounds": 1, "geometry": 1},
+    )
+    return {document["_id"]: _document_bounds(document) async for document in cursor}
+
+
+@router.patch("/bulk", response_description="Features updated")
+async def patch_features(selection: BulkUpdate) -> BulkUpdateResult:
+    """Applies the same update to many features.
+
+    A selection by properties is written with a single update of the matching
+    features, unless subscribers or levels of detail need their ids, which are
+    then read and written in chunks of `FEATURE_STORE_BULK_CHUNK_SIZE`.
+
+    Args:
+        selection (BulkUpdate): The features to update and the update to apply.
+
+    Returns:
+        BulkUpdateResult: The number of features found and changed.
+    """
+    updates = {"$set": _update_fields(selection.update), "$inc": {"revision": 1}}
+    geometry = selection.update.geometry
+    collection = DBFeature.get_motor_collection()
+    if selection.ids is None and geometry is None and not feature_events:
+        # Nothing needs the ids, and the features may now match filtered
+        # queries and tiles anywhere.
+        result = await collection.update_many(selection.query(), updates)
+        query_cache.clear()
+        tile_cache.clear()
+        return BulkUpdateResult(
+            matched_count=result.matched_count,
+            modified_count=result.modified_count,
+        )
+
+    matched_count = modified_count = 0
+    bounds = None if geometry is None else geometry_bounds(geometry)
+    if geometry is None:
+        query_cache.clear()
+    async for feature_ids in _selected_id_chunks(selection):
+        previous = await _stored_bounds(feature_ids) if feature_events else {}
+        result = await collection.update_many({"_id": {"$in": feature_ids}}, updates)
+        matched_count += result.matched_count
+        modified_count += result.modified_count
+        if geometry is None:
+            for feature_id in feature_ids:
+                tile_cache.invalidate(feature_id, None)
+        else:
+            await save_many_lods(feature_ids, geometry)
+            for feature_id in feature_ids:
+                _invalidate_caches(feature_id, bounds)
+        for feature_id, feature_bounds in previous.items():
+            feature_events.publish(
+                FeatureEvent(event=EventType.UPDATED, feature_id=feature_id),
+                feature_bounds,
+                bounds,
+            )
+
+    return BulkUpdateResult(matched_count=matched_count, modified_count=modified_count)
+
+
+@router.delete("/bulk", response_description="Features deleted")
+async def delete_features(selection: BulkSelection) -> BulkDeleteResult:
+    """Deletes many features, in chunks of `FEATURE_STORE_BULK_CHUNK_SIZE`.
+
+    Args:
+        selection (BulkSelection): The features to delete.
+
+    Returns:
+        BulkDeleteResult: The number of features deleted.
+    """
+    deleted_count = 0
+    async for feature_ids in _selected_id_chunks(selection):
+        previous = await _stored_bounds(feature_ids) if feature_events else {}
+        result = await DBFeature.get_motor_collection().delete_many(
+            {"_id": {"$in": feature_ids}},
+        )
+        deleted_count += result.deleted_count
+        await delete_many_lods(feature_ids)
+        for feature_id in feature_ids:
+            _invalidate_caches(feature_id, None)
+        for feature_id, feature_bounds in previous.items():
+            feature_events.publish(
+                FeatureEvent(event=EventType.DELETED, feature_id=feature_id),
+                feature_bounds,
+            )
+
+    return BulkDeleteResult(deleted_count=deleted_count)
+
+
+def _parse_bbox(bbox: str) -> Bounds:
+    """Parses a `minx,miny,maxx,maxy` bounding box query parameter.
+
+    Args:
+        bbox (str): The query parameter.
+
+    Raises:
+        HTTPException: If the bounding box is malformed.
+
+    Returns:
+        Bounds: The bounding box.
+    """
+    try:
+        values = [float(value) for value in bbox.split(",")]
+    except ValueError:
+        values = []
+    if len(values) != len(Bounds._fields):
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {bbox}")
+
+    bounds = Bounds(*values)
+    if not (
+        -180 <= bounds.min_x < bounds.max_x <= 180  # noqa: PLR2004
+        and -90 <= bounds.min_y < bounds.max_y <= 90  # noqa: PLR2004
+    ):
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {bbox}")
+    return bounds
+
+
+async def _list_raw_features(
+    query: dict[str, Any],
+    output: OutputParams,
+    page: PageParams,
+) -> Response:
+    """Returns a page of the raw documents matching a query.
+
+    Only the requested fields are read when the output has a field set.
 
-@router.get("/{feature_id}", response_description="Review record retrieved")
-async def get_feature_by_id(feature_id: PydanticObjectId) -> DBFeature:
+    Args:
+        query (dict[str, Any]): The MongoDB filter to apply.
+        output (OutputParams): How to return the features.
+        page (PageParams): The page to return.
+
+    Returns:
+        Response: The documents, with the next page cursor and validator
+            headers, or `304 Not Modified`.
+    """
+    fields = output.field_set()
+    lod = output.lod if fields is None or fields.includes_geometry else None
+    documents, next_cursor = await find_raw_page(
+        query,
+        page,
+        lod_projection(None if fields is None else fields.projection(), lod),
+    )
+    record_result_size(len(documents))
+    headers = validator_headers(
+        collection_etag(
+            ((document["_id"], document.get("revision", 0)) for document in documents),
+            next_cursor,
+            output.lod,
+            "" if fields is None else fields.key,
+        ),
+        max(
+            (
+                document["updated_at"]
+                for document in documents
+                if document.get("updated_at") is not None
+            ),
+            default=None,
+        ),
+    )
+    if etag_matches(output.if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    documents = await fill_lod_geometries(documents, lod)
+    if fields is not None:
+        documents = [fields.strip(document) for document in documents]
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    raw_response: Response = RawJSONResponse(documents, headers=headers)
+    return raw_response
+
+
+async def _list_features(
+    query: dict[str, Any],
+    response: Response,
+    output: OutputParams,
+    page: PageParams,
+    region: Bounds | None = None,
+) -> list[DBFeature] | Response:
+    """Returns a page of the features matching a query, streamed or as a list.
+
+    Pages of queries limited to a region are served from the query cache when
+    it is enabled, unless raw documents or some fields only are requested, which
+    are returned as read. Pages that are not streamed carry an ETag, and a page
+    the client already has is answered with `304 Not Modified`. The cursor of the
+    next page of a stream is found before it starts, so it is returned in a
+    header as for lists.
+
+    Args:
+        query (dict[str, Any]): The MongoDB filter to apply.
+        response (Response): The response to add the next page cursor to.
+        output (OutputParams): How to return the features.
+        page (PageParams): The page to return.
+        region (Bounds | None): The bounding box the query is limited to, if any.
+
+    Returns:
+        list[DBFeature] | Response: The features.
+    """
+    fields = output.field_set()
+    if output.stream is not None:
+        lod = output.lod if fields is None or fields.includes_geometry else None
+        projection = None if fields is None else fields.projection(validators=False)
+        stream_query = apply_cursor(query, page.after)
+        headers = {}
+        last_id = (
+            None
+            if page.limit is None
+            else await find_page_end(stream_query, page.limit)
+        )
+        if last_id is not None:
+            # The page ends at the cursor, even if features are inserted before.
+            stream_query = {"$and": [stream_query, {"_id": {"$lte": last_id}}]}
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last_id)
+        return StreamingResponse(
+            iter_features(
+                stream_query,
+                output.stream,
+                sort=ID_ORDER if page.paged else None,
+                limit=page.limit,
+                lod=lod,
+                projection=projection,
+            ),
+            headers=headers,
+            media_type=MEDIA_TYPES[output.stream],
+        )
+    if output.raw or fields is not None:
+        raw_response: Response = await _list_raw_features(query, output, page)
+        return raw_response
+
+    cache_key = (
+        json.dumps(query, sort_keys=True),
+        page.limit,
+        page.after,
+        output.lod or 0,
+    )
+    cached = query_cache.get(cache_key) if region is not None else None
+    features: list[DBFeature]
+    if cached is not None:
+        features, next_cursor = cached
+    else:
+        features, next_cursor = await find_page(query, page, output.lod)
+        if region is not None:
+            query_cache.put(
+                cache_key,
+                region,
+                features,
+                next_cursor,
+                lod=output.lod or 0,
+            )
+
+    record_result_size(len(features))
+    headers = validator_headers(
+        collection_etag(
+            ((feature.id, feature.revision) for feature in features),
+            next_cursor,
+            output.lod,
+        ),
+        max(
+            (feature.updated_at for feature in features if feature.updated_at),
+            default=None,
+        ),
+    )
+    if etag_matches(output.if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return features
+
+
+@router.get("/", response_model=list[DBFeature])
+async def get_features(
+    response: Response,
+    page: Annotated[PageParams, Depends()],
+    output: Annotated[OutputParams, Depends()],
+    filters: Annotated[FilterParams, Depends()],
+    bbox: str | None = None,
+) -> list[DBFeature] | Response:
+    """Returns the features in the database, a page at a time when `limit` is set.
+
+    The cursor of the next page is returned in the `X-Next-Cursor` header while
+    more features remain.
+
+    Args:
+        response (Response): The response to add the next page cursor to.
+        page (PageParams): The page to return.
+        output (OutputParams): How to return the features.
+        filters (FilterParams): Only returns the features whose properties match.
+        bbox (str | None): Only returns the features intersecting the
+            `minx,miny,maxx,maxy` lon/lat rectangle.
+
+    Returns:
+        list[DBFeature] | Response: A list of features.
+    """
+    if bbox is None:
+        return await _list_features(filters.query(), response, output, page)
+
+    bounds = _parse_bbox(bbox)
+    return await _list_features(
+        combine_queries(filters.query(), bbox_query(bounds)),
+        response,
+        output,
+        page,
+        region=bounds,
+    )
+
+
+async def _get_feature_fields(
+    feature_id: PydanticObjectId,
+    fields: FieldSet,
+    lod: int | None,
+    if_none_match: str | None,
+) -> Response:
+    """Returns some fields of a feature by id, as read.
+
+    Args:
+        feature_id (PydanticObjectId): The id of the feature to return.
+        fields (FieldSet): The fields to return.
+        lod (int | None): The level of detail of the geometry, 0 for the full
+            geometry.
+        if_none_match (str | None): The ETags of the versions the client has.
+
+    Raises:
+        HTTPException: If the feature is not found.
+
+    Returns:
+        Response: The fields of the feature, or `304 Not Modified`.
+    """
+    if not fields.includes_geometry:
+        lod = None
+    document = await read_collection(DBFeature).find_one(
+        {"_id": feature_id},
+        lod_projection(fields.projection(), lod),
+    )
+    if document is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Feture id: {feature_id} not found!",
+        )
+    etag = feature_etag(feature_id, document.get("revision", 0), lod, fields.key)
+    headers = validator_headers(etag, document.get("updated_at"))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    documents = await fill_lod_geometries([document], lod)
+    if not documents:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Feture id: {feature_id} not found!",
+        )
+    raw_response: Response = RawJSONResponse(
+        fields.strip(documents[0]),
+        headers=headers,
+    )
+    return raw_response
+
+
+@router.get(
+    "/{feature_id}",
+    response_model=DBFeature,
+    response_description="Review record retrieved",
+)
+async def get_feature_by_id(
+    feature_id: PydanticObjectId,
+    response: Response,
+    fields: Annotated[FieldParams, Depends()],
+    lod: Annotated[int | None, Query(ge=0, le=len(lod_tolerances))] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> DBFeature | Response:
     """Returns a feature by id.
 
+    When the client sends ETags, the revision of the feature is checked first,
+    and the geometry is only read when the client's version is stale.
+
     Args:
         feature_id (PydanticObjectId): The id of the feature to return.
+        response (Response): The response to add the ETag and Last-Modified to.
+        fields (FieldParams): The fields to return, all by default.
+        lod (int | None): The level of detail of the geometry, 0 for the full
+            geometry.
+        if_none_match (str | None): The ETags of the versions the client has.
 
     Raises:
         HTTPException: If the feature is not found.
 
     Returns:
-        DBFeature: The feature.
+        DBFeature | Response: The feature, or `304 Not Modified`.
     """
-    result = await DBFeature.get(feature_id)
+    field_set = fields.field_set()
+    if field_set is not None:
+        return await _get_feature_fields(feature_id, field_set, lod, if_none_match)
+    collection = read_collection(DBFeature)
+    projection = (
+        lod_projection(None, lod)
+        if if_none_match is None
+        else {"revision": 1, "updated_at": 1}
+    )
+    document = await collection.find_one({"_id": feature_id}, projection)
 
-    if not result:
+    if document is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Feture id: {feature_id} not found!",
+        )
+    etag = feature_etag(feature_id, document.get("revision", 0), lod)
+    headers = validator_headers(etag, document.get("updated_at"))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if if_none_match is not None:
+        document = await collection.find_one(
+            {"_id": feature_id},
+            lod_projection(None, lod),
+        )
+    documents = [] if document is None else await fill_lod_geometries([document], lod)
+    if not documents:
         raise HTTPException(
             status_code=404,
             detail=f"Feture id: {feature_id} not found!",
         )
-    return result
+
+    feature = DBFeature.parse_obj(documents[0])
+    response.headers.update(
+        validator_headers(
+            feature_etag(feature_id, feature.revision, lod),
+            feature.updated_at,
+        ),
+    )
+    return feature
 
 
 @router.put("/{feature_id}", response_description="Feature updated")
@@ -81,22 +865,38 @@ async def update_feature(
     Returns:
         DBFeature: The feature.
     """
-    updates = update.dict(exclude_unset=True, by_alias=True)
-    update_query = {"$set": updates}
-
-    record = await DBFeature.get(feature_id)
-    if not record:
+    updates = _update_fields(update)
+    collection = DBFeature.get_motor_collection()
+    # Subscribers of the area the feature leaves are notified too.
+    previous = (
+        await collection.find_one({"_id": feature_id}, {"bounds": 1, "geometry": 1})
+        if feature_events
+        else None
+    )
+    document = await collection.find_one_and_update(
+        {"_id": feature_id},
+        {"$set": updates, "$inc": {"revision": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if document is None:
         raise HTTPException(
             status_code=404,
             detail="Feature not found!",
         )
-
-    await record.update(update_query)
-    updated_record = await DBFeature.get(feature_id)
-    if updated_record is None:
-        raise HTTPException(
-            status_code=500,
-            detail="Something went wrong when updating the feature!",
+    updated_record = DBFeature.parse_obj(document)
+    if update.geometry is not None:
+        await save_lods(feature_id, update.geometry)
+    bounds = _feature_bounds(updated_record)
+    _invalidate_caches(feature_id, bounds)
+    if feature_events:
+        feature_events.publish(
+            FeatureEvent(
+                event=EventType.UPDATED,
+                feature_id=feature_id,
+                feature=updated_record,
+            ),
+            bounds if previous is None else _document_bounds(previous),
+            bounds,
         )
 
     return updated_record
@@ -115,49 +915,305 @@ async def delete_feature_by_id(feature_id: PydanticObjectId) -> dict[str, str]:
 
     Raises:
         HTTPException: If the feature is not found.
-        HTTPException: If the feature is not deleted.
 
     Returns:
         dict[str, str]: A message indicating the feature was deleted.
     """
-    result = await DBFeature.find_one({"_id": feature_id})
+    document = await DBFeature.get_motor_collection().find_one_and_delete(
+        {"_id": feature_id},
+        {"bounds": 1, "geometry": 1},
+    )
 
-    if not result:
+    if document is None:
         raise HTTPException(
             status_code=404,
             detail=f"Feature id: {feature_id} not found!",
         )
 
-    result = await result.delete()  # type: ignore  # noqa: PGH003
-    if result.deleted_count != 1:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Something went wrong when deleting feature id: {feature_id}!",
+    await delete_lods(feature_id)
+    _invalidate_caches(feature_id, None)
+    if feature_events:
+        feature_events.publish(
+            FeatureEvent(event=EventType.DELETED, feature_id=feature_id),
+            _document_bounds(document),
         )
 
     return {"message": f"Feature id: {feature_id} deleted!"}
 
 
-@router.post("/geospatial/intersects")
-async def get_features_by_intersects(geometry: GeoJsonPolygon) -> list[DBFeature]:
-    """Returns all features that intersect with the given bounding box.
+@router.post("/geospatial/intersects", response_model=list[DBFeature])
+async def get_features_by_intersects(
+    geometry: GeoJsonPolygon,
+    response: Response,
+    page: Annotated[PageParams, Depends()],
+    output: Annotated[OutputParams, Depends()],
+    filters: Annotated[FilterParams, Depends()],
+) -> list[DBFeature] | Response:
+    """Returns the features that intersect with the given bounding box.
 
     Args:
         geometry (GeoJsonPolygon): The bounding box to use for the intersection.
+        response (Response): The response to add the next page cursor to.
+        page (PageParams): The page to return.
+        output (OutputParams): How to return the features.
+        filters (FilterParams): Only returns the features whose properties match.
+
+    Returns:
+        list[DBFeature] | Response: A list of features.
+    """
+    query = combine_queries(filters.query(), intersects_query(geometry))
+    return await _list_features(
+        query,
+        response,
+        output,
+        page,
+        region=geometry_bounds(geometry),
+    )
+
+
+async def _find_bounded(
+    semaphore: asyncio.Semaphore,
+    query: Mapping[str, Any],
+    projection: Mapping[str, Any] | None = None,
+    limit: int = 0,
+) -> list[dict[str, Any]]:
+    """Returns the raw documents matching a query, once the semaphore allows it.
+
+    Args:
+        semaphore (asyncio.Semaphore): Bounds the number of concurrent queries.
+        query (Mapping[str, Any]): The MongoDB filter to apply.
+        projection (Mapping[str, Any] | None): The fields to return, all if None.
+        limit (int): The largest number of documents to return, 0 for all.
+
+    Returns:
+        list[dict[str, Any]]: The documents.
+    """
+    async with semaphore:
+        cursor = read_collection(DBFeature).find(query, projection, limit=limit)
+        return [document async for document in cursor]
+
+
+@router.post("/geospatial/intersects/batch", response_model=SpatialJoinResult)
+async def join_features_by_intersects(
+    join: SpatialJoin,
+    filters: Annotated[FilterParams, Depends()],
+) -> SpatialJoinResult:
+    """Returns the features that intersect each of many regions.
+
+    The regions are queried concurrently, with at most
+    `FEATURE_STORE_JOIN_CONCURRENCY` queries at a time, for the ids of their
+    features only. Features matching several regions are then fetched once.
+
+    Args:
+        join (SpatialJoin): The named regions, and whether to return the features.
+        filters (FilterParams): Only returns the features whose properties match.
 
     Raises:
-        HTTPException: If no features are found.
+        HTTPException: If the geometry of a region is invalid.
 
     Returns:
-        list[DBFeature]: A list of features.
+        SpatialJoinResult: The ids of the features of each region, and the
+            features if requested.
     """
-    result = await DBFeature.find(
-        {"geometry": {"$geoIntersects": {"$geometry": geometry.dict(by_alias=True)}}},
-    ).to_list()
-    if not isinstance(result, list) or len(result) == 0:
+    geometries, errors = normalize_geometries(
+        [region.geometry for region in join.regions],
+    )
+    if errors:
         raise HTTPException(
-            status_code=404,
-            detail="No features found!",
+            status_code=400,
+            detail={join.regions[index].name: error for index, error in errors.items()},
         )
 
+    semaphore = asyncio.Semaphore(join_concurrency)
+    base_query = filters.query()
+    results = await asyncio.gather(
+        *(
+            _find_bounded(
+                semaphore,
+                combine_queries(base_query, intersects_query(geometries[index])),
+                {"_id": 1},
+                max_page_size + 1,
+            )
+            for index in range(len(join.regions))
+        ),
+    )
+    result = SpatialJoinResult(matches={})
+    for region, documents in zip(join.regions, results, strict=True):
+        if len(documents) > max_page_size:
+            result.truncated.append(region.name)
+        result.matches[region.name] = [
+            document["_id"] for document in documents[:max_page_size]
+        ]
+    record_result_size(sum(len(ids) for ids in result.matches.values()))
+
+    if join.include_features:
+        feature_ids = list({id_ for ids in result.matches.values() for id_ in ids})
+        chunks = await asyncio.gather(
+            *(
+                _find_bounded(
+                    semaphore,
+                    {"_id": {"$in": feature_ids[start : start + bulk_chunk_size]}},
+                )
+                for start in range(0, len(feature_ids), bulk_chunk_size)
+            ),
+        )
+        result.features = [
+            DBFeature.parse_obj(document) for chunk in chunks for document in chunk
+        ]
     return result
+
+
+@router.get(
+    "/geospatial/nearest",
+    response_model=list[NearestFeature],
+    response_description="Nearest features",
+)
+async def get_nearest_features(
+    near: Annotated[NearestParams, Depends()],
+    filters: Annotated[FilterParams, Depends()],
+    fields: Annotated[FieldParams, Depends()],
+) -> list[NearestFeature] | Response:
+    """Returns the features closest to a point, nearest first.
+
+    Distances are measured in meters on the sphere, from the point to the closest
+    point of each geometry.
+
+    Args:
+        near (NearestParams): The point, the number of features and the distance
+            range to search.
+        filters (FilterParams): Only returns the features whose properties match.
+        fields (FieldParams): The fields of the features to return, all by
+            default.
+
+    Raises:
+        HTTPException: If the distance range is empty.
+
+    Returns:
+        list[NearestFeature] | Response: The features with their distance.
+    """
+    if (
+        near.min_distance is not None
+        and near.max_distance is not None
+        and near.min_distance > near.max_distance
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="min_distance must not exceed max_distance!",
+        )
+
+    field_set = fields.field_set()
+    projection = None if field_set is None else field_set.projection(validators=False)
+    pipeline = nearest_pipeline(near, filters.query(), projection)
+    cursor = read_collection(DBFeature).aggregate(pipeline)
+    if field_set is not None:
+        raw_response: Response = RawJSONResponse(
+            [
+                {"distance": document.pop("distance"), "feature": document}
+                async for document in cursor
+            ],
+        )
+        return raw_response
+    return [
+        NearestFeature(
+            distance=document.pop("distance"),
+            feature=DBFeature.parse_obj(document),
+        )
+        async for document in cursor
+    ]
+
+
+def _grid_cells(
+    grid: GridParams,
+    counts: list[dict[str, Any]],
+) -> list[GridCell]:
+    """Assembles the counts of a grid aggregation into cells.
+
+    Args:
+        grid (GridParams): The grid the counts were made on.
+        counts (list[dict[str, Any]]): The counts per column, row and group.
+
+    Returns:
+        list[GridCell]: The non-empty cells, row by row.
+    """
+    cells: dict[tuple[int, int], GridCell] = {}
+    for count in counts:
+        column, row = int(count["_id"]["column"]), int(count["_id"]["row"])
+        cell = cells.get((column, row))
+        if cell is None:
+            min_x = -180 + column * grid.resolution
+            min_y = -90 + row * grid.resolution
+            cell = GridCell(
+                column=column,
+                row=row,
+                bounds=FeatureBounds(
+                    min_x=min_x,
+                    min_y=min_y,
+                    max_x=min(180, min_x + grid.resolution),
+                    max_y=min(90, min_y + grid.resolution),
+                ),
+                count=0,
+                groups=None if grid.group_by is None else {},
+            )
+            cells[(column, row)] = cell
+        cell.count += count["count"]
+        if cell.groups is not None:
+            group = str(count["_id"].get("group", ""))
+            cell.groups[group] = cell.groups.get(group, 0) + count["count"]
+    return [cells[key] for key in sorted(cells, key=lambda key: (key[1], key[0]))]
+
+
+@router.post("/geospatial/grid", response_description="Feature counts per cell")
+async def get_feature_grid(
+    geometry: GeoJsonPolygon,
+    grid: Annotated[GridParams, Depends()],
+    filters: Annotated[FilterParams, Depends()],
+) -> list[GridCell]:
+    """Counts the features intersecting a polygon per cell of a lon/lat grid.
+
+    Only the counts leave the database: features are binned by the center of
+    their bounding box in an aggregation pipeline. With `group_by`, each cell
+    also counts its features per value of that property, missing values under
+    the empty string.
+
+    Args:
+        geometry (GeoJsonPolygon): The polygon to count features in.
+        grid (GridParams): The resolution of the grid and the property to group by.
+        filters (FilterParams): Only counts the features whose properties match.
+
+    Raises:
+        HTTPException: If the property is invalid or the grid has too many cells.
+
+    Returns:
+        list[GridCell]: The non-empty cells, row by row.
+    """
+    if grid.group_by is not None and not is_property_key(grid.group_by):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid group_by: {grid.group_by}",
+        )
+    bounds = geometry_bounds(geometry)
+    cells = math.ceil((bounds.max_x - bounds.min_x) / grid.resolution + 1) * math.ceil(
+        (bounds.max_y - bounds.min_y) / grid.resolution + 1,
+    )
+    if cells > max_grid_cells:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The grid would have up to {cells} cells, over {max_grid_cells}!",
+        )
+
+    query = combine_queries(
+        filters.query(),
+        {"geometry": {"$geoIntersects": {"$geometry": geometry.dict(by_alias=True)}}},
+    )
+    cursor = read_collection(DBFeature).aggregate(grid_pipeline(grid, query))
+    return _grid_cells(grid, await cursor.to_list(None))
+
+
+@router.get("/geospatial/cache", response_description="Query cache counters")
+async def get_query_cache_stats() -> CacheStats:
+    """Returns the hit, miss and eviction counters of the geospatial query cache.
+
+    Returns:
+        CacheStats: The counters of the query cache.
+    """
+    return query_cache.stats()
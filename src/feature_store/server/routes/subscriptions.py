@@ -0,0 +1,85 @@
+"""Implementation of the feature subscriptions endpoint."""
+import asyncio
+import contextlib
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+from fastapi.routing import APIRouter
+from pydantic import ValidationError
+
+from feature_store.server.database import FeatureBounds
+from feature_store.server.geometry import geometry_bounds
+from feature_store.server.models.geojson import GeoJsonPolygon
+from feature_store.server.subscriptions import (
+    Subscription,
+    SubscriptionAccepted,
+    feature_events,
+)
+
+router = APIRouter()
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription) -> None:
+    """Sends the events of a subscription until the subscriber falls behind.
+
+    Args:
+        websocket (WebSocket): The connection of the subscriber.
+        subscription (Subscription): The subscription.
+    """
+    while (event := await subscription.get()) is not None:
+        await websocket.send_text(event.json(by_alias=True))
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    """Discards the messages of a subscriber until it disconnects.
+
+    Args:
+        websocket (WebSocket): The connection of the subscriber.
+    """
+    with contextlib.suppress(WebSocketDisconnect):
+        while True:
+            await websocket.receive_text()
+
+
+@router.websocket("/subscriptions")
+async def subscribe_features(websocket: WebSocket) -> None:
+    """Streams the writes to the features around a polygon.
+
+    The subscriber sends a GeoJSON polygon as its first message, and receives a
+    `{"bounds": ..., "matching": "bbox"}` reply. It then receives a
+    `{"event": ..., "feature_id": ..., "feature": ...}` message for every feature
+    created, updated or deleted whose bounding box overlaps `bounds`. Matching is
+    by bounding box only, so features near the polygon that do not intersect it
+    are reported too. Bulk updates and deletes only carry the id of the feature.
+    A subscriber that falls too far behind is disconnected with code 1013 once
+    its pending events are sent, and should query the area again before
+    subscribing anew.
+
+    Args:
+        websocket (WebSocket): The connection of the subscriber.
+    """
+    await websocket.accept()
+    try:
+        polygon = GeoJsonPolygon.parse_raw(await websocket.receive_text())
+    except ValidationError as error:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"Invalid polygon: {error.errors()[0]['msg']}",
+        )
+        return
+    except WebSocketDisconnect:
+        return
+
+    area = geometry_bounds(polygon)
+    subscription = feature_events.subscribe(area)
+    accepted = SubscriptionAccepted(bounds=FeatureBounds.from_bounds(area))
+    await websocket.send_text(accepted.json())
+    sender = asyncio.create_task(_send_events(websocket, subscription))
+    receiver = asyncio.create_task(_wait_for_disconnect(websocket))
+    try:
+        await asyncio.wait([sender, receiver], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        feature_events.unsubscribe(subscription)
+        sender.cancel()
+        receiver.cancel()
+    if sender.done() and not sender.cancelled() and sender.exception() is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
@@ -0,0 +1,66 @@
+"""Implementation of the vector tiles endpoint."""
+from fastapi import HTTPException, Response
+from fastapi.routing import APIRouter
+
+from feature_store.server.lod import find_documents_at_lod, lod_for_resolution
+from feature_store.server.queries import bbox_query
+from feature_store.server.tiles import (
+    BUFFER,
+    EXTENT,
+    MAX_ZOOM,
+    MEDIA_TYPE,
+    encode_tile,
+    tile_bounds,
+    tile_cache,
+    tile_max_features,
+    tile_min_zoom,
+)
+
+router = APIRouter()
+
+
+@router.get(
+    "/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MEDIA_TYPE: {}}}},
+    response_description="Mapbox Vector Tile of the features",
+)
+async def get_tile(z: int, x: int, y: int) -> Response:
+    """Returns the features of a Web Mercator tile as a Mapbox Vector Tile.
+
+    Geometries are read at the coarsest level of detail that is still finer than
+    a tile pixel, and the full geometry of a feature only when it has none. Tiles
+    below `FEATURE_STORE_TILE_MIN_ZOOM` are empty, and a tile shows at most
+    `FEATURE_STORE_TILE_MAX_FEATURES` features, in no particular order.
+
+    Args:
+        z (int): The zoom level of the tile.
+        x (int): The column of the tile.
+        y (int): The row of the tile.
+
+    Raises:
+        HTTPException: If the tile does not exist.
+
+    Returns:
+        Response: The encoded tile, empty when no feature is visible in it.
+    """
+    if not (0 <= z <= MAX_ZOOM and 0 <= x < 1 << z and 0 <= y < 1 << z):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Tile {z}/{x}/{y} not found!",
+        )
+    if z < tile_min_zoom:
+        return Response(content=b"", media_type=MEDIA_TYPE)
+
+    tile = (z, x, y)
+    content = tile_cache.get(tile)
+    if content is None:
+        documents = await find_documents_at_lod(
+            bbox_query(tile_bounds(z, x, y, buffer=BUFFER)),
+            lod_for_resolution(360 / ((1 << z) * EXTENT)),
+            limit=tile_max_features,
+        )
+        content = encode_tile(documents, tile)
+        tile_cache.put(tile, content, [document["_id"] for document in documents])
+
+    return Response(content=content, media_type=MEDIA_TYPE)
@@ -0,0 +1,74 @@
+"""Implements fast JSON encoding of raw feature documents.
+
+Raw documents are the BSON documents returned by Motor: they already use the
+aliased field names, such as `type`, so they can be encoded as they are without
+being validated into models first. orjson is used when it is installed, and the
+json module otherwise.
+"""
+import json
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore  # noqa: PGH003
+
+
+def encode_bson_value(value: object) -> str:
+    """Encodes BSON values the JSON encoders do not know about.
+
+    Args:
+        value (object): The value to encode.
+
+    Raises:
+        TypeError: If the value can not be encoded.
+
+    Returns:
+        str: The encoded value.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    msg = f"Object of type {type(value).__name__} is not JSON serializable"
+    raise TypeError(msg)
+
+
+def dumps(value: object) -> bytes:
+    """Encodes raw documents as compact UTF-8 JSON.
+
+    Args:
+        value (object): The documents to encode.
+
+    Returns:
+        bytes: The JSON encoded documents.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=encode_bson_value)
+    return json.dumps(
+        value,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=encode_bson_value,
+    ).encode()
+
+
+class RawJSONResponse(Response):
+    """Returns raw documents encoded with `dumps`, bypassing the response model."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:  # noqa: ANN401
+        """Encodes the content of the response.
+
+        Args:
+            content (Any): The raw documents.
+
+        Returns:
+            bytes: The response body.
+        """
+        return dumps(content)
@@ -0,0 +1,92 @@
+"""Runs the Feature Store server in production, with one process per core.
+
+Run with `python -m feature_store.server.serve`, configured by the
+`FEATURE_STORE_SERVER_*` environment variables. Uvicorn spawns the workers,
+each of which imports the app and runs its startup hook, so every worker opens
+its own MongoDB client and connection pool, sized by the `MONGODB_*` variables
+per worker. The query and tile caches, metrics and subscriptions are per worker
+too, so the caches only see the writes made through their own worker.
+
+The event loop and the HTTP parser are uvloop and httptools when they are
+installed, and asyncio and h11 otherwise. On SIGTERM each worker stops
+accepting connections, waits for the requests in flight up to the graceful
+timeout, then closes its database connections.
+"""
+import logging
+import os
+from importlib.util import find_spec
+from typing import Any
+
+import uvicorn
+from pydantic import BaseSettings, Field
+
+APP = "feature_store.server.app:app"
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> int:
+    """Returns the number of cores the process may run on.
+
+    Returns:
+        int: The number of cores, at least 1.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+class ServerSettings(BaseSettings):
+    """Represents the settings of the production server."""
+
+    host: str = "0.0.0.0"  # noqa: S104
+    port: int = 8000
+    workers: int = Field(default_factory=available_cores, ge=1)
+    backlog: int = 2048
+    keep_alive: int = 75
+    graceful_timeout: int = 30
+    limit_concurrency: int | None = None
+    proxy_headers: bool = True
+    access_log: bool = False
+
+    class Config:
+        """Configures the server settings."""
+
+        env_prefix = "FEATURE_STORE_SERVER_"
+
+    def uvicorn_options(self) -> dict[str, Any]:
+        """Returns the keyword arguments of `uvicorn.run`.
+
+        Returns:
+            dict[str, Any]: The worker, event loop, protocol and socket options.
+        """
+        return {
+            "host": self.host,
+            "port": self.port,
+            "workers": self.workers,
+            "loop": "uvloop" if find_spec("uvloop") else "asyncio",
+            "http": "httptools" if find_spec("httptools") else "h11",
+            "backlog": self.backlog,
+            "timeout_keep_alive": self.keep_alive,
+            "timeout_graceful_shutdown": self.graceful_timeout,
+            "limit_concurrency": self.limit_concurrency,
+            "proxy_headers": self.proxy_headers,
+            "access_log": self.access_log,
+        }
+
+
+def main() -> None:
+    """Runs the server with the settings of the environment."""
+    logging.basicConfig(level=logging.INFO)
+    options = ServerSettings().uvicorn_options()
+    logger.info(
+        "Starting %d workers with the %s loop and the %s parser",
+        options["workers"],
+        options["loop"],
+        options["http"],
+    )
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    main()
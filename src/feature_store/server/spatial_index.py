@@ -0,0 +1,126 @@
+"""Implements an in-memory spatial index over bounding boxes.
+
+The index is a loose hierarchical grid: each box is stored in the cells of the
+finest level whose cells are at least as large as the box, so it touches at most
+four cells. Searches visit the cells overlapping the query on each level in use,
+or scan a level outright when it holds fewer boxes than the query would visit.
+"""
+import math
+from collections import defaultdict
+from collections.abc import Hashable, Iterator
+from typing import Generic, TypeVar
+
+from feature_store.server.geometry import Bounds
+
+Key = TypeVar("Key", bound=Hashable)
+
+MAX_LEVEL = 20
+Cell = tuple[int, int, int]
+
+
+def _level_for(bounds: Bounds) -> int:
+    """Returns the finest grid level whose cells are larger than the bounds."""
+    extent = max(
+        (bounds.max_x - bounds.min_x) / 360,
+        (bounds.max_y - bounds.min_y) / 180,
+    )
+    if extent <= 0:
+        return MAX_LEVEL
+    return max(0, min(MAX_LEVEL, math.floor(-math.log2(extent))))
+
+
+def _cell_range(level: int, bounds: Bounds) -> tuple[range, range]:
+    """Returns the column and row ranges of the cells a box overlaps on a level."""
+    cells = 1 << level
+    width, height = 360 / cells, 180 / cells
+
+    def _clamp(value: float) -> int:
+        return max(0, min(cells - 1, int(value)))
+
+    return (
+        range(
+            _clamp((bounds.min_x + 180) / width),
+            _clamp((bounds.max_x + 180) / width) + 1,
+        ),
+        range(
+            _clamp((bounds.min_y + 90) / height),
+            _clamp((bounds.max_y + 90) / height) + 1,
+        ),
+    )
+
+
+class SpatialIndex(Generic[Key]):
+    """Indexes keys by bounding box for fast overlap searches."""
+
+    def __init__(self) -> None:
+        """Initializes an empty index."""
+        self._bounds: dict[Key, Bounds] = {}
+        self._cells: dict[Cell, set[Key]] = defaultdict(set)
+        self._levels: dict[int, set[Key]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        """Returns the number of keys in the index."""
+        return len(self._bounds)
+
+    def __contains__(self, key: object) -> bool:
+        """Returns whether a key is in the index."""
+        return key in self._bounds
+
+    def _cells_of(self, bounds: Bounds) -> Iterator[Cell]:
+        """Yields the cells a box is stored in."""
+        level = _level_for(bounds)
+        columns, rows = _cell_range(level, bounds)
+        for column in columns:
+            for row in rows:
+                yield level, column, row
+
+    def insert(self, key: Key, bounds: Bounds) -> None:
+        """Adds a key to the index, replacing its previous bounds if any.
+
+        Args:
+            key (Key): The key to index.
+            bounds (Bounds): The bounding box of the key.
+        """
+        self.remove(key)
+        self._bounds[key] = bounds
+        self._levels[_level_for(bounds)].add(key)
+        for cell in self._cells_of(bounds):
+            self._cells[cell].add(key)
+
+    def remove(self, key: Key) -> None:
+        """Removes a key from the index, if present.
+
+        Args:
+            key (Key): The key to remove.
+        """
+        bounds = self._bounds.pop(key, None)
+        if bounds is None:
+            return
+        level = _level_for(bounds)
+        self._levels[level].discard(key)
+        if not self._levels[level]:
+            del self._levels[level]
+        for cell in self._cells_of(bounds):
+            self._cells[cell].discard(key)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def search(self, bounds: Bounds) -> set[Key]:
+        """Returns the keys whose bounding box overlaps the given one.
+
+        Args:
+            bounds (Bounds): The bounding box to search.
+
+        Returns:
+            set[Key]: The overlapping keys.
+        """
+        candidates: set[Key] = set()
+        for level, keys in self._levels.items():
+            columns, rows = _cell_range(level, bounds)
+            if len(columns) * len(rows) >= len(keys):
+                candidates.update(keys)
+                continue
+            for column in columns:
+                for row in rows:
+                    candidates.update(self._cells.get((level, column, row), ()))
+        return {key for key in candidates if self._bounds[key].intersects(bounds)}
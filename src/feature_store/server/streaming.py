@@ -0,0 +1,137 @@
+"""Implements streamed responses built straight from Motor cursors."""
+import os
+from collections.abc import AsyncIterable, AsyncIterator, Mapping
+from enum import Enum
+from typing import Any
+
+from feature_store.server.database import DBFeature, read_collection
+from feature_store.server.lod import fill_lod_geometries, lod_projection
+from feature_store.server.serialization import dumps
+
+stream_batch_size = int(os.getenv("FEATURE_STORE_STREAM_BATCH_SIZE", "500"))
+
+
+class StreamFormat(str, Enum):
+    """Represents the formats features can be streamed in."""
+
+    NDJSON = "ndjson"
+    GEOJSON = "geojson"
+
+
+MEDIA_TYPES = {
+    StreamFormat.NDJSON: "application/x-ndjson",
+    StreamFormat.GEOJSON: "application/geo+json",
+}
+
+
+def encode_document(document: Mapping[str, Any]) -> str:
+    """Encodes a raw feature document as compact JSON.
+
+    Args:
+        document (Mapping[str, Any]): The document as returned by Motor.
+
+    Returns:
+        str: The JSON encoded document.
+    """
+    encoded: bytes = dumps(document)
+    return encoded.decode()
+
+
+def _join_chunk(chunk: list[str], stream_format: StreamFormat, *, first: bool) -> str:
+    """Joins a chunk of encoded documents into a piece of the response body.
+
+    Args:
+        chunk (list[str]): The encoded documents.
+        stream_format (StreamFormat): The format the documents are streamed in.
+        first (bool): Whether this is the first chunk of the response.
+
+    Returns:
+        str: The piece of the response body.
+    """
+    if stream_format == StreamFormat.NDJSON:
+        return "".join(f"{line}\n" for line in chunk)
+    return ("" if first else ",") + ",".join(chunk)
+
+
+async def _encode_batch(
+    batch: list[dict[str, Any]],
+    stream_format: StreamFormat,
+    lod: int | None,
+    *,
+    first: bool,
+) -> str:
+    """Encodes a batch of documents at a level of detail."""
+    return _join_chunk(
+        [
+            encode_document(document)
+            for document in await fill_lod_geometries(batch, lod)
+        ],
+        stream_format,
+        first=first,
+    )
+
+
+async def iter_documents(
+    cursor: AsyncIterable[dict[str, Any]],
+    stream_format: StreamFormat,
+    batch_size: int = stream_batch_size,
+    lod: int | None = None,
+) -> AsyncIterator[str]:
+    """Yields encoded documents from a cursor, one chunk per `batch_size` documents.
+
+    Args:
+        cursor (AsyncIterable[dict[str, Any]]): The cursor to read documents from.
+        stream_format (StreamFormat): The format to encode the documents in.
+        batch_size (int): The number of documents to encode per chunk.
+        lod (int | None): The level of detail of the geometries, if any, in
+            which case the documents are read with `lod_projection`.
+
+    Yields:
+        str: A chunk of the encoded response body.
+    """
+    if stream_format == StreamFormat.GEOJSON:
+        yield '{"type":"FeatureCollection","features":['
+
+    batch: list[dict[str, Any]] = []
+    first = True
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield await _encode_batch(batch, stream_format, lod, first=first)
+            batch, first = [], False
+    if batch:
+        yield await _encode_batch(batch, stream_format, lod, first=first)
+
+    if stream_format == StreamFormat.GEOJSON:
+        yield "]}"
+
+
+def iter_features(  # noqa: PLR0913
+    query: Mapping[str, Any],
+    stream_format: StreamFormat,
+    sort: list[tuple[str, int]] | None = None,
+    limit: int | None = None,
+    lod: int | None = None,
+    projection: Mapping[str, Any] | None = None,
+) -> AsyncIterator[str]:
+    """Streams the features matching a query without loading them all in memory.
+
+    Args:
+        query (Mapping[str, Any]): The MongoDB filter to apply.
+        stream_format (StreamFormat): The format to stream the features in.
+        sort (list[tuple[str, int]] | None): The sort order to apply, if any.
+        limit (int | None): The maximum number of features to stream, if any.
+        lod (int | None): The level of detail of the geometries, if any.
+        projection (Mapping[str, Any] | None): The fields to read, all if None.
+
+    Returns:
+        AsyncIterator[str]: The chunks of the response body.
+    """
+    cursor = read_collection(DBFeature).find(
+        query,
+        lod_projection(projection, lod),
+        sort=sort,
+        limit=limit or 0,
+        batch_size=stream_batch_size,
+    )
+    return iter_documents(cursor, stream_format, lod=lod)
@@ -0,0 +1,169 @@
+"""Implements in-process subscriptions to the features written in an area.
+
+Subscribers register a polygon and receive an event for every feature created,
+updated or deleted around it, instead of polling the intersects endpoint. The
+bounding boxes of the subscribed polygons are kept in a spatial index, so a write
+only visits the subscriptions it may concern. A feature matches a subscription
+when its bounding box before or after the write overlaps the one of the polygon:
+matching is by bounding box only, so subscribers also receive the writes to
+features near the polygon that do not intersect it.
+
+Events are published by the write handlers of the worker process: writes made
+through other processes are not seen by its subscribers.
+"""
+import asyncio
+import os
+from enum import Enum
+from typing import Literal
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel
+
+from feature_store.server.database import DBFeature, FeatureBounds
+from feature_store.server.geometry import Bounds
+from feature_store.server.spatial_index import SpatialIndex
+
+subscription_queue_size = int(
+    os.getenv("FEATURE_STORE_SUBSCRIPTION_QUEUE_SIZE", "1000"),
+)
+
+
+class EventType(str, Enum):
+    """Represents the kind of write an event reports."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
+class FeatureEvent(BaseModel):
+    """Represents a write to a feature."""
+
+    event: EventType
+    feature_id: PydanticObjectId
+    feature: DBFeature | None = None
+
+
+class SubscriptionAccepted(BaseModel):
+    """Represents the reply to a new subscription.
+
+    Attributes:
+        bounds (FeatureBounds): The bounding box the events are matched against.
+        matching (Literal["bbox"]): How features are matched, by bounding box
+            only rather than by their exact geometry.
+    """
+
+    bounds: FeatureBounds
+    matching: Literal["bbox"] = "bbox"
+
+
+class Subscription:
+    """Holds the events of a subscriber that are waiting to be sent."""
+
+    def __init__(self, area: Bounds, max_events: int) -> None:
+        """Initializes the subscription.
+
+        Args:
+            area (Bounds): The bounding box of the subscribed polygon.
+            max_events (int): The number of events that may wait to be sent.
+        """
+        self.area = area
+        self.overflowed = False
+        self._events: asyncio.Queue[FeatureEvent] = asyncio.Queue(max_events)
+
+    def push(self, event: FeatureEvent) -> bool:
+        """Queues an event for the subscriber.
+
+        Args:
+            event (FeatureEvent): The event to send.
+
+        Returns:
+            bool: False if the subscriber is too far behind to take the event.
+        """
+        try:
+            self._events.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+        return True
+
+    async def get(self) -> FeatureEvent | None:
+        """Waits for the next event of the subscriber.
+
+        Returns:
+            FeatureEvent | None: The event, or None once the subscriber has
+                missed events and must resynchronize.
+        """
+        if self.overflowed and self._events.empty():
+            return None
+        return await self._events.get()
+
+
+class SubscriptionHub:
+    """Routes the feature events to the subscriptions of their area."""
+
+    def __init__(self, max_events: int) -> None:
+        """Initializes the hub.
+
+        Args:
+            max_events (int): The number of events that may wait to be sent to a
+                subscriber before it is dropped.
+        """
+        self.max_events = max_events
+        self._subscriptions: SpatialIndex[Subscription] = SpatialIndex()
+
+    def __len__(self) -> int:
+        """Returns the number of subscriptions."""
+        return len(self._subscriptions)
+
+    def subscribe(self, area: Bounds) -> Subscription:
+        """Registers a subscription to the features written in an area.
+
+        Args:
+            area (Bounds): The bounding box of the subscribed polygon.
+
+        Returns:
+            Subscription: The subscription.
+        """
+        subscription = Subscription(area, self.max_events)
+        self._subscriptions.insert(subscription, area)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Removes a subscription, if present.
+
+        Args:
+            subscription (Subscription): The subscription to remove.
+        """
+        self._subscriptions.remove(subscription)
+
+    def publish(self, event: FeatureEvent, *bounds: Bounds | None) -> int:
+        """Sends an event to the subscriptions overlapping a written feature.
+
+        Subscribers too far behind to take the event are removed, and stop after
+        the events they already have.
+
+        Args:
+            event (FeatureEvent): The event to send.
+            *bounds (Bounds | None): The bounding boxes of the feature before and
+                after the write, None when it did not exist.
+
+        Returns:
+            int: The number of subscriptions the event was sent to.
+        """
+        if not self._subscriptions:
+            return 0
+        subscriptions: set[Subscription] = set()
+        for feature_bounds in bounds:
+            if feature_bounds is not None:
+                subscriptions |= self._subscriptions.search(feature_bounds)
+        sent = 0
+        for subscription in subscriptions:
+            if subscription.push(event):
+                sent += 1
+            else:
+                self.unsubscribe(subscription)
+        return sent
+
+
+feature_events = SubscriptionHub(subscription_queue_size)
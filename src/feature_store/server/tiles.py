@@ -0,0 +1,480 @@
+"""Implements Mapbox Vector Tile encoding of features and a cache of built tiles.
+
+Tiles follow the Mapbox Vector Tile 2.1 specification: geometries are projected
+to Web Mercator, clipped to the tile plus a small buffer, quantized to the tile
+extent and encoded as protocol buffers with a single `features` layer.
+
+The tile cache is disabled by default. It lives in the worker process and only
+sees the writes made through it, so with several workers, or writes from the
+importer, a cached tile may stay stale until it expires, see
+`FEATURE_STORE_TILE_CACHE_TTL`.
+
+Tiles below `FEATURE_STORE_TILE_MIN_ZOOM` are served empty, and a tile shows at
+most `FEATURE_STORE_TILE_MAX_FEATURES` features, so a zoomed out view never
+reads and encodes the whole collection.
+"""
+import math
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Mapping, Sequence
+from itertools import pairwise
+from typing import Any
+
+from feature_store.server.geometry import Bounds
+from feature_store.server.spatial_index import SpatialIndex
+
+tile_cache_bytes = int(os.getenv("FEATURE_STORE_TILE_CACHE_MB", "0")) * 1024 * 1024
+tile_cache_ttl = float(os.getenv("FEATURE_STORE_TILE_CACHE_TTL", "0")) or None
+tile_min_zoom = int(os.getenv("FEATURE_STORE_TILE_MIN_ZOOM", "0"))
+tile_max_features = int(os.getenv("FEATURE_STORE_TILE_MAX_FEATURES", "10000"))
+
+EXTENT = 4096
+BUFFER = 64
+MAX_ZOOM = 24
+MAX_LATITUDE = 85.0511287798066
+LAYER_NAME = "features"
+MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+POINT, LINE_STRING, POLYGON = 1, 2, 3
+MOVE_TO, LINE_TO, CLOSE_PATH = 1, 2, 7
+
+Tile = tuple[int, int, int]
+Point = tuple[float, float]
+
+
+def tile_bounds(z: int, x: int, y: int, buffer: int = 0) -> Bounds:
+    """Returns the lon/lat bounding box of a tile.
+
+    Args:
+        z (int): The zoom level of the tile.
+        x (int): The column of the tile.
+        y (int): The row of the tile.
+        buffer (int): The number of tile units to extend the tile by on each side.
+
+    Returns:
+        Bounds: The bounding box of the tile.
+    """
+    tiles = 1 << z
+    margin = buffer / EXTENT
+
+    def _lon(column: float) -> float:
+        return max(-180.0, min(180.0, column / tiles * 360 - 180))
+
+    def _lat(row: float) -> float:
+        row = max(0.0, min(float(tiles), row))
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / tiles))))
+
+    return Bounds(
+        _lon(x - margin),
+        _lat(y + 1 + margin),
+        _lon(x + 1 + margin),
+        _lat(y - margin),
+    )
+
+
+def _project(position: Sequence[float], z: int, x: int, y: int) -> Point:
+    """Projects a lon/lat position to the coordinates of a tile."""
+    tiles = 1 << z
+    lat = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, position[1])))
+    world_x = (position[0] + 180) / 360
+    world_y = (1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2
+    return (world_x * tiles - x) * EXTENT, (world_y * tiles - y) * EXTENT
+
+
+def _inside(point: Point) -> bool:
+    """Returns whether a point lies within the buffered tile."""
+    return (
+        -BUFFER <= point[0] <= EXTENT + BUFFER
+        and -BUFFER <= point[1] <= EXTENT + BUFFER
+    )
+
+
+def _clip_segment(start: Point, end: Point) -> tuple[Point, Point] | None:
+    """Clips a segment to the buffered tile with the Liang-Barsky algorithm."""
+    low, high = -BUFFER, EXTENT + BUFFER
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    t0, t1 = 0.0, 1.0
+    for p, q in (
+        (-dx, start[0] - low),
+        (dx, high - start[0]),
+        (-dy, start[1] - low),
+        (dy, high - start[1]),
+    ):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return None
+    return (
+        (start[0] + t0 * dx, start[1] + t0 * dy),
+        (start[0] + t1 * dx, start[1] + t1 * dy),
+    )
+
+
+def _clip_line(points: Sequence[Point]) -> list[list[Point]]:
+    """Clips a line to the buffered tile, splitting it where it leaves the tile."""
+    parts: list[list[Point]] = []
+    current: list[Point] = []
+    for start, end in pairwise(points):
+        clipped = _clip_segment(start, end)
+        if clipped is None:
+            continue
+        if current and current[-1] == clipped[0]:
+            current.append(clipped[1])
+        else:
+            if current:
+                parts.append(current)
+            current = list(clipped)
+        if clipped[1] != end:
+            parts.append(current)
+            current = []
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _clip_ring(points: Sequence[Point]) -> list[Point]:
+    """Clips a ring to the buffered tile with the Sutherland-Hodgman algorithm."""
+    low, high = -BUFFER, EXTENT + BUFFER
+    # Each edge keeps the points whose `axis` coordinate, times `sign`, is at
+    # least `sign * value`.
+    edges = ((0, low, 1), (0, high, -1), (1, low, 1), (1, high, -1))
+    output = list(points)
+    for axis, value, sign in edges:
+        source, output = output, []
+        for index, current in enumerate(source):
+            previous = source[index - 1]
+            current_inside = sign * (current[axis] - value) >= 0
+            previous_inside = sign * (previous[axis] - value) >= 0
+            if current_inside != previous_inside:
+                output.append(_intersection(previous, current, axis, value))
+            if current_inside:
+                output.append(current)
+        if not output:
+            break
+    return output
+
+
+def _intersection(start: Point, end: Point, axis: int, value: float) -> Point:
+    """Returns where a segment crosses an axis-aligned line."""
+    t = (value - start[axis]) / (end[axis] - start[axis])
+    return (
+        start[0] + t * (end[0] - start[0]),
+        start[1] + t * (end[1] - start[1]),
+    )
+
+
+def _quantize(points: Iterable[Point]) -> list[tuple[int, int]]:
+    """Rounds points to the tile grid and drops consecutive duplicates."""
+    quantized: list[tuple[int, int]] = []
+    for point in points:
+        rounded = (round(point[0]), round(point[1]))
+        if not quantized or quantized[-1] != rounded:
+            quantized.append(rounded)
+    return quantized
+
+
+def _ring_area(ring: Sequence[tuple[int, int]]) -> int:
+    """Returns twice the signed area of a ring in tile coordinates."""
+    return sum(
+        ring[index - 1][0] * point[1] - point[0] * ring[index - 1][1]
+        for index, point in enumerate(ring)
+    )
+
+
+def _zigzag(value: int) -> int:
+    """Zigzag encodes a signed integer."""
+    return (value << 1) ^ (value >> 31)
+
+
+class _GeometryEncoder:
+    """Encodes geometry drawing commands with a cursor relative to the last point."""
+
+    def __init__(self) -> None:
+        """Initializes an encoder with the cursor at the tile origin."""
+        self.commands: list[int] = []
+        self._cursor = (0, 0)
+
+    def move_to(self, point: tuple[int, int]) -> None:
+        """Starts a new part of the geometry at a point."""
+        self.commands.append(MOVE_TO | (1 << 3))
+        self._parameters([point])
+
+    def line_to(self, points: Sequence[tuple[int, int]]) -> None:
+        """Draws lines through the given points."""
+        self.commands.append(LINE_TO | (len(points) << 3))
+        self._parameters(points)
+
+    def close_path(self) -> None:
+        """Closes the current ring."""
+        self.commands.append(CLOSE_PATH | (1 << 3))
+
+    def _parameters(self, points: Iterable[tuple[int, int]]) -> None:
+        """Appends points as zigzag encoded deltas from the cursor."""
+        for point in points:
+            self.commands.append(_zigzag(point[0] - self._cursor[0]))
+            self.commands.append(_zigzag(point[1] - self._cursor[1]))
+            self._cursor = point
+
+
+def _encode_line(
+    encoder: _GeometryEncoder,
+    line: Sequence[Sequence[float]],
+    tile: Tile,
+) -> None:
+    """Encodes the parts of a line left after clipping it to a tile."""
+    projected = [_project(position, *tile) for position in line]
+    for part in _clip_line(projected):
+        quantized = _quantize(part)
+        if len(quantized) > 1:
+            encoder.move_to(quantized[0])
+            encoder.line_to(quantized[1:])
+
+
+def _encode_polygon(
+    encoder: _GeometryEncoder,
+    rings: Sequence[Sequence[Sequence[float]]],
+    tile: Tile,
+) -> None:
+    """Encodes the rings of a polygon left after clipping it to a tile.
+
+    Exterior rings get a positive area and interior rings a negative one, as the
+    specification requires, whatever their winding order in the GeoJSON.
+    """
+    for index, ring in enumerate(rings):
+        projected = [_project(position, *tile) for position in ring[:-1]]
+        clipped = _quantize(_clip_ring(projected))
+        if len(clipped) > 1 and clipped[0] == clipped[-1]:
+            clipped.pop()
+        area = _ring_area(clipped)
+        if len(clipped) < 3 or area == 0:  # noqa: PLR2004
+            if index == 0:
+                return
+            continue
+        if (area > 0) != (index == 0):
+            clipped.reverse()
+        encoder.move_to(clipped[0])
+        encoder.line_to(clipped[1:])
+        encoder.close_path()
+
+
+def encode_geometry(
+    geometry: Mapping[str, Any],
+    tile: Tile,
+) -> tuple[int, list[int]] | None:
+    """Projects, clips, quantizes and encodes a GeoJSON geometry for a tile.
+
+    Args:
+        geometry (Mapping[str, Any]): The GeoJSON geometry.
+        tile (Tile): The zoom, column and row of the tile.
+
+    Returns:
+        tuple[int, list[int]] | None: The MVT geometry type and commands, or None
+            when nothing of the geometry is left in the tile.
+    """
+    encoder = _GeometryEncoder()
+    if geometry["type"] == "Point":
+        point = _project(geometry["coordinates"], *tile)
+        if _inside(point):
+            encoder.move_to(_quantize([point])[0])
+        geometry_type = POINT
+    elif geometry["type"] == "LineString":
+        _encode_line(encoder, geometry["coordinates"], tile)
+        geometry_type = LINE_STRING
+    else:
+        _encode_polygon(encoder, geometry["coordinates"], tile)
+        geometry_type = POLYGON
+    return (geometry_type, encoder.commands) if encoder.commands else None
+
+
+def _varint(value: int) -> bytes:
+    """Encodes an unsigned integer as a protocol buffers varint."""
+    encoded = bytearray()
+    while value > 0x7F:  # noqa: PLR2004
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    """Encodes a length-delimited protocol buffers field."""
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _uint_field(number: int, value: int) -> bytes:
+    """Encodes a varint protocol buffers field."""
+    return _varint(number << 3) + _varint(value)
+
+
+def _packed_field(number: int, values: Iterable[int]) -> bytes:
+    """Encodes a packed repeated varint protocol buffers field."""
+    return _field(number, b"".join(_varint(value) for value in values))
+
+
+def encode_tile(documents: Iterable[Mapping[str, Any]], tile: Tile) -> bytes:
+    """Encodes features as a vector tile with a single `features` layer.
+
+    The feature id is stored as the `id` property, since MVT ids are limited to
+    64 bits.
+
+    Args:
+        documents (Iterable[Mapping[str, Any]]): The raw feature documents.
+        tile (Tile): The zoom, column and row of the tile.
+
+    Returns:
+        bytes: The encoded tile, empty if no feature is visible in the tile.
+    """
+    keys: dict[str, int] = {}
+    values: dict[str, int] = {}
+    features: list[bytes] = []
+    for document in documents:
+        encoded = encode_geometry(document["geometry"], tile)
+        if encoded is None:
+            continue
+        geometry_type, commands = encoded
+
+        tags: list[int] = []
+        properties = {"id": str(document["_id"]), **document.get("properties", {})}
+        for key, value in properties.items():
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault(str(value), len(values)))
+
+        features.append(
+            _packed_field(2, tags)
+            + _uint_field(3, geometry_type)
+            + _packed_field(4, commands),
+        )
+
+    if not features:
+        return b""
+
+    layer = (
+        _uint_field(15, 2)
+        + _field(1, LAYER_NAME.encode())
+        + b"".join(_field(2, feature) for feature in features)
+        + b"".join(_field(3, key.encode()) for key in keys)
+        + b"".join(_field(4, _field(1, value.encode())) for value in values)
+        + _uint_field(5, EXTENT)
+    )
+    return _field(3, layer)
+
+
+class TileCache:
+    """Caches encoded tiles with LRU eviction under a memory budget.
+
+    Tiles are indexed by their extent and by the ids of the features read to
+    build them, so a write drops the tiles that showed the feature before it and
+    the ones it overlaps after it.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float | None = None) -> None:
+        """Initializes the cache.
+
+        Args:
+            max_bytes (int): The memory budget of the cache, 0 disables it.
+            ttl (float | None): The number of seconds a tile stays valid.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        self._size = 0
+        self._tiles: OrderedDict[Tile, bytes] = OrderedDict()
+        self._created: dict[Tile, float] = {}
+        self._regions: SpatialIndex[Tile] = SpatialIndex()
+        self._feature_ids: dict[Tile, list[Hashable]] = {}
+        self._features: dict[Hashable, set[Tile]] = {}
+
+    def get(self, tile: Tile) -> bytes | None:
+        """Returns a cached tile.
+
+        Args:
+            tile (Tile): The zoom, column and row of the tile.
+
+        Returns:
+            bytes | None: The encoded tile, or None on a miss.
+        """
+        content = self._tiles.get(tile)
+        if (
+            content is not None
+            and self.ttl
+            and time.monotonic() - self._created[tile] > self.ttl
+        ):
+            self._drop(tile)
+            content = None
+        if content is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._tiles.move_to_end(tile)
+        return content
+
+    def put(
+        self,
+        tile: Tile,
+        content: bytes,
+        feature_ids: Iterable[Hashable] = (),
+    ) -> None:
+        """Caches an encoded tile.
+
+        Args:
+            tile (Tile): The zoom, column and row of the tile.
+            content (bytes): The encoded tile.
+            feature_ids (Iterable[Hashable]): The ids of the features read to
+                build the tile.
+        """
+        if self.max_bytes <= 0:
+            return
+        self._drop(tile)
+        self._tiles[tile] = content
+        self._created[tile] = time.monotonic()
+        self._size += len(content)
+        self._regions.insert(tile, tile_bounds(*tile, buffer=BUFFER))
+        self._feature_ids[tile] = list(feature_ids)
+        for feature_id in self._feature_ids[tile]:
+            self._features.setdefault(feature_id, set()).add(tile)
+        while self._size > self.max_bytes and self._tiles:
+            self._drop(next(iter(self._tiles)))
+
+    def invalidate(self, feature_id: Hashable, bounds: Bounds | None) -> None:
+        """Drops the tiles a write to a feature may have changed.
+
+        Args:
+            feature_id (Hashable): The id of the written feature.
+            bounds (Bounds | None): The bounding box of the feature after the write,
+                None if it was deleted.
+        """
+        stale = set(self._features.get(feature_id, ()))
+        if bounds is not None:
+            stale |= self._regions.search(bounds)
+        for tile in stale:
+            self._drop(tile)
+
+    def clear(self) -> None:
+        """Drops every cached tile."""
+        for tile in list(self._tiles):
+            self._drop(tile)
+
+    def _drop(self, tile: Tile) -> None:
+        """Removes a tile from the cache."""
+        content = self._tiles.pop(tile, None)
+        if content is None:
+            return
+        self._size -= len(content)
+        del self._created[tile]
+        self._regions.remove(tile)
+        for feature_id in self._feature_ids.pop(tile):
+            tiles = self._features[feature_id]
+            tiles.discard(tile)
+            if not tiles:
+                del self._features[feature_id]
+
+
+tile_cache = TileCache(tile_cache_bytes, tile_cache_ttl)
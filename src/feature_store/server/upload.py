@@ -0,0 +1,258 @@
+"""Implements an incremental parser of GeoJSON FeatureCollection uploads.
+
+The parser is fed the request body as it arrives and yields each feature of the
+`features` array as soon as it is complete, with the byte offset it starts at,
+so an upload of any size is held in memory about one feature at a time. Values
+are decoded by the json module. A value cut by the end of the received data is
+only decoded again once the data buffered since its start has doubled, so large
+features are not parsed over and over.
+"""
+import codecs
+import json
+import os
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+max_feature_bytes = (
+    int(os.getenv("FEATURE_STORE_UPLOAD_MAX_FEATURE_MB", "64")) * 1024 * 1024
+)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class UploadError(ValueError):
+    """Reports a FeatureCollection that can not be parsed any further."""
+
+    def __init__(self, message: str, offset: int) -> None:
+        """Initializes the error.
+
+        Args:
+            message (str): What is wrong with the upload.
+            offset (int): The byte offset of the error in the upload.
+        """
+        super().__init__(f"{message} at byte {offset}")
+        self.message = message
+        self.offset = offset
+
+
+class _Incomplete(Exception):  # noqa: N818
+    """Signals that more data is needed to parse the next value."""
+
+
+class _State(Enum):
+    """Represents what the parser expects next."""
+
+    START = "start"
+    FIRST_KEY = "first key"
+    KEY = "key"
+    COLON = "colon"
+    VALUE = "value"
+    NEXT_KEY = "next key"
+    FIRST_FEATURE = "first feature"
+    FEATURE = "feature"
+    NEXT_FEATURE = "next feature"
+    END = "end"
+
+
+@dataclass
+class ParsedFeature:
+    """Represents a feature parsed from an upload, before its validation.
+
+    Attributes:
+        index (int): The index of the feature in the `features` array.
+        offset (int): The byte offset the feature starts at in the upload.
+        value (Any): The decoded JSON value of the feature.
+    """
+
+    index: int
+    offset: int
+    value: Any
+
+
+class FeatureStreamParser:
+    """Parses the features of a FeatureCollection from chunks of its bytes."""
+
+    def __init__(self, max_value_bytes: int = max_feature_bytes) -> None:
+        """Initializes a parser expecting the start of a FeatureCollection.
+
+        Args:
+            max_value_bytes (int): The size from which a value that can not be
+                decoded is reported as invalid instead of waiting for more data.
+        """
+        self.max_value_bytes = max_value_bytes
+        self.count = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._state = _State.START
+        self._key: str | None = None
+        self._text = ""
+        self._pending: list[str] = []
+        self._pending_length = 0
+        self._retry_length = 0
+        self._final = False
+        self._offset = 0
+        self._mark = 0
+        self._mark_offset = 0
+
+    def feed(self, data: bytes) -> Iterator[ParsedFeature]:
+        """Adds the next bytes of the upload and yields the completed features.
+
+        Args:
+            data (bytes): The next bytes of the upload.
+
+        Raises:
+            UploadError: If the upload is not a valid FeatureCollection.
+
+        Yields:
+            ParsedFeature: The next complete feature.
+        """
+        try:
+            text = self._decoder.decode(data)
+        except UnicodeDecodeError as error:
+            msg = "Invalid UTF-8"
+            raise UploadError(msg, self._received + error.start) from error
+        self._pending.append(text)
+        self._pending_length += len(text)
+        yield from self._parse()
+
+    def close(self) -> Iterator[ParsedFeature]:
+        """Ends the upload and yields the last features.
+
+        Raises:
+            UploadError: If the upload is not a complete FeatureCollection.
+
+        Yields:
+            ParsedFeature: The next complete feature.
+        """
+        self._final = True
+        yield from self.feed(b"")
+        if self._state is not _State.END:
+            msg = f"Unexpected end of the upload, expecting {self._state.value}"
+            raise UploadError(msg, self._received)
+
+    @property
+    def _received(self) -> int:
+        """Returns the byte offset of the end of the data decoded so far."""
+        return self._offset + sum(
+            len(text.encode()) for text in [self._text, *self._pending]
+        )
+
+    def _byte_offset(self, text: str, position: int) -> int:
+        """Returns the byte offset of a position of the buffered text.
+
+        Positions must not decrease until the buffered text is consumed.
+        """
+        piece = text[self._mark : position]
+        self._mark_offset += len(piece) if piece.isascii() else len(piece.encode())
+        self._mark = position
+        return self._offset + self._mark_offset
+
+    def _decode(self, text: str, position: int) -> tuple[Any, int]:
+        """Decodes the value starting at a position of the buffered text."""
+        try:
+            value, end = _DECODER.raw_decode(text, position)
+        except json.JSONDecodeError as error:
+            if self._final or len(text) - position > self.max_value_bytes:
+                offset = self._byte_offset(text, max(position, error.pos))
+                raise UploadError(error.msg, offset) from error
+            self._retry_length = 2 * (len(text) - position)
+            raise _Incomplete from error
+        if (
+            end == len(text)
+            and not self._final
+            and not isinstance(value, dict | list | str)
+        ):
+            raise _Incomplete
+        self._retry_length = 0
+        return value, end
+
+    def _expect(self, text: str, position: int, expected: str) -> int:
+        """Checks the character at a position and returns the next position."""
+        if text[position] not in expected:
+            msg = f"Expecting {' or '.join(map(repr, expected))}"
+            raise UploadError(msg, self._byte_offset(text, position))
+        return position + 1
+
+    def _step(  # noqa: C901
+        self,
+        text: str,
+        position: int,
+    ) -> tuple[int, ParsedFeature | None]:
+        """Parses the token at a position.
+
+        Returns the next position, and the feature the token completes if any.
+        """
+        state = self._state
+        feature = None
+        if state is _State.START:
+            position = self._expect(text, position, "{")
+            self._state = _State.FIRST_KEY
+        elif state is _State.FIRST_KEY and text[position] == "}":
+            self._state = _State.END
+            position += 1
+        elif state in (_State.FIRST_KEY, _State.KEY):
+            self._expect(text, position, '"')
+            self._key, position = self._decode(text, position)
+            self._state = _State.COLON
+        elif state is _State.COLON:
+            position = self._expect(text, position, ":")
+            self._state = _State.VALUE
+        elif state is _State.VALUE and self._key == "features":
+            position = self._expect(text, position, "[")
+            self._state = _State.FIRST_FEATURE
+        elif state is _State.VALUE:
+            start = position
+            value, position = self._decode(text, position)
+            if self._key == "type" and value != "FeatureCollection":
+                msg = "Not a FeatureCollection"
+                raise UploadError(msg, self._byte_offset(text, start))
+            self._state = _State.NEXT_KEY
+        elif state is _State.NEXT_KEY:
+            position = self._expect(text, position, ",}")
+            self._state = _State.KEY if text[position - 1] == "," else _State.END
+        elif state is _State.FIRST_FEATURE and text[position] == "]":
+            self._state = _State.NEXT_KEY
+            position += 1
+        elif state in (_State.FIRST_FEATURE, _State.FEATURE):
+            start = position
+            value, position = self._decode(text, position)
+            feature = ParsedFeature(self.count, self._byte_offset(text, start), value)
+            self.count += 1
+            self._state = _State.NEXT_FEATURE
+        elif state is _State.NEXT_FEATURE:
+            position = self._expect(text, position, ",]")
+            self._state = (
+                _State.FEATURE if text[position - 1] == "," else _State.NEXT_KEY
+            )
+        else:
+            msg = "Unexpected data after the FeatureCollection"
+            raise UploadError(msg, self._byte_offset(text, position))
+        return position, feature
+
+    def _parse(self) -> Iterator[ParsedFeature]:
+        """Parses the buffered text and yields the completed features."""
+        if not self._final and (
+            len(self._text) + self._pending_length < self._retry_length
+        ):
+            return
+        text = "".join([self._text, *self._pending])
+        self._pending.clear()
+        self._pending_length = 0
+        position = 0
+        while True:
+            match = _WHITESPACE.match(text, position)
+            position = match.end() if match else position
+            if position == len(text):
+                break
+            try:
+                position, feature = self._step(text, position)
+            except _Incomplete:
+                break
+            if feature is not None:
+                yield feature
+        self._offset = self._byte_offset(text, position)
+        self._mark = self._mark_offset = 0
+        self._text = text[position:]
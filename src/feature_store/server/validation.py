@@ -0,0 +1,329 @@
+"""Implements the validation and normalization of geometries before they are stored.
+
+Geometries are checked in batches, before they reach MongoDB, so an invalid one
+is reported alone instead of failing on the 2dsphere index after the rest of the
+batch was prepared. The positions of a whole batch are flattened into coordinate
+arrays, and the checks run over every ring at once, vectorized with NumPy when
+it is installed and in plain Python otherwise.
+
+Positions must be finite and within longitude and latitude ranges. Consecutive
+duplicate positions are removed, polygon rings are closed and wound as RFC 7946
+recommends, exterior rings counterclockwise and holes clockwise. Rings must keep
+3 distinct positions and a non-zero area, and line strings 2 distinct positions.
+Self-intersections are left to MongoDB, which rejects such a feature alone as
+bulk inserts are unordered.
+"""
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from enum import Enum
+from itertools import pairwise
+
+from feature_store.server.geometry import Geometry, Position
+from feature_store.server.models.geojson import (
+    GeoJsonLineString,
+    GeoJsonPoint,
+    GeoJsonPolygon,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+MAX_LONGITUDE = 180.0
+MAX_LATITUDE = 90.0
+MIN_COORDINATES = 2
+MIN_LINE_POSITIONS = 2
+MIN_RING_POSITIONS = 3
+
+
+class _PathKind(Enum):
+    """Represents the role of a path in its geometry."""
+
+    POINT = "point"
+    LINE = "line"
+    EXTERIOR = "exterior"
+    HOLE = "hole"
+
+
+@dataclass
+class _Batch:
+    """Holds the positions of a batch of geometries as flat coordinate arrays.
+
+    Path `i` spans positions `starts[i]` to `starts[i + 1]`, and belongs to the
+    geometry `owners[i]`.
+    """
+
+    xs: "array[float]" = field(default_factory=lambda: array("d"))
+    ys: "array[float]" = field(default_factory=lambda: array("d"))
+    starts: "array[int]" = field(default_factory=lambda: array("q", [0]))
+    owners: list[int] = field(default_factory=list)
+    kinds: list[_PathKind] = field(default_factory=list)
+    paths: list[Sequence[Position]] = field(default_factory=list)
+
+    def add(self, owner: int, kind: _PathKind, path: Sequence[Position]) -> None:
+        """Appends a path of a geometry."""
+        self.xs.extend(position[0] for position in path)
+        self.ys.extend(position[1] for position in path)
+        self.starts.append(len(self.xs))
+        self.owners.append(owner)
+        self.kinds.append(kind)
+        self.paths.append(path)
+
+
+@dataclass
+class _PathChecks:
+    """Holds the results of the checks of every path of a batch.
+
+    Attributes:
+        in_range (list[bool]): Whether all the positions of each path are valid.
+        kept (list[bool]): Whether each position differs from the previous one
+            of its path.
+        removed (list[int]): The number of duplicate positions of each path.
+        distinct (list[int]): The number of distinct consecutive positions of
+            each path, not counting the last one when it closes the path.
+        closed (list[bool]): Whether each path ends where it starts.
+        area (list[float]): Twice the signed planar area of each path, positive
+            when it is wound counterclockwise.
+    """
+
+    in_range: list[bool]
+    kept: list[bool]
+    removed: list[int]
+    distinct: list[int]
+    closed: list[bool]
+    area: list[float]
+
+
+def _check_paths_numpy(batch: _Batch) -> _PathChecks:
+    """Checks the paths of a batch with vectorized NumPy operations."""
+    xs = np.frombuffer(batch.xs, dtype=np.float64)
+    ys = np.frombuffer(batch.ys, dtype=np.float64)
+    bounds = np.frombuffer(batch.starts, dtype=np.int64)
+    starts, ends = bounds[:-1], bounds[1:]
+
+    valid = (
+        np.isfinite(xs)
+        & np.isfinite(ys)
+        & (np.abs(xs) <= MAX_LONGITUDE)
+        & (np.abs(ys) <= MAX_LATITUDE)
+    )
+    in_range = np.logical_and.reduceat(valid, starts)
+
+    kept = np.ones(len(xs), dtype=bool)
+    kept[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    kept[starts] = True
+    counts = np.add.reduceat(kept.astype(np.int64), starts)
+
+    last = ends - 1
+    closed = (xs[last] == xs[starts]) & (ys[last] == ys[starts])
+    following = np.arange(1, len(xs) + 1)
+    following[last] = starts
+    cross = xs * ys[following] - xs[following] * ys
+    area = np.add.reduceat(cross, starts)
+
+    return _PathChecks(
+        in_range=in_range.tolist(),
+        kept=kept.tolist(),
+        removed=(ends - starts - counts).tolist(),
+        distinct=(counts - (closed & (counts > 1))).tolist(),
+        closed=closed.tolist(),
+        area=area.tolist(),
+    )
+
+
+def _check_paths_python(batch: _Batch) -> _PathChecks:
+    """Checks the paths of a batch one position at a time."""
+    xs, ys = batch.xs, batch.ys
+    checks = _PathChecks(
+        in_range=[],
+        kept=[],
+        removed=[],
+        distinct=[],
+        closed=[],
+        area=[],
+    )
+    for start, end in pairwise(batch.starts):
+        checks.in_range.append(
+            all(
+                abs(xs[index]) <= MAX_LONGITUDE and abs(ys[index]) <= MAX_LATITUDE
+                for index in range(start, end)
+            ),
+        )
+        count = 0
+        area = 0.0
+        for index in range(start, end):
+            kept = index == start or (xs[index], ys[index]) != (
+                xs[index - 1],
+                ys[index - 1],
+            )
+            checks.kept.append(kept)
+            count += kept
+            following = index + 1 if index + 1 < end else start
+            area += xs[index] * ys[following] - xs[following] * ys[index]
+        closed = (xs[end - 1], ys[end - 1]) == (xs[start], ys[start])
+        checks.closed.append(closed)
+        checks.removed.append(end - start - count)
+        checks.distinct.append(count - (closed and count > 1))
+        checks.area.append(area)
+    return checks
+
+
+def _path_error(kind: _PathKind, distinct: int, area: float) -> str | None:
+    """Returns why a path with valid positions can not be stored, if it can't."""
+    if kind is _PathKind.LINE and distinct < MIN_LINE_POSITIONS:
+        return "LineString has fewer than 2 distinct positions"
+    if kind in (_PathKind.EXTERIOR, _PathKind.HOLE):
+        if distinct < MIN_RING_POSITIONS:
+            return "Polygon ring has fewer than 3 distinct positions"
+        if area == 0:
+            return "Polygon ring has no area"
+    return None
+
+
+def _normalized_path(
+    path: Sequence[Position],
+    kind: _PathKind,
+    checks: _PathChecks,
+    span: tuple[int, int],
+) -> Sequence[Position]:
+    """Returns a path without duplicate positions, closed and wound if a ring.
+
+    The path itself is returned when it needs no change.
+    """
+    path_index, start = span
+    positions = path
+    if checks.removed[path_index]:
+        kept = checks.kept[start : start + len(path)]
+        positions = [
+            position for position, keep in zip(path, kept, strict=True) if keep
+        ]
+    if kind not in (_PathKind.EXTERIOR, _PathKind.HOLE):
+        return positions
+
+    closed = checks.closed[path_index]
+    reverse = (checks.area[path_index] < 0) == (kind is _PathKind.EXTERIOR)
+    # A ring closed in two dimensions may still differ in altitude.
+    if closed and not reverse and positions[-1] == positions[0]:
+        return positions
+    positions = list(positions)
+    if closed:
+        positions[-1] = list(positions[0])
+    else:
+        positions.append(list(positions[0]))
+    if reverse:
+        positions.reverse()
+    return positions
+
+
+def _flatten(geometries: Sequence[Geometry], errors: dict[int, str]) -> _Batch:
+    """Collects the paths of the geometries, skipping malformed positions."""
+    batch = _Batch()
+    for index, geometry in enumerate(geometries):
+        if isinstance(geometry, GeoJsonPoint):
+            paths = [(_PathKind.POINT, [geometry.coordinates])]
+        elif isinstance(geometry, GeoJsonLineString):
+            paths = [(_PathKind.LINE, geometry.coordinates)]
+        else:
+            paths = [
+                (_PathKind.HOLE if ring_index else _PathKind.EXTERIOR, ring)
+                for ring_index, ring in enumerate(geometry.coordinates)
+            ]
+        if not paths or not all(path for _, path in paths):
+            errors[index] = "Geometry has no positions"
+        elif any(
+            len(position) < MIN_COORDINATES for _, path in paths for position in path
+        ):
+            errors[index] = "Position has fewer than 2 coordinates"
+        else:
+            for kind, path in paths:
+                batch.add(index, kind, path)
+    return batch
+
+
+def normalize_geometries(
+    geometries: Sequence[Geometry],
+) -> tuple[dict[int, Geometry], dict[int, str]]:
+    """Validates and normalizes a batch of geometries.
+
+    Args:
+        geometries (Sequence[Geometry]): The geometries to check.
+
+    Returns:
+        tuple[dict[int, Geometry], dict[int, str]]: The normalized geometries,
+            and the reason each invalid geometry was rejected, by index.
+    """
+    errors: dict[int, str] = {}
+    batch = _flatten(geometries, errors)
+    if not batch.paths:
+        return {}, errors
+    checks = (_check_paths_numpy if np is not None else _check_paths_python)(batch)
+
+    coordinates: dict[int, list[Sequence[Position]]] = {}
+    for path_index, path in enumerate(batch.paths):
+        owner, kind = batch.owners[path_index], batch.kinds[path_index]
+        if owner in errors:
+            continue
+        error = (
+            _path_error(kind, checks.distinct[path_index], checks.area[path_index])
+            if checks.in_range[path_index]
+            else "Position out of range or not finite"
+        )
+        if error is None:
+            coordinates.setdefault(owner, []).append(
+                _normalized_path(
+                    path,
+                    kind,
+                    checks,
+                    (path_index, batch.starts[path_index]),
+                ),
+            )
+        else:
+            errors[owner] = error
+
+    normalized: dict[int, Geometry] = {}
+    for index, paths in coordinates.items():
+        if index in errors:
+            continue
+        geometry = geometries[index]
+        if isinstance(geometry, GeoJsonPoint):
+            normalized[index] = geometry
+        elif isinstance(geometry, GeoJsonLineString):
+            normalized[index] = _with_coordinates(geometry, paths[0])
+        else:
+            normalized[index] = _with_coordinates(geometry, paths)
+    return normalized, errors
+
+
+def _with_coordinates(geometry: Geometry, coordinates: Sequence[object]) -> Geometry:
+    """Returns the geometry with new coordinates, itself if they did not change.
+
+    The coordinates were already validated, so the copy skips validation.
+    """
+    current = geometry.coordinates
+    if (
+        coordinates is current
+        or isinstance(geometry, GeoJsonPolygon)
+        and all(new is old for new, old in zip(coordinates, current, strict=True))
+    ):
+        return geometry
+    return geometry.copy(update={"coordinates": list(coordinates)})
+
+
+def normalize_geometry(geometry: Geometry) -> Geometry:
+    """Validates and normalizes a single geometry.
+
+    Args:
+        geometry (Geometry): The geometry to check.
+
+    Raises:
+        ValueError: If the geometry is invalid.
+
+    Returns:
+        Geometry: The normalized geometry.
+    """
+    normalized, errors = normalize_geometries([geometry])
+    if errors:
+        raise ValueError(errors[0])
+    return normalized[0]
@@ -0,0 +1,124 @@
+"""Implements the Well-Known Binary encoding of the stored GeoJSON geometries.
+
+Only the two dimensional Point, LineString and Polygon types the store supports
+are handled. Coordinates are packed with `array('d')`, so encoding and decoding
+a path is a single copy instead of one float conversion per coordinate.
+"""
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from itertools import chain
+from typing import Any, Literal
+
+WKB_TYPES = {"Point": 1, "LineString": 2, "Polygon": 3}
+GEOJSON_TYPES = {code: name for name, code in WKB_TYPES.items()}
+LITTLE_ENDIAN = 1
+
+_HEADER = struct.Struct("<BI")
+_COUNT = struct.Struct("<I")
+
+
+def _pack_path(positions: Sequence[Sequence[float]]) -> bytes:
+    """Returns the count and little-endian x/y coordinates of a path."""
+    coordinates = array(
+        "d",
+        chain.from_iterable(
+            position if len(position) == 2 else position[:2]  # noqa: PLR2004
+            for position in positions
+        ),
+    )
+    if sys.byteorder == "big":  # pragma: no cover
+        coordinates.byteswap()
+    return _COUNT.pack(len(positions)) + coordinates.tobytes()
+
+
+def encode_wkb(geometry: Mapping[str, Any]) -> bytes:
+    """Encodes a GeoJSON geometry as little-endian WKB.
+
+    Positions with more than two coordinates are written in two dimensions.
+
+    Args:
+        geometry (Mapping[str, Any]): The GeoJSON geometry.
+
+    Raises:
+        ValueError: If the geometry type is not supported.
+
+    Returns:
+        bytes: The WKB geometry.
+    """
+    geo_type = geometry["type"]
+    if geo_type not in WKB_TYPES:
+        msg = f"Unsupported geometry type: {geo_type}"
+        raise ValueError(msg)
+    header = _HEADER.pack(LITTLE_ENDIAN, WKB_TYPES[geo_type])
+    coordinates = geometry["coordinates"]
+    if geo_type == "Point":
+        return header + _pack_path([coordinates])[_COUNT.size :]
+    if geo_type == "LineString":
+        return header + _pack_path(coordinates)
+    return b"".join(
+        [header, _COUNT.pack(len(coordinates)), *map(_pack_path, coordinates)],
+    )
+
+
+def _read_path(
+    data: bytes | memoryview,
+    offset: int,
+    count: int,
+    byteorder: Literal["little", "big"],
+) -> tuple[list[list[float]], int]:
+    """Reads `count` x/y positions and returns them with the next offset."""
+    end = offset + 16 * count
+    if end > len(data):
+        msg = "WKB geometry is cut short"
+        raise ValueError(msg)
+    coordinates = array("d", data[offset:end])
+    if byteorder != sys.byteorder:
+        coordinates.byteswap()
+    values = iter(coordinates.tolist())
+    return [[x, y] for x, y in zip(values, values, strict=True)], end
+
+
+def decode_wkb(data: bytes | memoryview) -> dict[str, Any]:
+    """Decodes a two dimensional WKB Point, LineString or Polygon.
+
+    Args:
+        data (bytes | memoryview): The WKB geometry.
+
+    Raises:
+        ValueError: If the geometry type is not supported or the data is cut.
+
+    Returns:
+        dict[str, Any]: The GeoJSON geometry.
+    """
+    if len(data) < _HEADER.size:
+        msg = "WKB geometry is too short"
+        raise ValueError(msg)
+    byteorder: Literal["little", "big"] = (
+        "little" if data[0] == LITTLE_ENDIAN else "big"
+    )
+    prefix = "<" if byteorder == "little" else ">"
+    code = int.from_bytes(data[1:5], byteorder)
+    if code not in GEOJSON_TYPES:
+        msg = f"Unsupported WKB geometry type: {code}"
+        raise ValueError(msg)
+    geo_type = GEOJSON_TYPES[code]
+
+    try:
+        if geo_type == "Point":
+            point, _ = _read_path(data, 5, 1, byteorder)
+            return {"type": geo_type, "coordinates": point[0]}
+        (count,) = struct.unpack_from(f"{prefix}I", data, 5)
+        if geo_type == "LineString":
+            line, _ = _read_path(data, 9, count, byteorder)
+            return {"type": geo_type, "coordinates": line}
+        rings, offset = [], 9
+        for _ in range(count):
+            (length,) = struct.unpack_from(f"{prefix}I", data, offset)
+            ring, offset = _read_path(data, offset + 4, length, byteorder)
+            rings.append(ring)
+    except struct.error as error:
+        msg = "WKB geometry is cut short"
+        raise ValueError(msg) from error
+    return {"type": geo_type, "coordinates": rings}
@@ -8,7 +8,7 @@ import pytest_asyncio
 from beanie import init_beanie
 from mongomock_motor import AsyncMongoMockClient
 
-from feature_store.server.database import DBFeature
+from feature_store.server.database import DBFeature, DBFeatureLOD
 
 
 @pytest_asyncio.fixture(autouse=True)
@@ -17,7 +17,7 @@ async def setup_db() -> None:
     client = AsyncMongoMockClient()
     await init_beanie(
         database=client.test_db,
-        document_models=[DBFeature],  # type: ignore
+        document_models=[DBFeature, DBFeatureLOD],  # type: ignore
     )
 
 
@@ -0,0 +1,19 @@
+"""Test configuration for the end-to-end tests."""
+import httpx
+import pytest
+
+from feature_store.server import migrate
+
+HOST = "http://localhost:8000"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _migrated_database() -> None:
+    """Builds the indexes of the server's database, as a deployment would.
+
+    The server only serves geospatial queries with its indexes, and reports
+    itself ready once they exist.
+    """
+    assert migrate.main(["--skip-backfill"]) == 0
+    with httpx.Client(base_url=HOST) as client:
+        assert client.get("/ready").status_code == 200
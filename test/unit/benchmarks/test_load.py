@@ -0,0 +1,65 @@
+"""Implements tests for the load benchmark."""
+import importlib
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pytest_mock import MockerFixture
+
+sys.path.insert(0, str(Path(__file__).parents[3] / "benchmarks"))
+load = importlib.import_module("load")
+
+
+def _metrics(requests: int, throughput: float, p95_ms: float) -> dict[str, float]:
+    """Returns the results of a scenario."""
+    return {
+        "requests": requests,
+        "throughput": throughput,
+        "p50_ms": p95_ms / 2,
+        "p95_ms": p95_ms,
+        "p99_ms": p95_ms,
+    }
+
+
+def test_compare_flags_regressions_past_the_tolerance() -> None:
+    """Tests sampled scenarios regress past the tolerance, on any metric."""
+    baseline = {"get_by_id": _metrics(500, 100, 10)}
+    assert (
+        load.compare({"get_by_id": _metrics(500, 95, 10.5)}, baseline, 0.1, 0.3) == []
+    )
+    assert load.compare(
+        {"get_by_id": _metrics(500, 84, 12)},
+        baseline,
+        0.1,
+        0.3,
+    ) == ["get_by_id throughput -16%", "get_by_id p95 +20%"]
+
+
+def test_compare_allows_noise_in_scenarios_with_few_samples() -> None:
+    """Tests scenarios of few requests only regress past the noise tolerance."""
+    baseline = {"ingest": _metrics(10, 100, 10)}
+    assert load.compare({"ingest": _metrics(10, 84, 20)}, baseline, 0.1, 0.3) == []
+    assert load.compare({"ingest": _metrics(10, 60, 10)}, baseline, 0.1, 0.3) == [
+        "ingest throughput -40%",
+    ]
+
+
+def test_main_exits_with_status_1_on_regressions(
+    mocker: MockerFixture,
+    tmp_path: Path,
+) -> None:
+    """Tests a regression against the baseline fails the run."""
+    report: dict[str, Any] = {"results": {"get_by_id": _metrics(500, 100, 10)}}
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+    mocker.patch.object(load, "benchmark", mocker.AsyncMock(return_value=report))
+
+    load.main(["--baseline", str(baseline)])
+
+    report = {"results": {"get_by_id": _metrics(500, 50, 10)}}
+    mocker.patch.object(load, "benchmark", mocker.AsyncMock(return_value=report))
+    with pytest.raises(SystemExit) as exit_info:
+        load.main(["--baseline", str(baseline)])
+    assert exit_info.value.code == 1
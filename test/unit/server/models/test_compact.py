@@ -0,0 +1,77 @@
+"""Implements tests for the compact geometry."""
+import json
+from typing import Any
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from feature_store.server.models.compact import CompactGeometry
+from feature_store.server.models.geojson import GeoJsonPolygon, GeometryType
+
+SQUARE = [[-10.0, -10.0], [10.0, -10.0], [10.0, 10.0], [-10.0, 10.0], [-10.0, -10.0]]
+HOLE = [[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0, -1.0]]
+
+
+class _Shape(BaseModel):
+    """Holds a compact geometry field."""
+
+    geometry: CompactGeometry
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        {"type": "Point", "coordinates": [1.5, -2.0]},
+        {"type": "LineString", "coordinates": [[0.0, 0.0], [1.0, 1e-7]]},
+        {"type": "Polygon", "coordinates": [SQUARE, HOLE]},
+        {"type": "LineString", "coordinates": [[0.0, 0.0, 10.0], [1.0, 1.0, 12.5]]},
+    ],
+)
+def test_compact_geometry_round_trips(geometry: dict[str, Any]) -> None:
+    """Tests geometries serialize back to the GeoJSON they were parsed from."""
+    compact = CompactGeometry.validate(geometry)
+    assert json.loads(compact.to_json()) == geometry
+    assert compact.to_list() == geometry["coordinates"]
+    assert compact.to_model().dict(by_alias=True) == geometry
+
+
+def test_compact_geometry_stores_paths_in_one_buffer() -> None:
+    """Tests every ring of a polygon shares the flat buffer."""
+    compact = CompactGeometry.validate(
+        {"type": "Polygon", "coordinates": [SQUARE, HOLE]},
+    )
+    assert compact.geo_type == GeometryType.POLYGON
+    assert compact.offsets == [0, 5, 9]
+    assert len(compact) == 9
+    assert len(compact.coordinates) == 18
+
+
+def test_compact_geometry_from_model() -> None:
+    """Tests a Pydantic model converts to an equal compact geometry."""
+    model = GeoJsonPolygon(coordinates=[SQUARE])
+    assert CompactGeometry.from_model(model) == CompactGeometry.validate(
+        {"type": "Polygon", "coordinates": [SQUARE]},
+    )
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        {"type": "Point", "coordinates": [1.0]},
+        {"type": "Point", "coordinates": ["a", "b"]},
+        {"type": "LineString", "coordinates": [[0.0, 0.0]]},
+        {"type": "LineString", "coordinates": [[0.0, 0.0], [1.0, 1.0, 1.0]]},
+        {"type": "LineString", "coordinates": [0.0, 1.0]},
+        {"type": "LineString", "coordinates": [[0.0, 0.0], [1.0, float("nan")]]},
+        {"type": "Point", "coordinates": [float("inf"), 0.0]},
+        {"type": "Polygon", "coordinates": [SQUARE, [[*p, 0.0] for p in HOLE]]},
+        {"type": "Polygon", "coordinates": [[[0.0, 0.0], [1.0, 0.0], [0.0, 0.0]]]},
+        {"type": "Polygon", "coordinates": []},
+        {"type": "Circle", "coordinates": [0.0, 0.0]},
+        {"coordinates": [0.0, 0.0]},
+    ],
+)
+def test_compact_geometry_rejects_invalid_geometries(geometry: dict[str, Any]) -> None:
+    """Tests malformed geometries fail Pydantic validation."""
+    with pytest.raises(ValidationError):
+        _Shape(geometry=geometry)
@@ -0,0 +1,92 @@
+"""Implements tests for the binary export endpoints."""
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from feature_store.server import flatgeobuf
+from feature_store.server.app import app
+from feature_store.server.flatgeobuf import read_flatgeobuf
+from feature_store.server.geoparquet import read_geoparquet
+
+client = TestClient(app)
+EXPORT_ROUTE = "/features/export"
+
+
+def _post_features() -> list[str]:
+    """Inserts a road and a river and returns their ids."""
+    result = client.post(
+        "/features/bulk",
+        json={
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [1.0, 2.0]},
+                    "properties": {"class": "road"},
+                },
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": [[0.0, 0.0], [3.0, 3.0]],
+                    },
+                    "properties": {"class": "river", "name": "Rhine"},
+                },
+            ],
+        },
+    )
+    ids: list[str] = result.json()["inserted_ids"]
+    return ids
+
+
+def test_export_flatgeobuf() -> None:
+    """Tests the filtered features are exported as FlatGeobuf."""
+    road_id, river_id = _post_features()
+
+    result = client.get(f"{EXPORT_ROUTE}/flatgeobuf")
+    assert result.status_code == 200
+    assert result.headers["content-type"] == flatgeobuf.MEDIA_TYPE
+    assert "features.fgb" in result.headers["content-disposition"]
+    features = list(read_flatgeobuf(io.BytesIO(result.content)))
+    assert sorted(feature["_id"] for feature in features) == sorted(
+        [road_id, river_id],
+    )
+
+    result = client.get(
+        f"{EXPORT_ROUTE}/flatgeobuf",
+        params={"filter": "class:eq:river"},
+    )
+    features = list(read_flatgeobuf(io.BytesIO(result.content)))
+    assert features == [
+        {
+            "type": "Feature",
+            "_id": river_id,
+            "geometry": {"type": "LineString", "coordinates": [[0.0, 0.0], [3.0, 3.0]]},
+            "properties": {"class": "river", "name": "Rhine"},
+        },
+    ]
+
+
+def test_export_geoparquet() -> None:
+    """Tests the features are exported as GeoParquet with a column per key."""
+    pytest.importorskip("pyarrow")
+    road_id, river_id = _post_features()
+
+    result = client.get(f"{EXPORT_ROUTE}/geoparquet")
+    assert result.status_code == 200
+    features = list(read_geoparquet(io.BytesIO(result.content)))
+    assert [feature["_id"] for feature in features] == [road_id, river_id]
+    assert features[0]["properties"] == {"class": "road"}
+    assert features[1]["properties"] == {"class": "river", "name": "Rhine"}
+
+
+def test_export_geoparquet_requires_pyarrow(mocker: MockerFixture) -> None:
+    """Tests the GeoParquet export is not implemented without pyarrow."""
+    mocker.patch(
+        "feature_store.server.routes.export.geoparquet_available",
+        return_value=False,
+    )
+    result = client.get(f"{EXPORT_ROUTE}/geoparquet")
+    assert result.status_code == 501
@@ -1,9 +1,20 @@
 """Implements tests for the features endpoint."""
+import base64
+import copy
+import json
+from collections.abc import Callable
+from typing import Any
 
 import pytest
+from beanie import PydanticObjectId
 from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
 
 from feature_store.server.app import app
+from feature_store.server.cache import QueryCache
+from feature_store.server.database import DBFeature, read_collection
+from feature_store.server.models.compact import CompactGeometry
+from feature_store.server.routes import features as routes_features
 
 client = TestClient(app)
 FEATURES_ROUTE = "/features"
@@ -12,8 +23,8 @@ FEATURES_ROUTE = "/features"
 def test_get_features() -> None:
     """Tests the features endpoint."""
     result = client.get(FEATURES_ROUTE)
-    assert result.status_code == 404
-    assert result.json() == {"detail": "No features found!"}
+    assert result.status_code == 200
+    assert result.json() == []
 
 
 def test_put_feature() -> None:
@@ -46,6 +57,24 @@ def test_put_feature() -> None:
     assert result.json()["_id"] is not None
 
 
+def test_update_feature_returns_the_stored_document() -> None:
+    """Tests an update answers with the feature as it was stored."""
+    feature = {
+        "type": "Feature",
+        "properties": {"name": "before"},
+        "geometry": {"type": "Point", "coordinates": [1.0, 2.0]},
+    }
+    feature_id = client.post(FEATURES_ROUTE, json=feature).json()["_id"]
+
+    result = client.put(
+        f"{FEATURES_ROUTE}/{feature_id}",
+        json={"properties": {"name": "after"}},
+    )
+    assert result.status_code == 200
+    assert result.json()["revision"] == 2
+    assert result.json() == client.get(f"{FEATURES_ROUTE}/{feature_id}").json()
+
+
 def test_put_then_delete_multiple_features(geojson_features: dict[str, object]) -> None:
     """Inserts multiple features, then deletes them."""
     inserted_feature_ids = []
@@ -119,3 +148,878 @@ def test_get_geo_intersects(
     )
     assert result.status_code == 200
     assert len(result.json()) == 2
+
+
+@pytest.mark.xfail(reason="Not implemented in MongoMock yet")
+def test_join_features_by_intersects(
+    geospatial_query_features: dict[str, dict[str, Any]],
+) -> None:
+    """Tests the features intersecting each region are listed by region name."""
+    for key in ["point", "line", "box"]:
+        client.post(FEATURES_ROUTE, json=geospatial_query_features[key])
+
+    regions = [
+        {"name": key, "geometry": geospatial_query_features[key]["geometry"]}
+        for key in ["outer-box", "box"]
+    ]
+    result = client.post(
+        f"{FEATURES_ROUTE}/geospatial/intersects/batch",
+        json={"regions": regions},
+    )
+    assert result.status_code == 200
+    assert {name: len(ids) for name, ids in result.json()["matches"].items()} == {
+        "outer-box": 2,
+        "box": 1,
+    }
+
+
+def test_join_features_fetches_shared_features_once(
+    geojson_features: list[dict[str, object]],
+    mocker: MockerFixture,
+) -> None:
+    """Tests features matching several regions are returned once."""
+    mocker.patch(
+        "feature_store.server.routes.features.intersects_query",
+        return_value={},
+    )
+    mocker.patch("feature_store.server.routes.features.bulk_chunk_size", 2)
+    collection = {"type": "FeatureCollection", "features": geojson_features}
+    ids = client.post(f"{FEATURES_ROUTE}/bulk", json=collection).json()["inserted_ids"]
+    region = {
+        "type": "Polygon",
+        "coordinates": [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]],
+    }
+
+    result = client.post(
+        f"{FEATURES_ROUTE}/geospatial/intersects/batch",
+        json={
+            "regions": [{"name": name, "geometry": region} for name in "abc"],
+            "include_features": True,
+        },
+    )
+    assert result.status_code == 200
+    assert result.json()["truncated"] == []
+    assert {name: sorted(ids) for name, ids in result.json()["matches"].items()} == {
+        name: sorted(ids) for name in "abc"
+    }
+    assert sorted(feature["_id"] for feature in result.json()["features"]) == sorted(
+        ids,
+    )
+
+
+def test_join_features_truncates_large_regions(
+    geojson_features: list[dict[str, object]],
+    mocker: MockerFixture,
+) -> None:
+    """Tests regions matching more features than the largest page are truncated."""
+    mocker.patch(
+        "feature_store.server.routes.features.intersects_query",
+        return_value={},
+    )
+    mocker.patch("feature_store.server.routes.features.max_page_size", 1)
+    collection = {"type": "FeatureCollection", "features": geojson_features}
+    client.post(f"{FEATURES_ROUTE}/bulk", json=collection)
+    region = {
+        "type": "Polygon",
+        "coordinates": [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]],
+    }
+
+    result = client.post(
+        f"{FEATURES_ROUTE}/geospatial/intersects/batch",
+        json={"regions": [{"name": "all", "geometry": region}]},
+    )
+    assert result.json()["truncated"] == ["all"]
+    assert len(result.json()["matches"]["all"]) == 1
+    assert result.json()["features"] is None
+
+
+def test_join_features_rejects_invalid_regions() -> None:
+    """Tests invalid region geometries and duplicate names are rejected."""
+    region = {
+        "type": "Polygon",
+        "coordinates": [[[0.0, 0.0], [1.0, 0.0], [1.0, 0.0], [0.0, 0.0]]],
+    }
+    result = client.post(
+        f"{FEATURES_ROUTE}/geospatial/intersects/batch",
+        json={"regions": [{"name": "empty", "geometry": region}]},
+    )
+    assert result.status_code == 400
+    assert result.json()["detail"] == {
+        "empty": "Polygon ring has fewer than 3 distinct positions",
+    }
+
+    result = client.post(
+        f"{FEATURES_ROUTE}/geospatial/intersects/batch",
+        json={"regions": [{"name": "a", "geometry": region}] * 2},
+    )
+    assert result.status_code == 422
+
+
+def test_post_feature_collection(geojson_features: list[dict[str, object]]) -> None:
+    """Inserts a FeatureCollection in chunks, then reads the features back."""
+    collection = {"type": "FeatureCollection", "features": geojson_features}
+    result = client.post(
+        f"{FEATURES_ROUTE}/bulk",
+        params={"chunk_size": 2},
+        json=collection,
+    )
+    assert result.status_code == 200
+    assert result.json()["inserted_count"] == len(geojson_features)
+    assert result.json()["errors"] == []
+
+    for feature_id, feature in zip(
+        result.json()["inserted_ids"],
+        geojson_features,
+        strict=True,
+    ):
+        get_result = client.get(f"{FEATURES_ROUTE}/{feature_id}")
+        assert get_result.status_code == 200
+        assert get_result.json()["geometry"] == feature["geometry"]
+
+
+def test_post_feature_collection_reports_failures_by_index(
+    geojson_features: list[dict[str, object]],
+    mocker: MockerFixture,
+) -> None:
+    """Tests a rejected feature does not abort the rest of the bulk insert."""
+    existing = client.post(FEATURES_ROUTE, json=geojson_features[0])
+    existing_id = PydanticObjectId(existing.json()["_id"])
+    new_ids = [PydanticObjectId() for _ in geojson_features]
+    new_ids[1] = existing_id
+    mocker.patch(
+        "feature_store.server.ingest.PydanticObjectId",
+        side_effect=new_ids,
+    )
+
+    collection = {"type": "FeatureCollection", "features": geojson_features}
+    result = client.post(f"{FEATURES_ROUTE}/bulk", json=collection)
+    assert result.status_code == 200
+    assert result.json()["inserted_count"] == len(geojson_features) - 1
+    assert str(existing_id) not in result.json()["inserted_ids"]
+    assert [error["index"] for error in result.json()["errors"]] == [1]
+
+
+def test_post_feature_collection_rejects_invalid_geometries(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests invalid geometries are reported before the batch reaches the database."""
+    invalid = {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [200.0, 0.0]},
+        "properties": {},
+    }
+    collection = {"type": "FeatureCollection", "features": [invalid, *geojson_features]}
+    result = client.post(f"{FEATURES_ROUTE}/bulk", json=collection)
+    assert result.status_code == 200
+    assert result.json()["inserted_count"] == len(geojson_features)
+    (error,) = result.json()["errors"]
+    assert error["index"] == 0
+    assert error["message"] == "Position out of range or not finite"
+
+
+def test_post_feature_normalizes_polygon() -> None:
+    """Tests a polygon is closed and wound counterclockwise before it is stored."""
+    feature = {
+        "type": "Feature",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0.0, 0.0], [0.0, 1.0], [1.0, 1.0], [1.0, 0.0]]],
+        },
+        "properties": {},
+    }
+    result = client.post(FEATURES_ROUTE, json=feature)
+    assert result.status_code == 200
+    assert result.json()["geometry"]["coordinates"] == [
+        [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]],
+    ]
+
+    feature["geometry"]["coordinates"] = [[[0.0, 0.0], [1.0, 1.0], [0.0, 0.0]]]
+    result = client.post(FEATURES_ROUTE, json=feature)
+    assert result.status_code == 400
+    assert result.json()["detail"] == (
+        "Invalid geometry: Polygon ring has fewer than 3 distinct positions"
+    )
+
+
+def test_upload_feature_collection(
+    geojson_features: list[dict[str, object]],
+    mocker: MockerFixture,
+) -> None:
+    """Tests uploaded features are inserted while the body is streamed."""
+    to_model = mocker.spy(CompactGeometry, "to_model")
+    features = [*geojson_features, {"type": "Feature", "properties": {}}]
+    body = json.dumps({"type": "FeatureCollection", "features": features}).encode()
+
+    result = client.post(
+        f"{FEATURES_ROUTE}/upload",
+        params={"chunk_size": 2},
+        content=(body[start : start + 100] for start in range(0, len(body), 100)),
+    )
+    assert result.status_code == 200
+    assert result.json()["inserted_count"] == len(geojson_features)
+    assert result.json()["failed_count"] == 1
+    (error,) = result.json()["errors"]
+    assert error["index"] == len(geojson_features)
+    assert error["offset"] == body.rindex(b'{"type": "Feature"')
+    assert "geometry" in error["message"]
+    assert len(client.get(FEATURES_ROUTE).json()) == len(geojson_features)
+    assert to_model.call_count == len(geojson_features)
+
+
+def test_upload_feature_collection_stops_at_malformed_json(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests a malformed body ends the upload, keeping the features before it."""
+    body = json.dumps({"features": geojson_features[:2]}).encode()[:-2] + b",}]}"
+
+    result = client.post(f"{FEATURES_ROUTE}/upload", content=body)
+    assert result.status_code == 400
+    assert result.json()["detail"] == {
+        "message": "Expecting value",
+        "offset": len(body) - 3,
+        "inserted_count": 2,
+    }
+
+
+def test_get_features_streams_ndjson(geojson_features: list[dict[str, object]]) -> None:
+    """Tests features can be streamed as newline delimited JSON."""
+    inserted_ids = [
+        client.post(FEATURES_ROUTE, json=feature).json()["_id"]
+        for feature in geojson_features
+    ]
+
+    result = client.get(FEATURES_ROUTE, params={"stream": "ndjson"})
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "application/x-ndjson"
+    streamed = [json.loads(line) for line in result.text.splitlines()]
+    assert set(inserted_ids) <= {feature["_id"] for feature in streamed}
+
+
+def test_get_features_streams_geojson(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests features can be streamed as a GeoJSON FeatureCollection."""
+    inserted_ids = [
+        client.post(FEATURES_ROUTE, json=feature).json()["_id"]
+        for feature in geojson_features
+    ]
+
+    result = client.get(FEATURES_ROUTE, params={"stream": "geojson"})
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "application/geo+json"
+    assert result.json()["type"] == "FeatureCollection"
+    streamed = {feature["_id"]: feature for feature in result.json()["features"]}
+    for feature_id, feature in zip(inserted_ids, geojson_features, strict=True):
+        assert streamed[feature_id]["geometry"] == feature["geometry"]
+
+
+def test_get_features_pages_with_cursor(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests every feature is returned exactly once when paging with a cursor."""
+    inserted_ids = {
+        client.post(FEATURES_ROUTE, json=feature).json()["_id"]
+        for feature in geojson_features
+    }
+
+    paged_ids: list[str] = []
+    params: dict[str, str | int] = {"limit": 2}
+    while True:
+        result = client.get(FEATURES_ROUTE, params=params)
+        assert result.status_code == 200
+        assert len(result.json()) <= 2
+        paged_ids.extend(feature["_id"] for feature in result.json())
+        next_cursor = result.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            break
+        params = {"limit": 2, "after": next_cursor}
+
+    assert len(paged_ids) == len(set(paged_ids))
+    assert paged_ids == sorted(paged_ids)
+    assert inserted_ids <= set(paged_ids)
+
+
+def test_get_features_streams_pages_with_cursor(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests streamed pages return the cursor of the next page, as lists do."""
+    for feature in geojson_features:
+        client.post(FEATURES_ROUTE, json=feature)
+    listed_ids = [feature["_id"] for feature in client.get(FEATURES_ROUTE).json()]
+
+    paged_ids: list[str] = []
+    params: dict[str, str | int] = {"limit": 2}
+    while True:
+        result = client.get(FEATURES_ROUTE, params={**params, "stream": "ndjson"})
+        assert result.status_code == 200
+        page = [json.loads(line)["_id"] for line in result.text.splitlines()]
+        assert len(page) <= 2
+        paged_ids.extend(page)
+        next_cursor = result.headers.get("X-Next-Cursor")
+        listed = client.get(FEATURES_ROUTE, params=params)
+        assert next_cursor == listed.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            break
+        params = {"limit": 2, "after": next_cursor}
+
+    assert paged_ids == sorted(listed_ids)
+
+
+def test_get_features_empty_page_is_empty_list(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests a page past the last feature is an empty list."""
+    for feature in geojson_features:
+        client.post(FEATURES_ROUTE, json=feature)
+    last_page = client.get(FEATURES_ROUTE, params={"limit": 10_000})
+    assert "X-Next-Cursor" not in last_page.headers
+    last_id = last_page.json()[-1]["_id"]
+
+    cursor = base64.urlsafe_b64encode(bytes.fromhex(last_id)).decode().rstrip("=")
+    result = client.get(FEATURES_ROUTE, params={"limit": 2, "after": cursor})
+    assert result.status_code == 200
+    assert result.json() == []
+
+
+def test_get_features_rejects_invalid_cursor() -> None:
+    """Tests a malformed cursor is rejected."""
+    result = client.get(FEATURES_ROUTE, params={"limit": 2, "after": "not-a-cursor"})
+    assert result.status_code == 400
+
+
+def test_get_geo_intersects_is_served_from_cache(
+    geospatial_query_features: dict[str, dict[str, Any]],
+    mocker: MockerFixture,
+) -> None:
+    """Tests repeated intersects queries skip the database until a write."""
+    mocker.patch(
+        "feature_store.server.routes.features.query_cache",
+        QueryCache(max_bytes=1_000_000),
+    )
+    find_page = mocker.patch(
+        "feature_store.server.routes.features.find_page",
+        return_value=([], None),
+    )
+    polygon = geospatial_query_features["outer-box"]["geometry"]
+
+    for _ in range(3):
+        result = client.post(f"{FEATURES_ROUTE}/geospatial/intersects", json=polygon)
+        assert result.status_code == 200
+    assert find_page.await_count == 1
+
+    inside = client.post(FEATURES_ROUTE, json=geospatial_query_features["point"])
+    assert inside.status_code == 200
+    client.post(f"{FEATURES_ROUTE}/geospatial/intersects", json=polygon)
+    assert find_page.await_count == 2
+
+    stats = client.get(f"{FEATURES_ROUTE}/geospatial/cache").json()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 2, 1)
+
+
+def test_post_feature_stores_bounds(
+    geospatial_query_features: dict[str, dict[str, Any]],
+) -> None:
+    """Tests the bounding box of a feature is precomputed at insert and update."""
+    result = client.post(FEATURES_ROUTE, json=geospatial_query_features["point"])
+    assert result.json()["bounds"] == {
+        "min_x": 0.0,
+        "min_y": 0.0,
+        "max_x": 0.0,
+        "max_y": 0.0,
+    }
+
+    feature_id = result.json()["_id"]
+    update = {"geometry": {"type": "Point", "coordinates": [5.0, 6.0]}}
+    result = client.put(f"{FEATURES_ROUTE}/{feature_id}", json=update)
+    assert result.json()["bounds"] == {
+        "min_x": 5.0,
+        "min_y": 6.0,
+        "max_x": 5.0,
+        "max_y": 6.0,
+    }
+
+
+def test_get_features_by_bbox(
+    geospatial_query_features: dict[str, dict[str, Any]],
+) -> None:
+    """Tests features inside a rectangle are found from their bounding boxes."""
+    inside_ids = {
+        client.post(FEATURES_ROUTE, json=geospatial_query_features[key]).json()["_id"]
+        for key in ["point", "line", "box"]
+    }
+    far_away = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "Point", "coordinates": [100.0, 50.0]},
+    }
+    client.post(FEATURES_ROUTE, json=far_away)
+
+    result = client.get(FEATURES_ROUTE, params={"bbox": "-5,-5,5,5"})
+    assert result.status_code == 200
+    assert {feature["_id"] for feature in result.json()} == inside_ids
+
+
+@pytest.mark.xfail(reason="Not implemented in MongoMock yet")
+def test_get_features_by_wide_bbox_follows_its_latitudes() -> None:
+    """Tests features crossing the middle of a wide rectangle's edges are found."""
+    crossing = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "LineString", "coordinates": [[45, 39], [45, 40.5]]},
+    }
+    feature_id = client.post(FEATURES_ROUTE, json=crossing).json()["_id"]
+    outside = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "LineString", "coordinates": [[45, 60.5], [45, 62]]},
+    }
+    client.post(FEATURES_ROUTE, json=outside)
+
+    result = client.get(FEATURES_ROUTE, params={"bbox": "0,40,90,60"})
+    assert result.status_code == 200
+    assert [feature["_id"] for feature in result.json()] == [feature_id]
+
+
+@pytest.mark.parametrize("bbox", ["1,2,3", "a,b,c,d", "5,5,-5,-5", "-200,0,0,10"])
+def test_get_features_rejects_invalid_bbox(bbox: str) -> None:
+    """Tests malformed bounding boxes are rejected."""
+    result = client.get(FEATURES_ROUTE, params={"bbox": bbox})
+    assert result.status_code == 400
+
+
+def test_get_feature_at_level_of_detail() -> None:
+    """Tests coarser levels of detail return fewer vertices than the full geometry."""
+    coordinates = [[index / 100, 0.001 * (index % 2)] for index in range(200)]
+    feature = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+    }
+    feature_id = client.post(FEATURES_ROUTE, json=feature).json()["_id"]
+
+    full = client.get(f"{FEATURES_ROUTE}/{feature_id}", params={"lod": 0})
+    assert full.json()["geometry"]["coordinates"] == coordinates
+
+    coarse = client.get(f"{FEATURES_ROUTE}/{feature_id}", params={"lod": 4})
+    assert len(coarse.json()["geometry"]["coordinates"]) < len(coordinates)
+
+    listed = client.get(FEATURES_ROUTE, params={"lod": 4}).json()
+    assert listed[0]["geometry"] == coarse.json()["geometry"]
+
+    streamed = client.get(FEATURES_ROUTE, params={"lod": 4, "stream": "ndjson"})
+    assert json.loads(streamed.text)["geometry"] == coarse.json()["geometry"]
+
+    result = client.get(FEATURES_ROUTE, params={"lod": 99})
+    assert result.status_code == 422
+
+
+def test_get_features_at_level_of_detail_skips_full_geometries(
+    mocker: MockerFixture,
+) -> None:
+    """Tests reads at a level of detail only read full geometries without a LOD."""
+    coordinates = [[index / 100, 0.001 * (index % 2)] for index in range(200)]
+    line = {"type": "LineString", "coordinates": coordinates}
+    point = {"type": "Point", "coordinates": [1.0, 2.0]}
+    ids = [
+        client.post(
+            FEATURES_ROUTE,
+            json={"type": "Feature", "properties": {}, "geometry": geometry},
+        ).json()["_id"]
+        for geometry in (line, point)
+    ]
+    reads: list[tuple[dict[str, Any], dict[str, Any] | None]] = []
+    collection_type = type(read_collection(DBFeature))
+
+    def _record(method: Callable[..., object]) -> Callable[..., object]:
+        def _read(
+            collection: object,
+            query: dict[str, Any],
+            projection: dict[str, Any] | None = None,
+            **kwargs: object,
+        ) -> object:
+            reads.append((copy.deepcopy(query), copy.deepcopy(projection)))
+            return method(collection, query, projection, **kwargs)
+
+        return _read
+
+    for name in ("find", "find_one"):
+        read = _record(getattr(collection_type, name))
+        mocker.patch.object(collection_type, name, read)
+
+    for params in ({}, {"raw": True}, {"fields": "geometry"}, {"stream": "ndjson"}):
+        result = client.get(FEATURES_ROUTE, params={"lod": 4, **params})
+        assert result.status_code == 200
+    result = client.get(f"{FEATURES_ROUTE}/{ids[0]}", params={"lod": 4})
+    assert len(result.json()["geometry"]["coordinates"]) < len(coordinates)
+
+    geometry_reads = [
+        query
+        for query, projection in reads
+        if projection is None or projection.get("geometry", 0 in projection.values())
+    ]
+    assert geometry_reads
+    assert all(
+        query == {"_id": {"$in": [PydanticObjectId(ids[1])]}}
+        for query in geometry_reads
+    )
+
+
+def test_get_features_raw_matches_validated_response(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests raw documents are returned like the response model would return them."""
+    for feature in geojson_features:
+        client.post(FEATURES_ROUTE, json=feature)
+
+    validated = client.get(FEATURES_ROUTE, params={"limit": 2})
+    raw = client.get(FEATURES_ROUTE, params={"limit": 2, "raw": True})
+    assert raw.status_code == 200
+    assert raw.headers["content-type"] == "application/json"
+    assert raw.json() == validated.json()
+    assert raw.headers["X-Next-Cursor"] == validated.headers["X-Next-Cursor"]
+
+
+def test_update_and_delete_missing_feature() -> None:
+    """Tests writes to a feature that does not exist are not found."""
+    feature_id = str(PydanticObjectId())
+    result = client.put(f"{FEATURES_ROUTE}/{feature_id}", json={"properties": {}})
+    assert result.status_code == 404
+    result = client.delete(f"{FEATURES_ROUTE}/{feature_id}")
+    assert result.status_code == 404
+
+
+def test_patch_features_by_ids_and_properties(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests bulk updates apply to the listed or matching features only."""
+    feature_ids = [
+        client.post(FEATURES_ROUTE, json=feature).json()["_id"]
+        for feature in geojson_features
+    ]
+
+    result = client.patch(
+        f"{FEATURES_ROUTE}/bulk",
+        json={"ids": feature_ids[:2], "update": {"properties": {"group": "a"}}},
+    )
+    assert result.json() == {"matched_count": 2, "modified_count": 2}
+
+    point = {"type": "Point", "coordinates": [1.0, 2.0]}
+    result = client.patch(
+        f"{FEATURES_ROUTE}/bulk",
+        json={"properties": {"group": "a"}, "update": {"geometry": point}},
+    )
+    assert result.json() == {"matched_count": 2, "modified_count": 2}
+
+    features = {
+        feature["_id"]: feature for feature in client.get(FEATURES_ROUTE).json()
+    }
+    for feature_id in feature_ids[:2]:
+        assert features[feature_id]["geometry"] == point
+        assert features[feature_id]["bounds"]["min_x"] == 1.0
+    for feature_id in feature_ids[2:]:
+        assert features[feature_id]["geometry"] != point
+
+
+def test_patch_and_delete_features_by_properties_in_chunks(
+    geojson_features: list[dict[str, object]],
+    mocker: MockerFixture,
+) -> None:
+    """Tests selections by properties are written directly or in bounded chunks."""
+    mocker.patch("feature_store.server.routes.features.bulk_chunk_size", 1)
+    for feature in geojson_features:
+        client.post(FEATURES_ROUTE, json={**feature, "properties": {"group": "a"}})
+    resolve = mocker.spy(routes_features, "_selected_id_chunks")
+
+    result = client.patch(
+        f"{FEATURES_ROUTE}/bulk",
+        json={"properties": {"group": "a"}, "update": {"properties": {"group": "b"}}},
+    )
+    count = len(geojson_features)
+    assert result.json() == {"matched_count": count, "modified_count": count}
+    resolve.assert_not_called()
+
+    point = {"type": "Point", "coordinates": [1.0, 2.0]}
+    result = client.patch(
+        f"{FEATURES_ROUTE}/bulk",
+        json={"properties": {"group": "b"}, "update": {"geometry": point}},
+    )
+    assert result.json() == {"matched_count": count, "modified_count": count}
+    features = client.get(FEATURES_ROUTE).json()
+    assert {feature["revision"] for feature in features} == {3}
+    assert all(feature["geometry"] == point for feature in features)
+
+    result = client.request(
+        "DELETE",
+        f"{FEATURES_ROUTE}/bulk",
+        json={"properties": {"group": "b"}},
+    )
+    assert result.json() == {"deleted_count": count}
+    assert client.get(FEATURES_ROUTE).json() == []
+
+
+def test_delete_features_in_bulk(geojson_features: list[dict[str, object]]) -> None:
+    """Tests bulk deletes remove the listed features only."""
+    feature_ids = [
+        client.post(FEATURES_ROUTE, json=feature).json()["_id"]
+        for feature in geojson_features
+    ]
+
+    result = client.request(
+        "DELETE",
+        f"{FEATURES_ROUTE}/bulk",
+        json={"ids": feature_ids[:2]},
+    )
+    assert result.json() == {"deleted_count": 2}
+    remaining = {feature["_id"] for feature in client.get(FEATURES_ROUTE).json()}
+    assert remaining == set(feature_ids[2:])
+
+
+@pytest.mark.parametrize(
+    "selection",
+    [
+        {"properties": {"$where": "a"}, "update": {"properties": {"a": "b"}}},
+        {"properties": {"a.b": "c"}, "update": {"properties": {"a": "b"}}},
+        {"ids": [], "update": {"properties": {"$set": "a"}}},
+        {"ids": [], "update": {"properties": {"a.b": "c"}}},
+        {"ids": [], "update": {"properties": {"": "c"}}},
+    ],
+)
+def test_patch_features_rejects_unsafe_property_keys(
+    selection: dict[str, Any],
+) -> None:
+    """Tests bulk updates reject operators and paths as property names."""
+    result = client.patch(f"{FEATURES_ROUTE}/bulk", json=selection)
+    assert result.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "selection",
+    [{}, {"properties": {}}, {"ids": [], "properties": {"a": "b"}}],
+)
+def test_delete_features_requires_one_selection(selection: dict[str, Any]) -> None:
+    """Tests bulk writes must select features by ids or by properties."""
+    result = client.request("DELETE", f"{FEATURES_ROUTE}/bulk", json=selection)
+    assert result.status_code == 422
+
+
+def test_get_features_filtered_by_properties(
+    geojson_features: list[dict[str, Any]],
+) -> None:
+    """Tests property filters select the matching features only."""
+    names = ["Main Street", "Maine Road", "Elm Street", "Oak Road"]
+    for feature, name in zip(geojson_features, names, strict=True):
+        properties = {"name": name, "kind": name.split()[-1]}
+        client.post(FEATURES_ROUTE, json={**feature, "properties": properties})
+
+    def _names(*filters: str) -> set[str]:
+        result = client.get(FEATURES_ROUTE, params={"filter": list(filters)})
+        assert result.status_code == 200
+        return {feature["properties"]["name"] for feature in result.json()}
+
+    assert _names("kind:eq:Road") == {"Maine Road", "Oak Road"}
+    assert _names("name:in:Elm Street,Oak Road") == {"Elm Street", "Oak Road"}
+    assert _names("name:prefix:Main") == {"Main Street", "Maine Road"}
+    assert _names("name:prefix:Main", "kind:eq:Street") == {"Main Street"}
+    assert _names("name:prefix:.*") == set()
+
+
+def test_get_features_rejects_invalid_filter() -> None:
+    """Tests malformed property filters are rejected."""
+    result = client.get(FEATURES_ROUTE, params={"filter": "$where:eq:1"})
+    assert result.status_code == 400
+
+
+@pytest.mark.xfail(reason="Not implemented in MongoMock yet")
+def test_get_nearest_features(
+    geospatial_query_features: dict[str, dict[str, Any]],
+) -> None:
+    """Tests the nearest features are returned closest first, with their distance.
+
+    Note: GeoSpatial queries are not supported by MongoMock yet.
+    """
+    for key in ["point", "line", "box"]:
+        client.post(FEATURES_ROUTE, json=geospatial_query_features[key])
+
+    result = client.get(
+        f"{FEATURES_ROUTE}/geospatial/nearest",
+        params={"lon": 0, "lat": 0, "k": 2},
+    )
+    assert result.status_code == 200
+    distances = [feature["distance"] for feature in result.json()]
+    assert len(distances) == 2
+    assert distances == sorted(distances)
+
+
+@pytest.mark.parametrize(
+    ("params", "status_code"),
+    [
+        ({"lon": 200, "lat": 0}, 422),
+        ({"lon": 0, "lat": 0, "k": 0}, 422),
+        ({"lon": 0, "lat": 0, "min_distance": 10, "max_distance": 5}, 400),
+    ],
+)
+def test_get_nearest_features_rejects_invalid_search(
+    params: dict[str, float],
+    status_code: int,
+) -> None:
+    """Tests invalid points, counts and distance ranges are rejected."""
+    result = client.get(f"{FEATURES_ROUTE}/geospatial/nearest", params=params)
+    assert result.status_code == status_code
+
+
+@pytest.mark.xfail(reason="Not implemented in MongoMock yet")
+def test_get_feature_grid(
+    geospatial_query_features: dict[str, dict[str, Any]],
+) -> None:
+    """Tests the features intersecting a polygon are counted per grid cell.
+
+    Note: GeoSpatial queries are not supported by MongoMock yet.
+    """
+    for key in ["point", "line", "box"]:
+        client.post(FEATURES_ROUTE, json=geospatial_query_features[key])
+
+    result = client.post(
+        f"{FEATURES_ROUTE}/geospatial/grid",
+        params={"resolution": 10},
+        json=geospatial_query_features["outer-box"]["geometry"],
+    )
+    assert result.status_code == 200
+    assert sum(cell["count"] for cell in result.json()) > 0
+
+
+@pytest.mark.parametrize(
+    ("params", "status_code"),
+    [
+        ({"resolution": 0}, 422),
+        ({"resolution": 10, "group_by": "$kind"}, 400),
+        ({"resolution": 0.0001}, 400),
+    ],
+)
+def test_get_feature_grid_rejects_invalid_grid(
+    geospatial_query_features: dict[str, dict[str, Any]],
+    params: dict[str, float | str],
+    status_code: int,
+) -> None:
+    """Tests invalid resolutions, properties and oversized grids are rejected."""
+    result = client.post(
+        f"{FEATURES_ROUTE}/geospatial/grid",
+        params=params,
+        json=geospatial_query_features["outer-box"]["geometry"],
+    )
+    assert result.status_code == status_code
+
+
+def test_get_feature_answers_conditional_requests(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests features carry validators and unchanged features are not resent."""
+    created = client.post(FEATURES_ROUTE, json=geojson_features[0]).json()
+    assert created["revision"] == 1
+    route = f"{FEATURES_ROUTE}/{created['_id']}"
+
+    result = client.get(route)
+    etag = result.headers["ETag"]
+    assert result.headers["Last-Modified"].endswith(" GMT")
+    result = client.get(route, headers={"If-None-Match": etag})
+    assert result.status_code == 304
+    assert result.content == b""
+    assert result.headers["ETag"] == etag
+
+    updated = client.put(route, json={"properties": {"name": "new"}}).json()
+    assert updated["revision"] == 2
+    result = client.get(route, headers={"If-None-Match": etag})
+    assert result.status_code == 200
+    assert result.json()["properties"] == {"name": "new"}
+    assert result.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_get_features_answers_conditional_requests(
+    geojson_features: list[dict[str, object]],
+    raw: bool,  # noqa: FBT001
+) -> None:
+    """Tests pages of features carry an ETag that changes with any feature."""
+    feature_ids = [
+        client.post(FEATURES_ROUTE, json=feature).json()["_id"]
+        for feature in geojson_features
+    ]
+    params = {"raw": raw}
+    etag = client.get(FEATURES_ROUTE, params=params).headers["ETag"]
+    result = client.get(FEATURES_ROUTE, params=params, headers={"If-None-Match": etag})
+    assert result.status_code == 304
+
+    client.patch(
+        f"{FEATURES_ROUTE}/bulk",
+        json={"ids": feature_ids[-1:], "update": {"properties": {"a": "b"}}},
+    )
+    result = client.get(FEATURES_ROUTE, params=params, headers={"If-None-Match": etag})
+    assert result.status_code == 200
+    assert len(result.json()) == len(feature_ids)
+
+
+def _post_named_features() -> list[str]:
+    """Inserts two points with a name and a class, and returns their ids."""
+    return [
+        client.post(
+            FEATURES_ROUTE,
+            json={
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [float(index), 0.0]},
+                "properties": {"name": f"point {index}", "class": "road"},
+            },
+        ).json()["_id"]
+        for index in range(2)
+    ]
+
+
+def test_get_features_returns_requested_fields() -> None:
+    """Tests only the requested fields are returned, with a distinct ETag."""
+    ids = _post_named_features()
+
+    result = client.get(FEATURES_ROUTE, params={"fields": "properties.name"})
+    assert result.status_code == 200
+    assert result.json() == [
+        {"_id": feature_id, "properties": {"name": f"point {index}"}}
+        for index, feature_id in enumerate(ids)
+    ]
+    assert result.headers["ETag"] != client.get(FEATURES_ROUTE).headers["ETag"]
+
+    cached = client.get(
+        FEATURES_ROUTE,
+        params={"fields": "properties.name"},
+        headers={"If-None-Match": result.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+
+
+def test_get_features_excludes_fields() -> None:
+    """Tests excluded fields are left out of pages and streams."""
+    _post_named_features()
+
+    result = client.get(FEATURES_ROUTE, params={"exclude": "geometry,bounds"})
+    assert result.status_code == 200
+    assert all("geometry" not in feature for feature in result.json())
+    assert all(feature["revision"] == 1 for feature in result.json())
+
+    result = client.get(
+        FEATURES_ROUTE,
+        params={"exclude": "geometry,revision", "stream": "ndjson"},
+    )
+    streamed = [json.loads(line) for line in result.text.splitlines()]
+    assert [sorted(feature) for feature in streamed] == [
+        ["_id", "bounds", "properties", "type", "updated_at"],
+    ] * 2
+
+
+def test_get_feature_by_id_returns_requested_fields() -> None:
+    """Tests a single feature can be read with some fields only."""
+    feature_id = _post_named_features()[0]
+
+    result = client.get(f"{FEATURES_ROUTE}/{feature_id}", params={"fields": "id"})
+    assert result.status_code == 200
+    assert result.json() == {"_id": feature_id}
+    assert result.headers["ETag"] == f'"{feature_id}-1-0-+_id"'
+
+    result = client.get(f"{FEATURES_ROUTE}/{feature_id}", params={"exclude": "id"})
+    assert result.status_code == 400
+    assert result.json()["detail"] == "The id can not be excluded"
@@ -0,0 +1,75 @@
+"""Implements tests for the feature subscriptions endpoint."""
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from feature_store.server.app import app
+from feature_store.server.geometry import Bounds
+from feature_store.server.subscriptions import feature_events
+
+client = TestClient(app)
+
+FEATURES_ROUTE = "/features"
+
+
+def _point_feature(lon: float, lat: float) -> dict[str, Any]:
+    """Builds a point feature."""
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {},
+    }
+
+
+def test_subscription_rejects_invalid_polygon() -> None:
+    """Tests the subscription is closed when the first message is not a polygon."""
+    with client.websocket_connect(f"{FEATURES_ROUTE}/subscriptions") as websocket:
+        websocket.send_text('{"type": "Point", "coordinates": [0, 0]}')
+        with pytest.raises(WebSocketDisconnect) as error:
+            websocket.receive_text()
+    assert error.value.code == 1008
+
+
+def test_subscription_replies_with_its_bounding_box() -> None:
+    """Tests new subscriptions are told they match features by bounding box."""
+    polygon = {
+        "type": "Polygon",
+        "coordinates": [[[0, 0], [10, 0], [10, 10], [0, 0]]],
+    }
+    with client.websocket_connect(f"{FEATURES_ROUTE}/subscriptions") as websocket:
+        websocket.send_json(polygon)
+        assert websocket.receive_json() == {
+            "bounds": {"min_x": 0, "min_y": 0, "max_x": 10, "max_y": 10},
+            "matching": "bbox",
+        }
+
+
+@pytest.mark.asyncio()
+async def test_writes_publish_events_around_the_feature() -> None:
+    """Tests the write handlers publish the events of the features they write."""
+    subscription = feature_events.subscribe(Bounds(0, 0, 10, 10))
+    try:
+        feature_id = client.post(FEATURES_ROUTE, json=_point_feature(1, 1)).json()[
+            "_id"
+        ]
+        client.post(FEATURES_ROUTE, json=_point_feature(50, 50))
+        client.put(f"{FEATURES_ROUTE}/{feature_id}", json=_point_feature(60, 60))
+        client.delete(f"{FEATURES_ROUTE}/{feature_id}")
+        last_id = client.post(FEATURES_ROUTE, json=_point_feature(2, 2)).json()["_id"]
+
+        created = await subscription.get()
+        assert created is not None
+        assert (created.event, str(created.feature_id)) == ("created", feature_id)
+        assert created.feature is not None
+        assert created.feature.geometry.coordinates == [1, 1]
+        moved = await subscription.get()
+        assert moved is not None
+        assert (moved.event, str(moved.feature_id)) == ("updated", feature_id)
+        # The feature was deleted away from the area.
+        last = await subscription.get()
+        assert last is not None
+        assert (last.event, str(last.feature_id)) == ("created", last_id)
+    finally:
+        feature_events.unsubscribe(subscription)
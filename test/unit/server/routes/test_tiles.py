@@ -0,0 +1,85 @@
+"""Implements tests for the vector tiles endpoint."""
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from feature_store.server.app import app
+from feature_store.server.tiles import MEDIA_TYPE, TileCache
+
+client = TestClient(app)
+TILES_ROUTE = "/features/tiles"
+
+
+def test_get_tile_is_cached_until_a_write(mocker: MockerFixture) -> None:
+    """Tests tiles are served from the cache until a feature in them changes."""
+    cache = TileCache(max_bytes=1_000_000)
+    mocker.patch("feature_store.server.routes.tiles.tile_cache", cache)
+    mocker.patch("feature_store.server.routes.features.tile_cache", cache)
+    feature = {
+        "type": "Feature",
+        "properties": {"name": "origin"},
+        "geometry": {"type": "Point", "coordinates": [10.0, 10.0]},
+    }
+    client.post("/features", json=feature)
+
+    result = client.get(f"{TILES_ROUTE}/1/1/0.mvt")
+    assert result.status_code == 200
+    assert result.headers["content-type"] == MEDIA_TYPE
+    assert b"origin" in result.content
+    assert client.get(f"{TILES_ROUTE}/1/1/0.mvt").content == result.content
+    assert cache.hits == 1
+
+    feature["properties"] = {"name": "moved"}
+    client.post("/features", json=feature)
+    result = client.get(f"{TILES_ROUTE}/1/1/0.mvt")
+    assert b"moved" in result.content
+    assert cache.hits == 1
+
+
+def test_get_empty_tile() -> None:
+    """Tests a tile without features is empty."""
+    feature = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "Point", "coordinates": [10.0, 10.0]},
+    }
+    client.post("/features", json=feature)
+
+    result = client.get(f"{TILES_ROUTE}/3/1/1.mvt")
+    assert result.status_code == 200
+    assert result.content == b""
+
+
+def test_get_tile_out_of_range() -> None:
+    """Tests tiles outside of the zoom level are not found."""
+    assert client.get(f"{TILES_ROUTE}/1/2/0.mvt").status_code == 404
+
+
+def test_get_tile_below_min_zoom_is_empty(mocker: MockerFixture) -> None:
+    """Tests tiles zoomed out past the minimum zoom are empty."""
+    mocker.patch("feature_store.server.routes.tiles.tile_min_zoom", 2)
+    feature = {
+        "type": "Feature",
+        "properties": {"name": "origin"},
+        "geometry": {"type": "Point", "coordinates": [10.0, 10.0]},
+    }
+    client.post("/features", json=feature)
+
+    result = client.get(f"{TILES_ROUTE}/1/1/0.mvt")
+    assert result.status_code == 200
+    assert result.content == b""
+    assert b"origin" in client.get(f"{TILES_ROUTE}/2/2/1.mvt").content
+
+
+def test_get_tile_shows_at_most_max_features(mocker: MockerFixture) -> None:
+    """Tests a tile shows no more than the maximum number of features."""
+    mocker.patch("feature_store.server.routes.tiles.tile_max_features", 2)
+    for index in range(5):
+        feature = {
+            "type": "Feature",
+            "properties": {"name": f"point-{index}"},
+            "geometry": {"type": "Point", "coordinates": [10.0 + index, 10.0]},
+        }
+        client.post("/features", json=feature)
+
+    content = client.get(f"{TILES_ROUTE}/1/1/0.mvt").content
+    assert sum(f"point-{index}".encode() in content for index in range(5)) == 2
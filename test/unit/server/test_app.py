@@ -1,6 +1,8 @@
 """Implements tests for the Feature Store API."""
 from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
 
+from feature_store.server import database
 from feature_store.server.app import app
 
 client = TestClient(app)
@@ -11,3 +13,24 @@ def test_read_root() -> None:
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "Welcome to Feature Store!"}
+
+
+def test_ready_until_database_initialized() -> None:
+    """Tests the worker is not ready before the database is initialized."""
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"detail": ["Database not initialized"]}
+
+
+def test_ready_once_indexes_exist(mocker: MockerFixture) -> None:
+    """Tests the worker becomes ready once the indexes are built."""
+    mocker.patch.object(database, "_client", mocker.Mock())
+    mocker.patch.object(database, "_indexes_ready", new=False)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert "Missing index geometry_2dsphere" in response.json()["detail"]
+
+    mocker.patch.object(database, "FEATURE_INDEXES", [])
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
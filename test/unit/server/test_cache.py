@@ -0,0 +1,98 @@
+"""Implements tests for the geospatial query cache."""
+from beanie import PydanticObjectId
+
+from feature_store.server.cache import QueryCache, estimate_feature_size
+from feature_store.server.database import DBFeature
+from feature_store.server.geometry import Bounds
+from feature_store.server.models.geojson import (
+    GeoJsonLineString,
+    GeoJsonPoint,
+    GeoJSONType,
+)
+
+
+def _feature(lon: float, lat: float) -> DBFeature:
+    """Builds a point feature with an id."""
+    return DBFeature(
+        id=PydanticObjectId(),
+        geojson_type=GeoJSONType.FEATURE,
+        geometry=GeoJsonPoint(coordinates=[lon, lat]),
+        properties={},
+    )
+
+
+def test_cache_hits_after_put() -> None:
+    """Tests a cached answer is returned and counted as a hit."""
+    cache = QueryCache(max_bytes=1_000_000)
+    features = [_feature(1, 1), _feature(2, 2)]
+    assert cache.get("viewport") is None
+    cache.put("viewport", Bounds(0, 0, 5, 5), features, None)
+
+    assert cache.get("viewport") == (features, None)
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries, stats.features) == (1, 1, 1, 2)
+
+
+def test_disabled_cache_stores_nothing() -> None:
+    """Tests a cache without a memory budget never answers."""
+    cache = QueryCache(max_bytes=0)
+    cache.put("viewport", Bounds(0, 0, 5, 5), [_feature(1, 1)], None)
+    assert cache.get("viewport") is None
+    assert cache.stats().misses == 0
+
+
+def test_invalidate_drops_overlapping_and_containing_answers() -> None:
+    """Tests writes drop only the answers they may change."""
+    cache = QueryCache(max_bytes=1_000_000)
+    moved = _feature(1, 1)
+    cache.put("west", Bounds(0, 0, 5, 5), [moved], None)
+    cache.put("east", Bounds(50, 0, 55, 5), [], None)
+    cache.put("north", Bounds(0, 50, 5, 55), [], None)
+
+    cache.invalidate(moved.id, Bounds(52, 2, 52, 2))  # type: ignore
+
+    assert cache.get("west") is None
+    assert cache.get("east") is None
+    assert cache.get("north") is not None
+    assert cache.stats().invalidations == 2
+    assert cache.stats().features == 0
+
+
+def test_cache_evicts_least_recently_used_over_budget() -> None:
+    """Tests the least recently used answer is evicted past the memory budget."""
+    feature_size = estimate_feature_size(_feature(0, 0))
+    cache = QueryCache(max_bytes=3 * feature_size)
+    cache.put("first", Bounds(0, 0, 1, 1), [_feature(0, 0)], None)
+    cache.put("second", Bounds(0, 0, 1, 1), [_feature(0, 0)], None)
+    assert cache.get("first") is not None
+    cache.put("third", Bounds(0, 0, 1, 1), [_feature(0, 0)], None)
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+    assert cache.stats().evictions == 1
+    assert cache.stats().size_bytes <= cache.max_bytes
+
+
+def test_cache_keeps_the_levels_of_detail_of_a_feature_apart() -> None:
+    """Tests caching a simplified feature leaves the full answer unchanged."""
+    cache = QueryCache(max_bytes=1_000_000)
+    full = DBFeature(
+        id=PydanticObjectId(),
+        geojson_type=GeoJSONType.FEATURE,
+        geometry=GeoJsonLineString(coordinates=[[0, 0], [0.5, 0.1], [1, 0]]),
+        properties={},
+    )
+    simplified = full.copy(
+        update={"geometry": GeoJsonLineString(coordinates=[[0, 0], [1, 0]])},
+    )
+    cache.put(("query", 0), Bounds(0, 0, 1, 1), [full], None)
+    cache.put(("query", 2), Bounds(0, 0, 1, 1), [simplified], None, lod=2)
+
+    assert cache.get(("query", 0)) == ([full], None)
+    assert cache.get(("query", 2)) == ([simplified], None)
+
+    cache.invalidate(full.id, None)  # type: ignore
+    assert cache.get(("query", 0)) is None
+    assert cache.get(("query", 2)) is None
+    assert cache.stats().features == 0
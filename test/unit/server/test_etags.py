@@ -0,0 +1,53 @@
+"""Implements tests for the conditional GET validators."""
+from datetime import datetime, timezone
+
+import pytest
+
+from feature_store.server.etags import (
+    collection_etag,
+    etag_matches,
+    feature_etag,
+    http_date,
+    validator_headers,
+)
+
+
+def test_feature_etag_changes_with_revision_and_lod() -> None:
+    """Tests the ETag of a feature identifies its revision and level of detail."""
+    assert feature_etag("abc", 2, None) == '"abc-2-0"'
+    assert feature_etag("abc", 2, 0) == feature_etag("abc", 2, None)
+    assert feature_etag("abc", 2, 1) != feature_etag("abc", 2, None)
+
+
+def test_collection_etag_depends_on_every_feature_and_the_cursor() -> None:
+    """Tests the ETag of a page changes with its features, order and cursor."""
+    etag = collection_etag([("a", 1), ("b", 1)], None, None)
+    assert etag.startswith('W/"')
+    assert etag == collection_etag([("a", 1), ("b", 1)], None, 0)
+    assert etag != collection_etag([("a", 1), ("b", 2)], None, None)
+    assert etag != collection_etag([("b", 1), ("a", 1)], None, None)
+    assert etag != collection_etag([("a", 1), ("b", 1)], "b", None)
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "matches"),
+    [
+        (None, False),
+        ("*", True),
+        ('"abc-2-0"', True),
+        ('W/"abc-2-0"', True),
+        ('"abc-1-0", "abc-2-0"', True),
+        ('"abc-1-0"', False),
+    ],
+)
+def test_etag_matches(if_none_match: str | None, matches: bool) -> None:  # noqa: FBT001
+    """Tests `If-None-Match` headers are compared with the weak comparison."""
+    assert etag_matches(if_none_match, '"abc-2-0"') is matches
+
+
+def test_validator_headers_format_naive_timestamps_as_utc() -> None:
+    """Tests MongoDB's naive UTC timestamps are formatted as HTTP dates."""
+    timestamp = datetime(2023, 5, 1, 12, 30, 15)  # noqa: DTZ001
+    assert http_date(timestamp) == "Mon, 01 May 2023 12:30:15 GMT"
+    assert http_date(timestamp.replace(tzinfo=timezone.utc)) == http_date(timestamp)
+    assert validator_headers('"a"', None) == {"ETag": '"a"'}
@@ -0,0 +1,120 @@
+"""Implements tests for the FlatGeobuf encoding."""
+import io
+import struct
+
+import pytest
+
+from feature_store.server.flatgeobuf import (
+    HILBERT_MAX,
+    MAGIC,
+    FlatGeobufWriter,
+    hilbert,
+    level_bounds,
+    packed_rtree,
+    read_flatgeobuf,
+)
+
+DOCUMENTS = [
+    {
+        "_id": "64b000000000000000000001",
+        "geometry": {"type": "Point", "coordinates": [10.0, 20.0]},
+        "properties": {"name": "point"},
+    },
+    {
+        "_id": "64b000000000000000000002",
+        "geometry": {"type": "LineString", "coordinates": [[-5.0, 0.0], [5.0, 1.0]]},
+        "properties": {"kind": "road"},
+    },
+    {
+        "_id": "64b000000000000000000003",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 0.0]],
+                [[1.0, 1.0], [2.0, 1.0], [2.0, 2.0], [1.0, 1.0]],
+            ],
+        },
+        "properties": {"name": "polygon", "kind": "lake"},
+    },
+]
+
+
+def _write(documents: list[dict[str, object]], chunk_size: int = 64) -> bytes:
+    """Writes documents to a FlatGeobuf file."""
+    writer = FlatGeobufWriter()
+    for document in documents:
+        writer.add(document)
+    return b"".join(writer.chunks(chunk_size))
+
+
+def test_flatgeobuf_round_trip() -> None:
+    """Tests features are read back with their ids, geometries and properties."""
+    data = _write(DOCUMENTS)
+    assert data.startswith(MAGIC)
+
+    features = sorted(read_flatgeobuf(io.BytesIO(data)), key=lambda f: f["_id"])
+    assert features == [
+        {
+            "type": "Feature",
+            "_id": document["_id"],
+            "geometry": document["geometry"],
+            "properties": document["properties"],
+        }
+        for document in DOCUMENTS
+    ]
+
+
+def test_flatgeobuf_index_orders_features() -> None:
+    """Tests the leaves of the index point to the features, in file order."""
+    data = _write(DOCUMENTS)
+    (header_size,) = struct.unpack_from("<I", data, len(MAGIC))
+    index_start = len(MAGIC) + 4 + header_size
+    nodes = level_bounds(len(DOCUMENTS), 16)[0][1]
+    features_start = index_start + 40 * nodes
+
+    root = struct.unpack_from("<ddddQ", data, index_start)
+    assert root == (-5.0, 0.0, 10.0, 20.0, 1)
+    offsets = [
+        struct.unpack_from("<ddddQ", data, index_start + 40 * node)[4]
+        for node in range(1, nodes)
+    ]
+    position = 0
+    for offset in offsets:
+        assert offset == position
+        (size,) = struct.unpack_from("<I", data, features_start + position)
+        position += 4 + size
+    assert features_start + position == len(data)
+
+
+def test_flatgeobuf_without_features() -> None:
+    """Tests a file without features has a header only and no features."""
+    data = _write([])
+    assert list(read_flatgeobuf(io.BytesIO(data))) == []
+
+
+def test_read_flatgeobuf_rejects_other_files() -> None:
+    """Tests files without the FlatGeobuf magic number are rejected."""
+    with pytest.raises(ValueError, match="Not a FlatGeobuf"):
+        list(read_flatgeobuf(io.BytesIO(b"PAR1" + bytes(16))))
+
+
+def test_level_bounds() -> None:
+    """Tests the levels of the tree are listed from the leaves to the root."""
+    assert level_bounds(1, 16) == [(1, 2), (0, 1)]
+    assert level_bounds(20, 4) == [(8, 28), (3, 8), (1, 3), (0, 1)]
+
+
+def test_packed_rtree_parents_cover_children() -> None:
+    """Tests each parent node covers its children and points to the first one."""
+    boxes = [(float(i), float(i), float(i) + 1, float(i) + 1) for i in range(5)]
+    data = packed_rtree(boxes, list(range(5)), node_size=2)
+    nodes = [struct.unpack_from("<ddddQ", data, 40 * i) for i in range(len(data) // 40)]
+    assert nodes[0] == (0.0, 0.0, 5.0, 5.0, 1)
+    assert nodes[-5:] == [(*box, offset) for offset, box in enumerate(boxes)]
+
+
+def test_hilbert_corners() -> None:
+    """Tests the Hilbert curve starts and ends at the bottom corners."""
+    assert hilbert(0, 0) == 0
+    assert hilbert(HILBERT_MAX, 0) == (1 << 32) - 1
+    assert hilbert(0, HILBERT_MAX) < hilbert(HILBERT_MAX, HILBERT_MAX)
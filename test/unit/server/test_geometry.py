@@ -0,0 +1,48 @@
+"""Implements tests for the geometry helpers."""
+import pytest
+
+from feature_store.server.geometry import Bounds, geometry_bounds
+from feature_store.server.models.geojson import (
+    GeoJsonLineString,
+    GeoJsonPoint,
+    GeoJsonPolygon,
+)
+
+
+def test_geometry_bounds_of_point() -> None:
+    """Tests a point is bounded by itself."""
+    assert geometry_bounds(GeoJsonPoint(coordinates=[3.0, 4.0])) == Bounds(
+        3.0,
+        4.0,
+        3.0,
+        4.0,
+    )
+
+
+def test_geometry_bounds_of_polygon_covers_vertices() -> None:
+    """Tests a polygon is bounded by its vertices, longitudes exactly."""
+    polygon = GeoJsonPolygon(
+        coordinates=[[[-10, -10], [10, -10], [10, 10], [-10, 10], [-10, -10]]],
+    )
+    bounds = geometry_bounds(polygon)
+    assert (bounds.min_x, bounds.max_x) == (-10, 10)
+    assert bounds.min_y <= -10
+    assert bounds.max_y >= 10
+
+
+def test_geometry_bounds_follow_great_circle_edges() -> None:
+    """Tests an east-west edge bows towards the pole like MongoDB's edges do."""
+    line = GeoJsonLineString(coordinates=[[-90.0, 45.0], [90.0, 45.0]])
+    assert geometry_bounds(line).max_y == pytest.approx(90.0)
+
+    meridian = GeoJsonLineString(coordinates=[[5.0, -20.0], [5.0, 30.0]])
+    assert geometry_bounds(meridian) == Bounds(5.0, -20.0, 5.0, 30.0)
+
+
+def test_bounds_intersects_and_contains() -> None:
+    """Tests bounding box overlap and containment."""
+    outer = Bounds(0, 0, 10, 10)
+    assert outer.intersects(Bounds(10, 10, 20, 20))
+    assert not outer.intersects(Bounds(11, 0, 20, 10))
+    assert outer.contains(Bounds(1, 1, 9, 9))
+    assert not outer.contains(Bounds(1, 1, 11, 9))
@@ -0,0 +1,72 @@
+"""Implements tests for the GeoParquet encoding."""
+import io
+import json
+
+import pytest
+
+from feature_store.server.geoparquet import (
+    BBOX_COLUMN,
+    GeoParquetWriter,
+    read_geoparquet,
+)
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+DOCUMENTS = [
+    {
+        "_id": f"64b00000000000000000000{index}",
+        "geometry": {"type": "Point", "coordinates": [float(index), 1.0]},
+        "properties": {
+            "name": f"feature {index}",
+            **({"kind": "odd"} if index % 2 else {}),
+        },
+        "bounds": {"min_x": index, "min_y": 1.0, "max_x": index, "max_y": 1.0},
+    }
+    for index in range(5)
+]
+
+
+def _write(documents: list[dict[str, object]]) -> bytes:
+    """Writes documents to a GeoParquet file in row groups of two features."""
+    writer = GeoParquetWriter(["kind", "name"], group_size=2)
+    chunks = [writer.add(document) for document in documents]
+    assert [bool(chunk) for chunk in chunks] == [False, True, False, True, False]
+    return b"".join(chunks) + writer.finish()
+
+
+def test_geoparquet_writes_row_groups_and_metadata() -> None:
+    """Tests the file has a row group per group size and GeoParquet metadata."""
+    parquet = pq.ParquetFile(io.BytesIO(_write(DOCUMENTS)))
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.schema_arrow.names == [
+        "_id",
+        "geometry",
+        BBOX_COLUMN,
+        "kind",
+        "name",
+    ]
+    metadata = json.loads(parquet.schema_arrow.metadata[b"geo"])
+    assert metadata["primary_column"] == "geometry"
+    assert metadata["columns"]["geometry"]["encoding"] == "WKB"
+    assert "crs" not in metadata["columns"]["geometry"]
+    table = parquet.read()
+    assert table.column(BBOX_COLUMN)[3].as_py() == {
+        "xmin": 3.0,
+        "ymin": 1.0,
+        "xmax": 3.0,
+        "ymax": 1.0,
+    }
+
+
+def test_geoparquet_round_trip() -> None:
+    """Tests features are read back with their ids and non-null properties."""
+    features = list(read_geoparquet(io.BytesIO(_write(DOCUMENTS))))
+    assert features == [
+        {
+            "type": "Feature",
+            "_id": document["_id"],
+            "geometry": document["geometry"],
+            "properties": document["properties"],
+        }
+        for document in DOCUMENTS
+    ]
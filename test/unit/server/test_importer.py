@@ -0,0 +1,73 @@
+"""Implements tests for the importer."""
+from pathlib import Path
+
+import pytest
+
+from feature_store.server.database import DBFeature, DBFeatureLOD
+from feature_store.server.flatgeobuf import FlatGeobufWriter
+from feature_store.server.importer import import_features, read_features
+
+
+@pytest.mark.asyncio()
+async def test_import_features_keeps_ids_and_skips_invalid_features() -> None:
+    """Tests features are inserted with their ids, bounds and levels of detail."""
+    line = [[index / 10, (index % 2) / 1e6] for index in range(100)]
+    features = [
+        {
+            "type": "Feature",
+            "_id": "64b000000000000000000001",
+            "geometry": {"type": "LineString", "coordinates": line},
+            "properties": {"name": "line"},
+        },
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [1.0, 2.0]},
+            "properties": {"name": "point"},
+        },
+        {"type": "Feature", "properties": {"name": "no geometry"}},
+        {
+            "type": "Feature",
+            "_id": "64b000000000000000000001",
+            "geometry": {"type": "Point", "coordinates": [1.0, 2.0]},
+            "properties": {"name": "duplicate"},
+        },
+    ]
+
+    result = await import_features(features, chunk_size=3)
+    assert (result.inserted, result.failed) == (2, 2)
+
+    line_feature = await DBFeature.get("64b000000000000000000001")
+    assert line_feature is not None
+    assert line_feature.properties == {"name": "line"}
+    assert line_feature.revision == 1
+    assert line_feature.bounds is not None
+    assert line_feature.bounds.max_x == pytest.approx(9.9)
+    assert await DBFeatureLOD.get(line_feature.id) is not None
+    assert await DBFeature.find({"properties.name": "point"}).count() == 1
+
+
+@pytest.mark.asyncio()
+async def test_import_flatgeobuf_file(tmp_path: Path) -> None:
+    """Tests a FlatGeobuf export can be imported back."""
+    writer = FlatGeobufWriter()
+    writer.add(
+        {
+            "_id": "64b000000000000000000002",
+            "geometry": {"type": "Point", "coordinates": [3.0, 4.0]},
+            "properties": {"name": "exported"},
+        },
+    )
+    path = tmp_path / "features.fgb"
+    path.write_bytes(b"".join(writer.chunks()))
+
+    result = await import_features(read_features(path))
+    assert (result.inserted, result.failed) == (1, 0)
+    feature = await DBFeature.get("64b000000000000000000002")
+    assert feature is not None
+    assert feature.geometry.coordinates == [3.0, 4.0]
+
+
+def test_read_features_rejects_unknown_formats() -> None:
+    """Tests files in other formats are rejected."""
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        list(read_features(Path("features.csv")))
@@ -0,0 +1,62 @@
+"""Implements tests for the bulk insertion helpers."""
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import ValidationError
+from pytest_mock import MockerFixture
+
+from feature_store.server.database import DBFeature, FeatureBounds
+from feature_store.server.geometry import geometry_bounds
+from feature_store.server.ingest import insert_documents, new_document, parse_feature
+from feature_store.server.models.compact import CompactGeometry
+from feature_store.server.models.geojson import Feature, GeoJsonPolygon
+
+SQUARE = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]]
+
+
+def test_parse_feature_validates_geometries_in_bulk(mocker: MockerFixture) -> None:
+    """Tests valid geometries are built from their compact form."""
+    to_model = mocker.spy(CompactGeometry, "to_model")
+    value = {
+        "type": "Feature",
+        "geometry": {"type": "Polygon", "coordinates": [SQUARE]},
+        "properties": {"name": "square"},
+    }
+    feature = parse_feature(value)
+
+    to_model.assert_called_once()
+    assert isinstance(feature.geometry, GeoJsonPolygon)
+    assert feature == Feature.parse_obj(value)
+
+
+def test_parse_feature_falls_back_to_the_models(mocker: MockerFixture) -> None:
+    """Tests geometries the compact form rejects are checked by the models."""
+    to_model = mocker.spy(CompactGeometry, "to_model")
+    mixed = {
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1, 5]]},
+        "properties": {},
+    }
+    assert parse_feature(mixed).geometry.coordinates == [[0, 0], [1, 1, 5]]
+    to_model.assert_not_called()
+
+    with pytest.raises(ValidationError):
+        parse_feature({"type": "Feature", "geometry": {"type": "Point"}})
+
+
+@pytest.mark.asyncio()
+async def test_insert_documents_bounds_normalized_geometries() -> None:
+    """Tests bounds follow the edge that closes a ring, added by normalization."""
+    ring = [[0.0, 60.0], [45.0, 50.0], [90.0, 60.0]]
+    document = new_document(
+        Feature(geometry=GeoJsonPolygon(coordinates=[ring]), properties={}),
+        datetime.now(timezone.utc),
+    )
+
+    assert await insert_documents([document]) == {}
+
+    stored = await DBFeature.get(document.id)  # type: ignore
+    assert stored is not None
+    assert stored.geometry.coordinates[0][-1] == ring[0]
+    assert stored.bounds == FeatureBounds.from_bounds(geometry_bounds(stored.geometry))
+    assert stored.bounds.max_y > 60
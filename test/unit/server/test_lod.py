@@ -0,0 +1,121 @@
+"""Implements tests for the levels of detail."""
+import math
+
+import pytest
+from beanie import PydanticObjectId
+from pytest_mock import MockerFixture
+
+from feature_store.server.database import DBFeature, read_collection
+from feature_store.server.lod import (
+    build_lods,
+    find_documents_at_lod,
+    lod_for_resolution,
+    lod_tolerances,
+    save_lods,
+    simplify_geometry,
+    simplify_path,
+    vertex_count,
+)
+from feature_store.server.models.geojson import (
+    GeoJsonLineString,
+    GeoJsonPoint,
+    GeoJsonPolygon,
+    GeoJSONType,
+)
+
+
+def _wave(vertices: int, amplitude: float) -> list[list[float]]:
+    """Returns a sine wave along the equator."""
+    return [[index / 10, amplitude * math.sin(index / 5)] for index in range(vertices)]
+
+
+def test_simplify_path_drops_collinear_vertices() -> None:
+    """Tests vertices on a straight line are removed, the end points kept."""
+    path = [[float(index), 0.0] for index in range(10)]
+    assert simplify_path(path, 0.001) == [[0.0, 0.0], [9.0, 0.0]]
+
+
+def test_simplify_path_keeps_vertices_beyond_tolerance() -> None:
+    """Tests a vertex farther than the tolerance from the path is kept."""
+    path = [[0.0, 0.0], [1.0, 0.5], [2.0, 0.0]]
+    assert simplify_path(path, 0.1) == path
+    assert simplify_path(path, 1.0) == [[0.0, 0.0], [2.0, 0.0]]
+
+
+def test_simplify_geometry_keeps_polygon_rings_closed() -> None:
+    """Tests simplified rings stay closed and collapsed holes are dropped."""
+    exterior = [[0.0, 0.0], [5.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0]]
+    hole = [[4.0, 4.0], [4.01, 4.0], [4.01, 4.01], [4.0, 4.0]]
+    polygon = GeoJsonPolygon(coordinates=[[*exterior, [0.0, 0.0]], hole])
+
+    simplified = simplify_geometry(polygon, 0.1)
+    assert isinstance(simplified, GeoJsonPolygon)
+    assert simplified.coordinates == [
+        [[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]],
+    ]
+
+
+def test_simplify_geometry_returns_none_without_change() -> None:
+    """Tests geometries that cannot be simplified are not duplicated."""
+    assert simplify_geometry(GeoJsonPoint(coordinates=[1.0, 2.0]), 1.0) is None
+    line = GeoJsonLineString(coordinates=[[0.0, 0.0], [1.0, 1.0]])
+    assert simplify_geometry(line, 1.0) is None
+
+
+def test_build_lods_coarsen_with_each_level() -> None:
+    """Tests each level of detail has no more vertices than the previous one."""
+    line = GeoJsonLineString(coordinates=_wave(1000, 0.01))
+    lods = build_lods(line)
+
+    assert lods
+    counts = [vertex_count(line)] + [
+        vertex_count(lods[level]) for level in sorted(lods, key=int)
+    ]
+    assert counts == sorted(counts, reverse=True)
+    assert counts[-1] < counts[0]
+
+
+def test_build_lods_skips_small_geometries() -> None:
+    """Tests geometries with few vertices have no levels of detail."""
+    assert build_lods(GeoJsonLineString(coordinates=_wave(10, 1.0))) == {}
+
+
+def test_lod_for_resolution() -> None:
+    """Tests the coarsest level whose tolerance fits the resolution is chosen."""
+    assert lod_for_resolution(0.0) == 0
+    assert lod_for_resolution(lod_tolerances[0]) == 1
+    assert lod_for_resolution(math.inf) == len(lod_tolerances)
+
+
+@pytest.mark.asyncio()
+async def test_find_documents_at_lod_reads_full_geometries_only_without_lod(
+    mocker: MockerFixture,
+) -> None:
+    """Tests features with a simplified geometry are read without their full one."""
+    large = DBFeature(
+        id=PydanticObjectId(),
+        geojson_type=GeoJSONType.FEATURE,
+        geometry=GeoJsonLineString(coordinates=_wave(200, 1)),
+        properties={"name": "large"},
+    )
+    small = DBFeature(
+        id=PydanticObjectId(),
+        geojson_type=GeoJSONType.FEATURE,
+        geometry=GeoJsonPoint(coordinates=[1, 1]),
+        properties={"name": "small"},
+    )
+    await DBFeature.insert_many([large, small])
+    await save_lods(large.id, large.geometry)  # type: ignore
+    find = mocker.spy(type(read_collection(DBFeature)), "find")
+
+    documents = await find_documents_at_lod({}, 2)
+
+    by_name = {document["properties"]["name"]: document for document in documents}
+    assert by_name["small"]["geometry"] == small.geometry.dict(by_alias=True)
+    assert by_name["large"]["geometry"] == build_lods(large.geometry)["2"].dict(
+        by_alias=True,
+    )
+    geometry_reads = [
+        call.args[1] for call in find.call_args_list if "geometry" in call.args[2]
+    ]
+    assert geometry_reads == [{"_id": {"$in": [small.id]}}]
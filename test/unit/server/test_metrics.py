@@ -0,0 +1,113 @@
+"""Implements tests for the Prometheus metrics."""
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from feature_store.server import metrics
+from feature_store.server.app import app
+from feature_store.server.metrics import CommandMetrics, Histogram
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Tests observations are counted in cumulative buckets per label values."""
+    histogram = Histogram("latency", "Latency.", ("route",), (1.0, 5.0))
+    for value in (0.5, 1.0, 3.0, 10.0):
+        histogram.observe(value, '/a"b')
+
+    assert list(histogram.render()) == [
+        "# HELP latency Latency.",
+        "# TYPE latency histogram",
+        'latency_bucket{route="/a\\"b",le="1.0"} 2',
+        'latency_bucket{route="/a\\"b",le="5.0"} 3',
+        'latency_bucket{route="/a\\"b",le="+Inf"} 4',
+        'latency_sum{route="/a\\"b"} 14.5',
+        'latency_count{route="/a\\"b"} 4',
+    ]
+
+
+def test_command_metrics_log_slow_commands_with_their_filter(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Tests only commands slower than the threshold are logged, with the filter."""
+    listener = CommandMetrics(slow_ms=100)
+    for request_id, duration in ((1, 50_000), (2, 250_000)):
+        listener.started(
+            SimpleNamespace(  # type: ignore
+                connection_id=("localhost", 27017),
+                request_id=request_id,
+                command={"find": "features", "filter": {"properties.kind": "road"}},
+            ),
+        )
+        with caplog.at_level(logging.WARNING):
+            listener.succeeded(
+                SimpleNamespace(  # type: ignore
+                    connection_id=("localhost", 27017),
+                    request_id=request_id,
+                    command_name="find",
+                    duration_micros=duration,
+                ),
+            )
+
+    assert len(caplog.records) == 1
+    assert "250.0ms" in caplog.text
+    assert "'properties.kind': 'road'" in caplog.text
+
+
+def test_command_metrics_format_slow_commands_only_and_briefly(
+    caplog: pytest.LogCaptureFixture,
+    mocker: MockerFixture,
+) -> None:
+    """Tests commands are formatted once slow, with the first items of lists only."""
+    listener = CommandMetrics(slow_ms=100)
+    query_of = mocker.spy(metrics, "_query_of")
+    updates = [{"q": {"_id": index}, "u": {"$set": {}}} for index in range(10_000)]
+    for request_id, duration in ((1, 50_000), (2, 250_000)):
+        listener.started(
+            SimpleNamespace(  # type: ignore
+                connection_id=("localhost", 27017),
+                request_id=request_id,
+                command={"update": "features", "updates": updates},
+            ),
+        )
+        with caplog.at_level(logging.WARNING):
+            listener.succeeded(
+                SimpleNamespace(  # type: ignore
+                    connection_id=("localhost", 27017),
+                    request_id=request_id,
+                    command_name="update",
+                    duration_micros=duration,
+                ),
+            )
+
+    assert query_of.call_count == 1
+    assert "{'_id': 4}" in caplog.text
+    assert "{'_id': 5}" not in caplog.text
+    assert len(caplog.records[0].getMessage()) < 1_000
+
+
+def test_metrics_endpoint_reports_routes_and_result_sizes(
+    geojson_features: list[dict[str, object]],
+) -> None:
+    """Tests requests are measured by route template, with their result size."""
+    feature_id = client.post("/features", json=geojson_features[0]).json()["_id"]
+    client.get(f"/features/{feature_id}")
+    client.get("/features/")
+
+    result = client.get("/metrics")
+    assert result.status_code == 200
+    assert result.headers["content-type"].startswith("text/plain; version=0.0.4")
+    metrics = result.text
+    assert (
+        'feature_store_http_request_duration_seconds_count{method="GET",'
+        'route="/features/{feature_id}",status="200"}'
+    ) in metrics
+    assert 'feature_store_http_request_size_bytes_count{method="POST"' in metrics
+    assert (
+        'feature_store_query_result_features_bucket{method="GET",route="/features/",'
+        'le="1"}'
+    ) in metrics
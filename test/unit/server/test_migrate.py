@@ -0,0 +1,59 @@
+"""Implements tests for the database migration command."""
+import pytest
+from pytest_mock import MockerFixture
+
+from feature_store.server import migrate
+from feature_store.server.database import DBFeature, missing_indexes
+from feature_store.server.migrate import backfill_bounds, main
+from feature_store.server.models.geojson import GeoJsonLineString, GeoJSONType
+
+
+async def _insert_without_bounds(count: int) -> None:
+    """Inserts features as stored before their bounds were maintained."""
+    for index in range(count):
+        await DBFeature(
+            geojson_type=GeoJSONType.FEATURE,
+            geometry=GeoJsonLineString(
+                coordinates=[[0.0, float(index)], [2.0, float(index) + 1]],
+            ),
+            properties={},
+        ).insert()
+
+
+@pytest.mark.asyncio()
+async def test_backfill_bounds_updates_features_without_bounds() -> None:
+    """Tests bounds are stored in chunks without changing the revisions."""
+    await _insert_without_bounds(5)
+
+    assert await backfill_bounds(chunk_size=2) == 5
+    features = await DBFeature.find_all().sort("bounds.min_y").to_list()
+    assert [feature.bounds.min_y for feature in features if feature.bounds] == [
+        0.0,
+        1.0,
+        2.0,
+        3.0,
+        4.0,
+    ]
+    assert {feature.revision for feature in features} == {0}
+    assert await backfill_bounds() == 0
+
+
+@pytest.mark.asyncio()
+async def test_migrate_builds_indexes_and_backfills(mocker: MockerFixture) -> None:
+    """Tests the command builds the indexes, then backfills the bounds."""
+    mocker.patch.object(migrate, "init_db")
+    close_db = mocker.patch.object(migrate, "close_db")
+    await _insert_without_bounds(1)
+
+    await migrate.migrate(backfill=True, chunk_size=10)
+    assert await missing_indexes() == []
+    assert await DBFeature.find({"bounds": None}).count() == 0
+    close_db.assert_called_once_with()
+
+
+def test_main_skips_backfill(mocker: MockerFixture) -> None:
+    """Tests the backfill can be skipped from the command line."""
+    run = mocker.patch.object(migrate, "migrate", new=mocker.Mock())
+    mocker.patch.object(migrate.asyncio, "run")
+    assert main(["--skip-backfill"]) == 0
+    run.assert_called_once_with(backfill=False, chunk_size=migrate.bulk_chunk_size)
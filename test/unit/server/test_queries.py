@@ -0,0 +1,239 @@
+"""Implements tests for the MongoDB filters."""
+import math
+from itertools import pairwise
+
+import pytest
+
+from feature_store.server.database import DBFeature
+from feature_store.server.geometry import Bounds
+from feature_store.server.queries import (
+    FieldSet,
+    FilterOperator,
+    GridParams,
+    NearestParams,
+    PropertyFilter,
+    combine_queries,
+    grid_pipeline,
+    nearest_pipeline,
+    property_keys_pipeline,
+    property_query,
+    rectangle_geometry,
+)
+
+
+def test_property_filter_parses_operators() -> None:
+    """Tests each operator is parsed with its operands."""
+    assert PropertyFilter.parse("class:eq:road") == PropertyFilter(
+        "class",
+        FilterOperator.EQ,
+        ("road",),
+    )
+    assert PropertyFilter.parse("class:in:road,path").operands == ("road", "path")
+    assert PropertyFilter.parse("name:prefix:a:b").operands == ("a:b",)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["class", "class:eq", ":eq:x", "$where:eq:x", "a.b:eq:x", "a:like:x"],
+)
+def test_property_filter_rejects_malformed_filters(text: str) -> None:
+    """Tests malformed filters and unsafe keys are rejected."""
+    with pytest.raises(ValueError, match="Invalid filter"):
+        PropertyFilter.parse(text)
+
+
+def test_property_query_builds_index_friendly_conditions() -> None:
+    """Tests conditions are combined, prefixes anchored and escaped."""
+    query = property_query(
+        [
+            PropertyFilter.parse("class:in:road,path"),
+            PropertyFilter.parse("name:prefix:St."),
+        ],
+    )
+    assert query == {
+        "$and": [
+            {"properties.class": {"$in": ["road", "path"]}},
+            {"properties.name": {"$regex": "^St\\."}},
+        ],
+    }
+
+
+def test_combine_queries_skips_empty_filters() -> None:
+    """Tests empty filters do not add conditions."""
+    assert combine_queries({}, {}) == {}
+    assert combine_queries({"a": 1}, {}) == {"a": 1}
+
+
+def test_nearest_pipeline() -> None:
+    """Tests the nearest search uses the geometry index and limits to k."""
+    near = NearestParams(lon=1.0, lat=2.0, k=3, max_distance=500.0, min_distance=None)
+    pipeline = nearest_pipeline(near, {"properties.kind": "road"})
+    assert pipeline == [
+        {
+            "$geoNear": {
+                "near": {"type": "Point", "coordinates": [1.0, 2.0]},
+                "key": "geometry",
+                "distanceField": "distance",
+                "spherical": True,
+                "maxDistance": 500.0,
+                "query": {"properties.kind": "road"},
+            },
+        },
+        {"$limit": 3},
+    ]
+
+
+@pytest.mark.asyncio()
+async def test_grid_pipeline_counts_features_per_cell() -> None:
+    """Tests features are counted in the cell of the center of their bounds."""
+    collection = DBFeature.get_motor_collection()
+    await collection.insert_many(
+        [
+            {"bounds": {"min_x": 0.5, "min_y": 0.5, "max_x": 1.5, "max_y": 1.5}},
+            {
+                "bounds": {"min_x": 1.2, "min_y": 1.2, "max_x": 1.4, "max_y": 1.4},
+                "properties": {"kind": "road"},
+            },
+            {
+                "bounds": {"min_x": -3, "min_y": 2, "max_x": -3, "max_y": 2},
+                "properties": {"kind": "road"},
+            },
+            {"bounds": {"min_x": 180, "min_y": 90, "max_x": 180, "max_y": 90}},
+            {"bounds": None},
+        ],
+    )
+
+    cursor = collection.aggregate(grid_pipeline(GridParams(resolution=1), {}))
+    counts = {
+        (count["_id"]["column"], count["_id"]["row"]): count["count"]
+        for count in await cursor.to_list(None)
+    }
+    assert counts == {(181, 91): 2, (177, 92): 1, (359, 179): 1}
+
+    grid = GridParams(resolution=1, group_by="kind")
+    cursor = collection.aggregate(grid_pipeline(grid, {}))
+    groups = {
+        (count["_id"]["column"], count["_id"]["group"]): count["count"]
+        for count in await cursor.to_list(None)
+        if "group" in count["_id"]
+    }
+    assert groups == {(181, "road"): 1, (177, "road"): 1}
+
+
+@pytest.mark.asyncio()
+async def test_property_keys_pipeline_lists_distinct_keys() -> None:
+    """Tests the keys of the properties of matching features are listed once."""
+    collection = DBFeature.get_motor_collection()
+    await collection.insert_many(
+        [
+            {"properties": {"name": "a", "kind": "road"}},
+            {"properties": {"kind": "river"}},
+            {"properties": {"name": "b", "width": "2"}},
+        ],
+    )
+
+    cursor = collection.aggregate(property_keys_pipeline({}))
+    assert [key["_id"] for key in await cursor.to_list(None)] == [
+        "kind",
+        "name",
+        "width",
+    ]
+    cursor = collection.aggregate(
+        property_keys_pipeline({"properties.kind": "river"}),
+    )
+    assert [key["_id"] for key in await cursor.to_list(None)] == ["kind"]
+
+
+def test_field_set_projects_requested_fields() -> None:
+    """Tests requested fields are read with the validator fields, then removed."""
+    fields = FieldSet.parse("id, properties.name", None)
+    assert fields is not None
+    assert fields.paths == ("_id", "properties.name")
+    assert not fields.includes_geometry
+    assert fields.projection() == {
+        "_id": 1,
+        "properties.name": 1,
+        "revision": 1,
+        "updated_at": 1,
+    }
+    assert fields.projection(validators=False) == {"_id": 1, "properties.name": 1}
+    document = {"_id": 1, "properties": {"name": "a"}, "revision": 2}
+    assert fields.strip(document) == {"_id": 1, "properties": {"name": "a"}}
+
+
+def test_field_set_projects_excluded_fields() -> None:
+    """Tests excluded fields are left out, the validator fields still read."""
+    fields = FieldSet.parse(None, "geometry,revision")
+    assert fields is not None
+    assert fields.projection() == {"geometry": 0}
+    assert fields.projection(validators=False) == {"geometry": 0, "revision": 0}
+    assert fields.strip({"_id": 1, "revision": 2, "updated_at": 3}) == {
+        "_id": 1,
+        "updated_at": 3,
+    }
+    assert FieldSet.parse(None, "revision").projection() is None  # type: ignore
+    assert FieldSet.parse(None, None) is None
+
+
+@pytest.mark.parametrize(
+    ("fields", "exclude", "message"),
+    [
+        ("geometry,nope", None, "Invalid field: nope"),
+        ("properties.$where", None, "Invalid field"),
+        ("properties,properties.name", None, "Overlapping fields"),
+        (None, "id", "can not be excluded"),
+        ("geometry", "bounds", "can not be combined"),
+    ],
+)
+def test_field_set_rejects_invalid_fields(
+    fields: str | None,
+    exclude: str | None,
+    message: str,
+) -> None:
+    """Tests unknown, unsafe and overlapping fields are rejected."""
+    with pytest.raises(ValueError, match=message):
+        FieldSet.parse(fields, exclude)
+
+
+def test_nearest_pipeline_projects_fields_with_distance() -> None:
+    """Tests the projection of the nearest features keeps their distance."""
+    near = NearestParams(lon=0.0, lat=0.0)
+    assert nearest_pipeline(near, projection={"properties": 1})[-1] == {
+        "$project": {"properties": 1, "distance": 1},
+    }
+    assert nearest_pipeline(near, projection={"geometry": 0})[-1] == {
+        "$project": {"geometry": 0},
+    }
+
+
+def _arc_midpoint_latitude(start: list[float], end: list[float]) -> float:
+    """Returns the latitude of the middle of the great-circle arc of an edge."""
+    vectors = [
+        (
+            math.cos(math.radians(lat)) * math.cos(math.radians(lon)),
+            math.cos(math.radians(lat)) * math.sin(math.radians(lon)),
+            math.sin(math.radians(lat)),
+        )
+        for lon, lat in (start, end)
+    ]
+    x, y, z = (a + b for a, b in zip(*vectors, strict=True))
+    return math.degrees(math.atan2(z, math.hypot(x, y)))
+
+
+@pytest.mark.parametrize(
+    "bounds",
+    [Bounds(0, 40, 90, 60), Bounds(-180, -60, 180, -10), Bounds(10, 0.5, 10.5, 1)],
+)
+def test_rectangle_geometry_edges_follow_their_latitude(bounds: Bounds) -> None:
+    """Tests the arcs of the edges stay close to the sides of the rectangle."""
+    geometry = rectangle_geometry(bounds)
+    polygons = (
+        [geometry["coordinates"]]
+        if geometry["type"] == "Polygon"
+        else geometry["coordinates"]
+    )
+    for (ring,) in polygons:
+        assert ring[0] == ring[-1]
+        for start, end in pairwise(ring):
+            middle = _arc_midpoint_latitude(start, end)
+            assert abs(middle - (start[1] + end[1]) / 2) < 0.01
@@ -0,0 +1,47 @@
+"""Implements tests for the raw document encoding."""
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pytest_mock import MockerFixture
+
+from feature_store.server import serialization
+from feature_store.server.serialization import RawJSONResponse, dumps
+
+
+@pytest.mark.parametrize("encoder", [serialization.orjson, None])
+def test_dumps_encodes_raw_documents(mocker: MockerFixture, encoder: object) -> None:
+    """Tests ids and times are encoded as strings, with or without orjson."""
+    mocker.patch.object(serialization, "orjson", encoder)
+    feature_id = ObjectId()
+    document = {
+        "_id": feature_id,
+        "type": "Feature",
+        "properties": {"name": "é"},
+        "updated_at": datetime(2023, 5, 1, 12, 30, 15, 123000),  # noqa: DTZ001
+    }
+
+    encoded = dumps([document])
+    assert json.loads(encoded) == [
+        {
+            "_id": str(feature_id),
+            "type": "Feature",
+            "properties": {"name": "é"},
+            "updated_at": "2023-05-01T12:30:15.123000",
+        },
+    ]
+    assert b" " not in encoded
+
+
+def test_dumps_rejects_unknown_values() -> None:
+    """Tests values without a JSON form are rejected."""
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_raw_json_response_renders_documents() -> None:
+    """Tests the response body is the encoded documents."""
+    response = RawJSONResponse([{"_id": ObjectId("0" * 24)}])
+    assert response.body == b'[{"_id":"000000000000000000000000"}]'
+    assert response.media_type == "application/json"
@@ -0,0 +1,57 @@
+"""Implements tests for the production server launcher."""
+import pytest
+from pytest_mock import MockerFixture
+
+from feature_store.server import serve
+from feature_store.server.serve import APP, ServerSettings, available_cores, main
+
+
+def test_server_settings_default_to_one_worker_per_core(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Tests the workers default to the cores available to the process."""
+    monkeypatch.delenv("FEATURE_STORE_SERVER_WORKERS", raising=False)
+    assert ServerSettings().workers == available_cores() >= 1
+
+
+def test_server_settings_from_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Tests the worker and socket options come from the environment."""
+    monkeypatch.setenv("FEATURE_STORE_SERVER_WORKERS", "3")
+    monkeypatch.setenv("FEATURE_STORE_SERVER_BACKLOG", "4096")
+    monkeypatch.setenv("FEATURE_STORE_SERVER_KEEP_ALIVE", "10")
+    options = ServerSettings().uvicorn_options()
+
+    assert options["workers"] == 3
+    assert options["backlog"] == 4096
+    assert options["timeout_keep_alive"] == 10
+    assert options["timeout_graceful_shutdown"] == 30
+
+
+def test_server_settings_fall_back_without_uvloop(mocker: MockerFixture) -> None:
+    """Tests asyncio and h11 are used when uvloop and httptools are missing."""
+    mocker.patch.object(serve, "find_spec", return_value=None)
+    options = ServerSettings().uvicorn_options()
+    assert options["loop"] == "asyncio"
+    assert options["http"] == "h11"
+
+
+def test_server_settings_use_uvloop_when_installed(mocker: MockerFixture) -> None:
+    """Tests uvloop and httptools are used when they are installed."""
+    mocker.patch.object(serve, "find_spec", return_value=object())
+    options = ServerSettings().uvicorn_options()
+    assert options["loop"] == "uvloop"
+    assert options["http"] == "httptools"
+
+
+def test_main_runs_the_app_by_import_string(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Tests the app is passed by import string, so each worker imports it."""
+    monkeypatch.setenv("FEATURE_STORE_SERVER_WORKERS", "2")
+    run = mocker.patch.object(serve.uvicorn, "run")
+    main()
+
+    run.assert_called_once()
+    assert run.call_args.args == (APP,)
+    assert run.call_args.kwargs["workers"] == 2
@@ -0,0 +1,42 @@
+"""Implements tests for the in-memory spatial index."""
+import random
+
+from feature_store.server.geometry import Bounds
+from feature_store.server.spatial_index import SpatialIndex
+
+
+def _random_bounds(rng: random.Random) -> Bounds:
+    """Returns a random bounding box, from points to continent sized boxes."""
+    width = rng.choice([0.0, 0.01, 1.0, 30.0, 200.0])
+    height = rng.choice([0.0, 0.01, 1.0, 30.0, 100.0])
+    min_x = rng.uniform(-180, 180 - width)
+    min_y = rng.uniform(-90, 90 - height)
+    return Bounds(min_x, min_y, min_x + width, min_y + height)
+
+
+def test_search_matches_brute_force() -> None:
+    """Tests searches return exactly the overlapping boxes."""
+    rng = random.Random(42)
+    boxes = {key: _random_bounds(rng) for key in range(500)}
+    index: SpatialIndex[int] = SpatialIndex()
+    for key, bounds in boxes.items():
+        index.insert(key, bounds)
+
+    for _ in range(200):
+        query = _random_bounds(rng)
+        expected = {key for key, bounds in boxes.items() if bounds.intersects(query)}
+        assert index.search(query) == expected
+
+
+def test_insert_replaces_and_remove_forgets() -> None:
+    """Tests re-inserting a key moves it and removing it drops it."""
+    index: SpatialIndex[str] = SpatialIndex()
+    index.insert("a", Bounds(0, 0, 1, 1))
+    index.insert("a", Bounds(50, 50, 51, 51))
+    assert index.search(Bounds(0, 0, 1, 1)) == set()
+    assert index.search(Bounds(50, 50, 60, 60)) == {"a"}
+
+    index.remove("a")
+    assert "a" not in index
+    assert len(index) == 0
+    assert index.search(Bounds(-180, -90, 180, 90)) == set()
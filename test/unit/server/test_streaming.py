@@ -0,0 +1,69 @@
+"""Implements tests for streamed feature responses."""
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from bson import ObjectId
+
+from feature_store.server.streaming import StreamFormat, iter_documents
+
+
+async def _cursor(documents: list[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    """Mimics a Motor cursor over the given documents."""
+    for document in documents:
+        yield document
+
+
+def _documents(count: int) -> list[dict[str, Any]]:
+    """Builds raw feature documents as they are stored in the database."""
+    return [
+        {
+            "_id": ObjectId(),
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [float(i), 0.0]},
+            "properties": {"index": str(i)},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize("count", [0, 1, 3, 4, 7])
+async def test_iter_documents_geojson_is_valid_across_chunks(count: int) -> None:
+    """Tests the streamed FeatureCollection is valid JSON for any chunking."""
+    documents = _documents(count)
+    chunks = [
+        chunk
+        async for chunk in iter_documents(
+            _cursor(documents),
+            StreamFormat.GEOJSON,
+            batch_size=3,
+        )
+    ]
+
+    collection = json.loads("".join(chunks))
+    assert collection["type"] == "FeatureCollection"
+    assert [feature["_id"] for feature in collection["features"]] == [
+        str(document["_id"]) for document in documents
+    ]
+
+
+@pytest.mark.asyncio()
+async def test_iter_documents_ndjson_yields_one_chunk_per_batch() -> None:
+    """Tests NDJSON output holds one document per line, chunked per batch."""
+    documents = _documents(7)
+    chunks = [
+        chunk
+        async for chunk in iter_documents(
+            _cursor(documents),
+            StreamFormat.NDJSON,
+            batch_size=3,
+        )
+    ]
+
+    assert len(chunks) == 3
+    lines = "".join(chunks).splitlines()
+    assert [json.loads(line)["properties"]["index"] for line in lines] == [
+        str(i) for i in range(7)
+    ]
@@ -0,0 +1,52 @@
+"""Implements tests for the feature subscriptions."""
+import pytest
+from beanie import PydanticObjectId
+
+from feature_store.server.geometry import Bounds
+from feature_store.server.subscriptions import (
+    EventType,
+    FeatureEvent,
+    SubscriptionHub,
+)
+
+
+def _event(event: EventType = EventType.UPDATED) -> FeatureEvent:
+    """Builds an event for a new feature id."""
+    return FeatureEvent(event=event, feature_id=PydanticObjectId())
+
+
+@pytest.mark.asyncio()
+async def test_publish_sends_events_to_overlapping_subscriptions() -> None:
+    """Tests events only reach the subscriptions around the written feature."""
+    hub = SubscriptionHub(max_events=10)
+    west = hub.subscribe(Bounds(-10, -10, 0, 10))
+    east = hub.subscribe(Bounds(5, -10, 10, 10))
+
+    created = _event(EventType.CREATED)
+    assert hub.publish(created, None, Bounds(-5, 0, -5, 0)) == 1
+    moved = _event()
+    assert hub.publish(moved, Bounds(-5, 0, -5, 0), Bounds(6, 0, 7, 1)) == 2
+    assert hub.publish(_event(), Bounds(20, 20, 21, 21)) == 0
+
+    assert await west.get() == created
+    assert await west.get() == moved
+    assert await east.get() == moved
+
+
+@pytest.mark.asyncio()
+async def test_unsubscribed_and_overflowing_subscriptions_stop() -> None:
+    """Tests removed subscriptions and subscribers that fall behind stop."""
+    hub = SubscriptionHub(max_events=1)
+    area = Bounds(0, 0, 1, 1)
+    removed = hub.subscribe(area)
+    hub.unsubscribe(removed)
+    slow = hub.subscribe(area)
+    assert len(hub) == 1
+
+    first = _event()
+    assert hub.publish(first, area) == 1
+    assert hub.publish(_event(), area) == 0
+    assert len(hub) == 0
+    assert slow.overflowed
+    assert await slow.get() == first
+    assert await slow.get() is None
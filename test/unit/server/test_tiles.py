@@ -0,0 +1,146 @@
+"""Implements tests for the vector tile encoding."""
+import pytest
+from pytest_mock import MockerFixture
+
+from feature_store.server.geometry import Bounds
+from feature_store.server.tiles import (
+    EXTENT,
+    LINE_STRING,
+    POINT,
+    POLYGON,
+    TileCache,
+    encode_geometry,
+    encode_tile,
+    tile_bounds,
+)
+
+
+def _unzigzag(value: int) -> int:
+    """Decodes a zigzag encoded integer."""
+    return (value >> 1) ^ -(value & 1)
+
+
+def _decode_commands(commands: list[int]) -> list[tuple[int, list[tuple[int, int]]]]:
+    """Decodes geometry commands to absolute tile coordinates."""
+    decoded = []
+    cursor = (0, 0)
+    index = 0
+    while index < len(commands):
+        command, count = commands[index] & 7, commands[index] >> 3
+        index += 1
+        points = []
+        if command != 7:
+            for _ in range(count):
+                cursor = (
+                    cursor[0] + _unzigzag(commands[index]),
+                    cursor[1] + _unzigzag(commands[index + 1]),
+                )
+                points.append(cursor)
+                index += 2
+        decoded.append((command, points))
+    return decoded
+
+
+def test_tile_bounds() -> None:
+    """Tests the lon/lat bounds of tiles."""
+    world = tile_bounds(0, 0, 0)
+    assert world.min_x == -180
+    assert world.max_x == 180
+    assert world.max_y == pytest.approx(85.0511287798066)
+    assert tile_bounds(1, 1, 0) == Bounds(0, 0, 180, world.max_y)
+
+
+def test_encode_point() -> None:
+    """Tests a point is projected to the tile grid."""
+    encoded = encode_geometry({"type": "Point", "coordinates": [0, 0]}, (0, 0, 0))
+    assert encoded is not None
+    geometry_type, commands = encoded
+    assert geometry_type == POINT
+    assert _decode_commands(commands) == [(1, [(EXTENT // 2, EXTENT // 2)])]
+
+
+def test_encode_point_outside_tile() -> None:
+    """Tests a point outside of the tile is dropped."""
+    point = {"type": "Point", "coordinates": [-90, 0]}
+    assert encode_geometry(point, (1, 1, 0)) is None
+
+
+def test_encode_line_is_clipped() -> None:
+    """Tests a line leaving the tile is clipped at the tile buffer."""
+    line = {"type": "LineString", "coordinates": [[-90, -10], [90, -10]]}
+    encoded = encode_geometry(line, (1, 1, 1))
+    assert encoded is not None
+    geometry_type, commands = encoded
+    assert geometry_type == LINE_STRING
+    (_, (start,)), (_, (end,)) = _decode_commands(commands)
+    assert start[0] == -64
+    assert end[0] == EXTENT // 2
+
+
+def test_encode_polygon_winding_and_clipping() -> None:
+    """Tests exterior rings have a positive area and are clipped to the tile."""
+    polygon = {
+        "type": "Polygon",
+        "coordinates": [[[-170, -80], [170, -80], [170, 80], [-170, 80], [-170, -80]]],
+    }
+    encoded = encode_geometry(polygon, (1, 0, 0))
+    assert encoded is not None
+    geometry_type, commands = encoded
+    assert geometry_type == POLYGON
+    decoded = _decode_commands(commands)
+    ring = decoded[0][1] + decoded[1][1]
+    area = sum(
+        ring[index - 1][0] * point[1] - point[0] * ring[index - 1][1]
+        for index, point in enumerate(ring)
+    )
+    assert area > 0
+    assert all(-64 <= x <= EXTENT + 64 and -64 <= y <= EXTENT + 64 for x, y in ring)
+    assert decoded[-1] == (7, [])
+
+
+def test_encode_tile() -> None:
+    """Tests features are encoded in a single layer, empty tiles as no bytes."""
+    document = {
+        "_id": "64b000000000000000000000",
+        "geometry": {"type": "Point", "coordinates": [0, 0]},
+        "properties": {"name": "origin"},
+    }
+    content = encode_tile([document], (0, 0, 0))
+    assert content[0] == 0x1A
+    assert b"features" in content
+    assert b"origin" in content
+    assert encode_tile([document], (1, 0, 0)) != b""
+    assert encode_tile([document], (2, 0, 0)) == b""
+
+
+def test_tile_cache_invalidates_overlapping_tiles() -> None:
+    """Tests writes drop only the cached tiles they overlap."""
+    cache = TileCache(max_bytes=1_000)
+    cache.put((1, 0, 0), b"west")
+    cache.put((1, 1, 0), b"east")
+    cache.invalidate("feature", Bounds(100, 10, 101, 11))
+    assert cache.get((1, 1, 0)) is None
+    assert cache.get((1, 0, 0)) == b"west"
+
+
+def test_tile_cache_invalidates_tiles_showing_feature() -> None:
+    """Tests writes drop the tiles built from the feature, wherever it moved."""
+    cache = TileCache(max_bytes=1_000)
+    cache.put((1, 0, 0), b"west", ["moved"])
+    cache.put((1, 1, 0), b"east", ["other"])
+    cache.invalidate("moved", None)
+    assert cache.get((1, 0, 0)) is None
+    assert cache.get((1, 1, 0)) == b"east"
+
+
+def test_tile_cache_expires_tiles(mocker: MockerFixture) -> None:
+    """Tests tiles are rebuilt once older than the TTL, for writes elsewhere."""
+    monotonic = mocker.patch("feature_store.server.tiles.time.monotonic")
+    monotonic.return_value = 100.0
+    cache = TileCache(max_bytes=1_000, ttl=30)
+    cache.put((1, 0, 0), b"west", ["feature"])
+    monotonic.return_value = 120.0
+    assert cache.get((1, 0, 0)) == b"west"
+    monotonic.return_value = 131.0
+    assert cache.get((1, 0, 0)) is None
+    cache.invalidate("feature", None)
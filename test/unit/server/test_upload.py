@@ -0,0 +1,80 @@
+"""Implements tests for the incremental FeatureCollection parser."""
+import json
+
+import pytest
+
+from feature_store.server.upload import FeatureStreamParser, ParsedFeature, UploadError
+
+FEATURES = [
+    {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [index, -index]},
+        "properties": {"name": f"Zürich {index}"},
+    }
+    for index in range(20)
+]
+
+
+def _parse(body: bytes, chunk_size: int) -> list[ParsedFeature]:
+    """Parses a body fed in chunks of `chunk_size` bytes."""
+    parser = FeatureStreamParser()
+    features = []
+    for start in range(0, len(body), chunk_size):
+        features.extend(parser.feed(body[start : start + chunk_size]))
+    features.extend(parser.close())
+    return features
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 1_000_000])
+def test_parser_yields_features_with_their_byte_offset(chunk_size: int) -> None:
+    """Tests features are parsed whatever the chunks, with their byte offset."""
+    body = json.dumps(
+        {"type": "FeatureCollection", "bbox": [0, -19, 19, 0], "features": FEATURES},
+        ensure_ascii=False,
+        indent=2,
+    ).encode()
+
+    features = _parse(body, chunk_size)
+    assert [feature.value for feature in features] == FEATURES
+    assert [feature.index for feature in features] == list(range(len(FEATURES)))
+    decoder = json.JSONDecoder()
+    for feature in features:
+        value, _ = decoder.raw_decode(body[feature.offset :].decode())
+        assert value == feature.value
+
+
+def test_parser_accepts_empty_collections() -> None:
+    """Tests collections without features are parsed."""
+    assert _parse(b'{"features": [], "type": "FeatureCollection"}', 3) == []
+    assert _parse(b"{}", 1) == []
+
+
+@pytest.mark.parametrize(
+    ("body", "message", "offset"),
+    [
+        (b'{"type": "Feature", "features": []}', "Not a FeatureCollection", 9),
+        (b'{"features": [{"a": 1},]}', "Expecting value", 23),
+        (b'{"features": [{"a": tru}]}', "Expecting value", 20),
+        (b'{"features": [{"a": 1}', "Unexpected end of the upload", 22),
+        (b'{"features": []} []', "Unexpected data", 17),
+        (b'{"features": ["\xff"]}', "Invalid UTF-8", 15),
+        (b'["features"]', "Expecting '{'", 0),
+    ],
+)
+def test_parser_reports_errors_with_their_byte_offset(
+    body: bytes,
+    message: str,
+    offset: int,
+) -> None:
+    """Tests malformed uploads raise UploadError at the offset of the error."""
+    with pytest.raises(UploadError, match=message) as error:
+        _parse(body, 4)
+    assert error.value.offset == offset
+
+
+def test_parser_limits_undecodable_values() -> None:
+    """Tests a value that can not be decoded is reported past the size limit."""
+    parser = FeatureStreamParser(max_value_bytes=16)
+    assert list(parser.feed(b'{"features": [{"a": ')) == []
+    with pytest.raises(UploadError, match="Expecting"):
+        list(parser.feed(b"[" * 32))
@@ -0,0 +1,101 @@
+"""Implements tests for the validation and normalization of geometries."""
+import pytest
+
+from feature_store.server import validation
+from feature_store.server.models.geojson import (
+    GeoJsonLineString,
+    GeoJsonPoint,
+    GeoJsonPolygon,
+)
+from feature_store.server.validation import normalize_geometries, normalize_geometry
+
+
+@pytest.fixture(autouse=True, params=["python", "numpy"])
+def _implementation(
+    request: pytest.FixtureRequest,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Runs each test with the plain Python checks and with NumPy, if installed."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(validation, "np", None)
+
+
+def test_normalize_keeps_valid_geometries() -> None:
+    """Tests geometries needing no change are returned as they are."""
+    geometries = [
+        GeoJsonPoint(coordinates=[1.0, 2.0]),
+        GeoJsonLineString(coordinates=[[0.0, 0.0], [1.0, 1.0, 5.0]]),
+        GeoJsonPolygon(
+            coordinates=[
+                [[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0], [0.0, 0.0]],
+                [[1.0, 1.0], [1.0, 2.0], [2.0, 2.0], [1.0, 1.0]],
+            ],
+        ),
+    ]
+    normalized, errors = normalize_geometries(geometries)
+    assert errors == {}
+    assert all(normalized[index] is geometries[index] for index in range(3))
+
+
+def test_normalize_closes_and_winds_rings() -> None:
+    """Tests rings are closed, exteriors counterclockwise and holes clockwise."""
+    polygon = GeoJsonPolygon(
+        coordinates=[
+            [[0.0, 0.0], [0.0, 4.0], [4.0, 4.0], [4.0, 0.0]],
+            [[1.0, 1.0], [2.0, 1.0], [2.0, 2.0], [1.0, 1.0, 3.0]],
+        ],
+    )
+    assert normalize_geometry(polygon).coordinates == [
+        [[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0], [0.0, 0.0]],
+        [[1.0, 1.0], [2.0, 2.0], [2.0, 1.0], [1.0, 1.0]],
+    ]
+
+
+def test_normalize_removes_duplicate_positions() -> None:
+    """Tests consecutive duplicates are removed, keeping the first position."""
+    line = GeoJsonLineString(
+        coordinates=[[0.0, 0.0, 1.0], [0.0, 0.0, 2.0], [1.0, 1.0], [1.0, 1.0]],
+    )
+    assert normalize_geometry(line).coordinates == [[0.0, 0.0, 1.0], [1.0, 1.0]]
+
+    polygon = GeoJsonPolygon(
+        coordinates=[[[0.0, 0.0], [1.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]],
+    )
+    assert normalize_geometry(polygon).coordinates == [
+        [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]],
+    ]
+
+
+def test_normalize_reports_invalid_geometries_by_index() -> None:
+    """Tests each invalid geometry is reported without affecting the others."""
+    geometries = [
+        GeoJsonPoint(coordinates=[0.0, 91.0]),
+        GeoJsonPoint(coordinates=[float("nan"), 0.0]),
+        GeoJsonLineString(coordinates=[[1.0, 1.0], [1.0, 1.0]]),
+        GeoJsonPolygon(coordinates=[[[0.0, 0.0], [1.0, 1.0], [2.0, 2.0]]]),
+        GeoJsonPolygon(coordinates=[[[0.0, 0.0], [1.0, 0.0], [0.0, 0.0]]]),
+        GeoJsonLineString(coordinates=[]),
+        GeoJsonPoint(coordinates=[1.0]),
+        GeoJsonPoint(coordinates=[180.0, -90.0]),
+    ]
+    normalized, errors = normalize_geometries(geometries)
+    assert errors == {
+        0: "Position out of range or not finite",
+        1: "Position out of range or not finite",
+        2: "LineString has fewer than 2 distinct positions",
+        3: "Polygon ring has no area",
+        4: "Polygon ring has fewer than 3 distinct positions",
+        5: "Geometry has no positions",
+        6: "Position has fewer than 2 coordinates",
+    }
+    assert list(normalized) == [7]
+
+
+def test_normalize_geometry_raises_for_invalid_geometry() -> None:
+    """Tests a single invalid geometry raises a ValueError with the reason."""
+    with pytest.raises(ValueError, match="no area"):
+        normalize_geometry(
+            GeoJsonPolygon(coordinates=[[[0.0, 0.0], [1.0, 1.0], [2.0, 2.0]]]),
+        )
@@ -0,0 +1,60 @@
+"""Implements tests for the WKB encoding."""
+import struct
+
+import pytest
+
+from feature_store.server.wkb import decode_wkb, encode_wkb
+
+GEOMETRIES = [
+    {"type": "Point", "coordinates": [1.5, -2.0]},
+    {"type": "LineString", "coordinates": [[0.0, 0.0], [1.0, 1.0], [2.0, 0.5]]},
+    {
+        "type": "Polygon",
+        "coordinates": [
+            [[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 0.0]],
+            [[1.0, 1.0], [2.0, 1.0], [2.0, 2.0], [1.0, 1.0]],
+        ],
+    },
+]
+
+
+@pytest.mark.parametrize("geometry", GEOMETRIES)
+def test_wkb_round_trip(geometry: dict[str, object]) -> None:
+    """Tests geometries are decoded as they were encoded."""
+    assert decode_wkb(encode_wkb(geometry)) == geometry
+
+
+def test_encode_wkb_point_layout() -> None:
+    """Tests points are encoded as little-endian WKB."""
+    assert encode_wkb({"type": "Point", "coordinates": [1.0, 2.0]}) == struct.pack(
+        "<BIdd",
+        1,
+        1,
+        1.0,
+        2.0,
+    )
+
+
+def test_encode_wkb_drops_extra_dimensions() -> None:
+    """Tests positions with an elevation are encoded in two dimensions."""
+    line = {"type": "LineString", "coordinates": [[0.0, 0.0, 5.0], [1.0, 1.0, 6.0]]}
+    assert decode_wkb(encode_wkb(line))["coordinates"] == [[0.0, 0.0], [1.0, 1.0]]
+
+
+def test_decode_wkb_big_endian() -> None:
+    """Tests big-endian WKB is decoded."""
+    data = struct.pack(">BIIdddd", 0, 2, 2, 0.0, 1.0, 2.0, 3.0)
+    assert decode_wkb(data) == {
+        "type": "LineString",
+        "coordinates": [[0.0, 1.0], [2.0, 3.0]],
+    }
+
+
+def test_wkb_rejects_unsupported_geometries() -> None:
+    """Tests unsupported and truncated geometries raise ValueError."""
+    with pytest.raises(ValueError, match="Unsupported geometry type"):
+        encode_wkb({"type": "MultiPoint", "coordinates": [[0.0, 0.0]]})
+    with pytest.raises(ValueError, match="Unsupported WKB geometry type"):
+        decode_wkb(struct.pack("<BI", 1, 4))
+    with pytest.raises(ValueError, match="cut short"):
+        decode_wkb(encode_wkb(GEOMETRIES[2])[:-16])